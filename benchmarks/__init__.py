@@ -0,0 +1,9 @@
+"""Offline-Benchmarks der Brunata München Integration.
+
+Aufruf aus dem Repository-Verzeichnis::
+
+    python -m benchmarks.run -o results.json
+
+Alle Messungen laufen gegen ein lokales Ersatz-Portal (`fake_portal`) und
+benötigen keinen Netzzugang.
+"""
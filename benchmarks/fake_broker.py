@@ -0,0 +1,191 @@
+"""Lokaler Ersatz-Broker für MQTT 3.1.1 (CONNECT, PUBLISH, PUBACK, DISCONNECT).
+
+Dekodiert jedes Paket unabhängig vom Client nach der Spezifikation und
+vermerkt Abweichungen in `BrokerStats.errors`, statt sie zu tolerieren.
+Retained-Nachrichten werden je Topic gespeichert. Optional sendet der Broker
+vor jedem PUBACK ein eigenes PUBLISH an den Client, um zu prüfen, dass der
+Client eingehende Pakete nach ihrer Restlänge trennt.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+from dataclasses import dataclass, field
+
+_CONNECT = 1
+_PUBLISH = 3
+_DISCONNECT = 14
+
+# Vom Broker eingestreutes Paket (QoS 0, Topic eines fremden Abonnements)
+_FOREIGN_TOPIC = "broker/notice"
+_FOREIGN_PAYLOAD = b"x" * 200
+
+
+def _remaining_length(length: int) -> bytes:
+    """Restlänge nach MQTT 3.1.1, Abschnitt 2.2.3."""
+    encoded = bytearray()
+    while True:
+        digit = length % 128
+        length //= 128
+        if length:
+            digit |= 0x80
+        encoded.append(digit)
+        if not length:
+            return bytes(encoded)
+
+
+@dataclass(slots=True)
+class BrokerStats:
+    """Empfangene Pakete und gefundene Protokollfehler."""
+
+    connects: int = 0
+    publishes: int = 0
+    acks: int = 0
+    bytes_received: int = 0
+    # Topic -> Payload der zuletzt retained gesendeten Nachricht
+    retained: dict[str, bytes] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, object]:
+        """JSON-fähige Zusammenfassung."""
+        return {
+            "connects": self.connects,
+            "publishes": self.publishes,
+            "acks": self.acks,
+            "bytes_received": self.bytes_received,
+            "retained": len(self.retained),
+            "errors": self.errors[:10],
+        }
+
+
+class FakeBroker:
+    """Lokaler TCP-Server, der einen MQTT-Broker nachbildet."""
+
+    def __init__(self, *, interleave: bool = False) -> None:
+        self.interleave = interleave
+        self.stats = BrokerStats()
+        self.host = "127.0.0.1"
+        self.port = 0
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def _async_read(self, reader: asyncio.StreamReader) -> tuple[int, bytes]:
+        """Erstes Header-Byte und Restdaten eines Pakets."""
+        first = (await reader.readexactly(1))[0]
+        length, multiplier = 0, 1
+        for position in range(4):
+            digit = (await reader.readexactly(1))[0]
+            length += (digit & 0x7F) * multiplier
+            multiplier *= 128
+            if not digit & 0x80:
+                if position and digit == 0:
+                    self.stats.errors.append("Restlänge nicht minimal kodiert")
+                break
+        else:
+            raise ValueError("Restlänge länger als vier Bytes")
+        self.stats.bytes_received += 2 + position + length
+        return first, await reader.readexactly(length)
+
+    def _string(self, body: bytes, offset: int, what: str) -> tuple[str, int]:
+        """UTF-8-Zeichenkette mit Längenpräfix ab `offset`."""
+        if offset + 2 > len(body):
+            raise ValueError(f"{what}: Längenpräfix fehlt")
+        (length,) = struct.unpack_from("!H", body, offset)
+        end = offset + 2 + length
+        if end > len(body):
+            available = len(body) - offset - 2
+            raise ValueError(f"{what}: {length} Bytes angekündigt, {available} vorhanden")
+        return body[offset + 2 : end].decode(), end
+
+    def _connect(self, body: bytes) -> None:
+        """CONNECT prüfen (Protokollname, Level 4, Flags und Payload)."""
+        protocol, offset = self._string(body, 0, "Protokollname")
+        if protocol != "MQTT" or body[offset] != 4:
+            raise ValueError(f"Protokoll {protocol!r} Level {body[offset]}")
+        flags = body[offset + 1]
+        if flags & 0x01:
+            raise ValueError("Reserviertes CONNECT-Flag gesetzt")
+        offset += 4  # Level, Flags, Keep-Alive
+        _client_id, offset = self._string(body, offset, "Client-ID")
+        if flags & 0x80:
+            _username, offset = self._string(body, offset, "Benutzername")
+        if flags & 0x40:
+            _password, offset = self._string(body, offset, "Passwort")
+        if offset != len(body):
+            raise ValueError(f"CONNECT: {len(body) - offset} überzählige Bytes")
+        self.stats.connects += 1
+
+    def _publish(self, first: int, body: bytes) -> bytes | None:
+        """PUBLISH prüfen und speichern. Liefert das PUBACK (QoS 1)."""
+        qos = (first >> 1) & 0x03
+        if qos > 1:
+            raise ValueError(f"QoS {qos} nicht unterstützt")
+        topic, offset = self._string(body, 0, "Topic")
+        if not topic or any(char in topic for char in "#+\0"):
+            raise ValueError(f"Ungültiges Topic {topic!r}")
+        packet_id = None
+        if qos:
+            (packet_id,) = struct.unpack_from("!H", body, offset)
+            if packet_id == 0:
+                raise ValueError("Paket-ID 0")
+            offset += 2
+        payload = body[offset:]
+        self.stats.publishes += 1
+        if first & 0x01:
+            self.stats.retained[topic] = payload
+        if packet_id is None:
+            return None
+        self.stats.acks += 1
+        return b"\x40\x02" + struct.pack("!H", packet_id)
+
+    def _foreign_publish(self) -> bytes:
+        """PUBLISH des Brokers an den Client (länger als ein PUBACK)."""
+        topic = _FOREIGN_TOPIC.encode()
+        body = struct.pack("!H", len(topic)) + topic + _FOREIGN_PAYLOAD
+        return b"\x30" + _remaining_length(len(body)) + body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Eine Client-Verbindung bis DISCONNECT oder Verbindungsende."""
+        self._writers.add(writer)
+        connected = False
+        try:
+            while True:
+                first, body = await self._async_read(reader)
+                kind = first >> 4
+                if kind == _CONNECT and not connected:
+                    self._connect(body)
+                    connected = True
+                    writer.write(b"\x20\x02\x00\x00")
+                elif kind == _PUBLISH and connected:
+                    if (ack := self._publish(first, body)) is not None:
+                        if self.interleave:
+                            writer.write(self._foreign_publish())
+                        writer.write(ack)
+                elif kind == _DISCONNECT and not body:
+                    break
+                else:
+                    raise ValueError(f"Unerwartetes Paket {first:#04x}")
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        except (ValueError, IndexError, UnicodeDecodeError, struct.error) as err:
+            self.stats.errors.append(str(err))
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def async_start(self) -> FakeBroker:
+        """Starte den Server auf einem freien Port."""
+        self._server = await asyncio.start_server(self._handle, self.host, 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def async_stop(self) -> None:
+        """Beende den Server und alle Verbindungen."""
+        for writer in list(self._writers):
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
@@ -0,0 +1,328 @@
+"""Lokales Ersatz-Portal mit Login und den OData-Diensten von `BrunataClient`.
+
+Beantwortet dieselben Anfragen wie das Nutzerportal (Login-Seiten,
+`NP_REG_LOGON_SRV_01`, `NP_APPLAUNCHER_SRV` und `NP_DASHBOARD_SRV` per
+`$batch`) mit synthetischen, reproduzierbaren Daten. Latenz, Anzahl der
+Zähler je Art und Jahre an Historie sind einstellbar. Der Multipart-Body
+jedes `$batch` wird geprüft; gebündelte Anfragen (mehrere Teile) lassen
+sich ablehnen oder einzelne Teile fehlschlagen bzw. leer beantworten.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from urllib.parse import unquote
+
+from aiohttp import web
+
+_ODATA = "/sap/opu/odata/bme/{service}/"
+_BOUNDARY = "fakeportal_0"
+_REQUEST_RE = re.compile(r"GET (\S+) HTTP/1\.1\r\n")
+_CONTENT_BOUNDARY_RE = re.compile(r"boundary=([^;\s]+)")
+_COST_TYPE_RE = re.compile(r"Kotyp eq '(\w+)'")
+_BIS_RE = re.compile(r"Bis eq datetime'(\d{4})-")
+
+
+def parse_batch_request(content_type: str, body: str) -> list[str] | None:
+    """Relative GETs eines `$batch`-Bodys; None, wenn er nicht dem Format entspricht.
+
+    Erwartet je Teil `Content-Type: application/http`, eine Leerzeile und
+    eine GET-Zeile sowie die abschließende Boundary.
+    """
+    match = _CONTENT_BOUNDARY_RE.search(content_type)
+    if match is None:
+        return None
+    chunks = body.split(f"--{match.group(1)}")
+    if len(chunks) < 3 or chunks[0].strip() or not chunks[-1].startswith("--"):
+        return None
+    gets = []
+    for chunk in chunks[1:-1]:
+        headers, _, request = chunk.lstrip("\r\n").partition("\r\n\r\n")
+        if "Content-Type: application/http" not in headers:
+            return None
+        if (get := _REQUEST_RE.match(request)) is None:
+            return None
+        gets.append(get.group(1))
+    return gets
+
+
+def _sap_date(moment: datetime) -> str:
+    """SAP-Datum (`/Date(ms)/`)."""
+    return f"/Date({int(moment.timestamp() * 1000)})/"
+
+
+@dataclass(slots=True)
+class PortalConfig:
+    """Umfang der synthetischen Daten."""
+
+    heating: int = 1
+    hot_water: int = 1
+    cold_water: int = 2
+    years: int = 2
+    # Heizungszähler, die nur in älteren Perioden vorkommen (getauscht)
+    replaced: int = 0
+    # Ende der jüngsten Abrechnungsperiode
+    end_year: int = 2025
+    latency: float = 0.02  # Sekunden je Anfrage
+    # $batch mit mehr Teilen wird mit HTTP 400 abgelehnt (None = unbegrenzt)
+    max_batch_parts: int | None = None
+    # Kostenarten, deren Teile in gebündelten Anfragen mit 500 bzw. leer
+    # beantwortet werden (einzeln abgefragt antworten sie normal)
+    failing_parts: tuple[str, ...] = ()
+    empty_parts: tuple[str, ...] = ()
+
+    @property
+    def cost_types(self) -> list[str]:
+        """Alle Kostenarten (HZ01.., WW01.., KW01..)."""
+        return [
+            f"{prefix}{number:02d}"
+            for prefix, count in (("HZ", self.heating), ("WW", self.hot_water), ("KW", self.cold_water))
+            for number in range(1, count + 1)
+        ]
+
+    @property
+    def replaced_cost_types(self) -> list[str]:
+        """Kostenarten der getauschten Zähler (nach den aktuellen HZ-Nummern)."""
+        return [f"HZ{self.heating + number:02d}" for number in range(1, self.replaced + 1)]
+
+    @property
+    def meters(self) -> int:
+        """Anzahl aller Zähler."""
+        return self.heating + self.hot_water + self.cold_water
+
+
+@dataclass(slots=True)
+class PortalStats:
+    """Zähler der beantworteten Anfragen."""
+
+    requests: int = 0
+    logins: int = 0
+    batch_parts: int = 0
+    # Abgelehnte $batch-Anfragen (Teile-Limit oder ungültiger Body)
+    rejected: int = 0
+    malformed: int = 0
+    bytes_sent: int = 0
+    by_kind: Counter[str] = field(default_factory=Counter)
+
+    def as_dict(self) -> dict[str, object]:
+        """JSON-fähige Zusammenfassung."""
+        return {
+            "requests": self.requests,
+            "logins": self.logins,
+            "batch_parts": self.batch_parts,
+            "rejected": self.rejected,
+            "malformed": self.malformed,
+            "bytes_sent": self.bytes_sent,
+            "by_kind": dict(self.by_kind),
+        }
+
+
+class FakePortal:
+    """Lokaler HTTP-Server, der das Nutzerportal nachbildet."""
+
+    def __init__(self, config: PortalConfig | None = None) -> None:
+        self.config = config or PortalConfig()
+        self.stats = PortalStats()
+        self.url = ""
+        self._runner: web.AppRunner | None = None
+        # Antworten sind deterministisch und werden je Anfrage nur einmal erzeugt
+        self._answers: dict[str, str] = {}
+
+    # Daten
+
+    def _periods(self) -> list[tuple[datetime, datetime]]:
+        """Abrechnungsperioden (Kalenderjahre), jüngste zuerst."""
+        return [
+            (datetime(year, 1, 1, tzinfo=UTC), datetime(year, 12, 31, tzinfo=UTC))
+            for year in range(self.config.end_year, self.config.end_year - self.config.years, -1)
+        ]
+
+    def _monthly_value(self, cost_type: str, month: int) -> float:
+        """Monatsverbrauch mit Jahresgang (Heizung im Winter höher)."""
+        number = int(cost_type[2:])
+        if cost_type.startswith("HZ"):
+            base, swing = 120.0 + number, 100.0
+        elif cost_type.startswith("WW"):
+            base, swing = 40.0 + number, 8.0
+        else:
+            base, swing = 3.0 + number / 10, 0.5
+        return round(base + swing * math.cos(2 * math.pi * (month % 12) / 12), 3)
+
+    def _months(self) -> list[datetime]:
+        """Alle Monatsanfänge der Historie, älteste zuerst."""
+        first_year = self.config.end_year - self.config.years + 1
+        return [
+            datetime(first_year + index // 12, index % 12 + 1, 1, tzinfo=UTC)
+            for index in range(self.config.years * 12)
+        ]
+
+    def _answer(self, relative: str) -> dict[str, object]:
+        """JSON-Antwort einer Teilabfrage."""
+        relative = unquote(relative)
+        if relative.startswith("InfoTextSet"):
+            return {"d": {"Textid": "BME_NP_REG_LOGON_START", "Text": ""}}
+        if relative.startswith("UserContextSet"):
+            return {"d": {"results": [{"UserUnitID": "U1", "Partner": "P1", "Roles": {"results": []}}]}}
+        if relative.startswith("DatesSet"):
+            current = self.config.cost_types
+            older = [*current, *self.config.replaced_cost_types]
+            return {
+                "d": {
+                    "results": [
+                        {
+                            "Abdatum": _sap_date(start),
+                            "Bisdatum": _sap_date(end),
+                            "Units": {
+                                "results": [
+                                    {"CostType": ct} for ct in (older if index else current)
+                                ]
+                            },
+                        }
+                        for index, (start, end) in enumerate(self._periods())
+                    ]
+                }
+            }
+        match = _COST_TYPE_RE.search(relative)
+        cost_type = match.group(1) if match else "HZ01"
+        unit = "m³" if cost_type.startswith("KW") else "kWh"
+        months = self._months()
+        period = _BIS_RE.search(relative)
+        if period is not None:
+            # Monatswerte der angefragten Abrechnungsperiode (Kalenderjahr)
+            months = [moment for moment in months if moment.year == int(period.group(1))]
+        if relative.startswith("CumuConsumptionMonSet"):
+            return {
+                "d": {
+                    "results": [
+                        {
+                            "Datum": _sap_date(moment),
+                            "Verbrauch": f"{self._monthly_value(cost_type, moment.month - 1):.3f}",
+                            "MassreadTxt": unit,
+                        }
+                        for moment in months
+                    ]
+                }
+            }
+        if relative.startswith("CumuConsumptionSet"):
+            total = sum(self._monthly_value(cost_type, moment.month - 1) for moment in months)
+            return {"d": {"results": [{"Verbrauch": f" {total:.3f} ", "MassreadTxt": unit}]}}
+        return {"error": {"message": f"Unbekannte Abfrage {relative}"}}
+
+    def _part(self, relative: str, coalesced: bool = False) -> str:
+        """Ein Teil der Multipart-Antwort (zwischengespeichert)."""
+        if coalesced and (match := _COST_TYPE_RE.search(unquote(relative))):
+            # Fehler nur in gebündelten Anfragen, damit Einzelabrufe gelingen
+            if match.group(1) in self.config.failing_parts:
+                error = {"error": {"message": "Fehler"}}
+                return self._format_part("500 Internal Server Error", error)
+            if match.group(1) in self.config.empty_parts:
+                return self._format_part("200 OK", {"d": {"results": []}})
+        if relative not in self._answers:
+            answer = self._answer(relative)
+            status = "400 Bad Request" if "error" in answer else "200 OK"
+            self._answers[relative] = self._format_part(status, answer)
+        return self._answers[relative]
+
+    @staticmethod
+    def _format_part(status: str, answer: dict[str, object]) -> str:
+        """Teil der Multipart-Antwort mit Status und JSON."""
+        return (
+            f"--{_BOUNDARY}\r\nContent-Type: application/http\r\n"
+            "Content-Transfer-Encoding: binary\r\n\r\n"
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n\r\n"
+            f"{json.dumps(answer, ensure_ascii=False)}\r\n"
+        )
+
+    # HTTP
+
+    async def _delay(self, kind: str) -> None:
+        """Zähle die Anfrage und simuliere die Latenz des Portals."""
+        self.stats.requests += 1
+        self.stats.by_kind[kind] += 1
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+
+    def _respond(self, text: str, status: int = 200, **kwargs: object) -> web.Response:
+        """Antwort mit Zählung der gesendeten Bytes."""
+        self.stats.bytes_sent += len(text.encode())
+        return web.Response(text=text, status=status, **kwargs)
+
+    async def _page(self, request: web.Request) -> web.Response:
+        """Statische Seiten der Oberfläche (Login, Dienste)."""
+        await self._delay("page")
+        return self._respond("<html></html>", content_type="text/html")
+
+    async def _head(self, request: web.Request) -> web.Response:
+        """CSRF-Token eines OData-Dienstes."""
+        await self._delay("csrf")
+        return web.Response(headers={"x-csrf-token": f"token-{request.match_info['service']}"})
+
+    async def _batch(self, request: web.Request) -> web.Response:
+        """`$batch` mit einer oder mehreren Teilabfragen."""
+        service = request.match_info["service"]
+        body = await request.text()
+        await self._delay(f"batch:{service}")
+        if "CredentialSet" in body:
+            self.stats.logins += 1
+            credential = {
+                "d": {
+                    "Userid": "BENCH",
+                    "Password": base64.b64encode(b"secret").decode(),
+                    "Serviceurl": "/np_dienste",
+                }
+            }
+            text = (
+                f"--{_BOUNDARY}\r\nContent-Type: multipart/mixed; boundary=changeset_0\r\n\r\n"
+                "--changeset_0\r\nContent-Type: application/http\r\n\r\n"
+                f"HTTP/1.1 201 Created\r\nContent-Type: application/json\r\n\r\n"
+                f"{json.dumps(credential)}\r\n--changeset_0--\r\n--{_BOUNDARY}--\r\n"
+            )
+        else:
+            gets = parse_batch_request(request.headers.get("Content-Type", ""), body)
+            if not gets:
+                self.stats.malformed += 1
+                return self._respond("Ungültiger $batch", status=400)
+            limit = self.config.max_batch_parts
+            if limit is not None and len(gets) > limit:
+                self.stats.rejected += 1
+                return self._respond("Zu viele Teile", status=400)
+            self.stats.batch_parts += len(gets)
+            coalesced = len(gets) > 1
+            text = (
+                "".join(self._part(relative, coalesced) for relative in gets)
+                + f"--{_BOUNDARY}--\r\n"
+            )
+        return self._respond(
+            text,
+            status=202,
+            headers={"Content-Type": f"multipart/mixed; boundary={_BOUNDARY}"},
+        )
+
+    async def async_start(self) -> FakePortal:
+        """Starte den Server auf einem freien Port."""
+        app = web.Application(client_max_size=16 * 1024**2)
+        app.router.add_get("/np_anmeldung/index.html", self._page)
+        app.router.add_get("/np_dienste", self._page)
+        app.router.add_get("/np_dienste/index.html", self._page)
+        app.router.add_route("HEAD", _ODATA.format(service="{service}"), self._head)
+        app.router.add_post(_ODATA.format(service="{service}") + "$batch", self._batch)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def async_stop(self) -> None:
+        """Beende den Server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,749 @@
+"""Benchmarks für Abruf, Einrichtung, kumulative Historie, Sensor-Properties, Speicher und Modell.
+
+Dazu Prüfungen der $batch-Bündelung gegen das Ersatz-Portal (abgelehnte
+Bündel, fehlgeschlagene und leere Teile) und der MQTT-Ausgabe gegen einen
+Ersatz-Broker (Durchsatz für Tausende Zähler, Paketformat, nur geänderte
+Werte); schlägt eine Prüfung fehl, endet der Lauf mit Exit-Code 1.
+
+Aufruf::
+
+    python -m benchmarks.run -o results.json
+    python -m benchmarks.run --quick --compare results.json
+
+Ergebnisse werden als JSON geschrieben; `metrics` enthält alle Messwerte
+flach unter stabilen Namen, sodass zwei Läufe (z.B. zweier Versionen)
+direkt verglichen werden können.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_URL, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from brunata_api.models import Reading, ReadingKind
+
+from custom_components.brunata_muenchen import sensor as sensor_platform
+from custom_components.brunata_muenchen.config_flow import BrunataMuenchenConfigFlow
+from custom_components.brunata_muenchen.const import DOMAIN, SENSOR_TYPE_METER
+from custom_components.brunata_muenchen.coordinator import (
+    BrunataMuenchenCoordinator,
+    _build_cumulative_history,
+)
+from custom_components.brunata_muenchen.cumulative import CumulativeIndex
+from custom_components.brunata_muenchen.model import BrunataSnapshot, CostTypeData
+from custom_components.brunata_muenchen.mqtt import (
+    MeterState,
+    MqttBridge,
+    MqttConnection,
+    MqttMessage,
+)
+
+from .fake_broker import FakeBroker
+from .fake_portal import FakePortal, PortalConfig
+
+_LOGGER = logging.getLogger(__name__)
+
+RESULTS_SCHEMA = 1
+ROOT = Path(__file__).parents[1]
+MANIFEST = ROOT / "custom_components" / DOMAIN / "manifest.json"
+
+# Module, die Home Assistant beim Start ohnehin lädt (nicht Teil der Messung)
+PRELOADED_MODULES = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.components.recorder",
+    "homeassistant.components.sensor",
+    "httpx",
+)
+_IMPORTTIME_RE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)$")
+
+# Eigenschaften, die Home Assistant beim Schreiben eines Zustands liest
+SENSOR_PROPERTIES = (
+    "native_value",
+    "native_unit_of_measurement",
+    "last_reset",
+    "extra_state_attributes",
+    "device_info",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    """Ein Konto mit einer bestimmten Anzahl Zähler und Jahren Historie."""
+
+    name: str
+    heating: int
+    hot_water: int
+    cold_water: int
+    years: int
+
+    def portal(self, latency: float) -> PortalConfig:
+        """Konfiguration des Ersatz-Portals."""
+        return PortalConfig(
+            heating=self.heating,
+            hot_water=self.hot_water,
+            cold_water=self.cold_water,
+            years=self.years,
+            latency=latency,
+        )
+
+
+SCENARIOS = (
+    Scenario("typical", 1, 1, 2, 2),
+    Scenario("large", 8, 8, 8, 10),
+)
+QUICK_SCENARIOS = (Scenario("typical", 1, 1, 2, 2),)
+
+# Fehlerfälle des Ersatz-Portals für die $batch-Prüfung (Szenario BATCH_SCENARIO)
+BATCH_SCENARIO = Scenario("batch", 2, 1, 2, 2)
+BATCH_MODES: dict[str, dict[str, Any]] = {
+    "ok": {},
+    "part_failure": {"failing_parts": ("HZ02",)},
+    "empty_part": {"empty_parts": ("WW01",)},
+    "rejected": {"max_batch_parts": 1},
+}
+
+
+class _NullStatistics:
+    """Langzeitstatistik braucht den Recorder und ist nicht Teil der Messung."""
+
+    async def async_import(self, *args: Any, **kwargs: Any) -> None:
+        """Nichts importieren."""
+
+
+def _summary(samples: Sequence[float]) -> dict[str, float]:
+    """Minimum, Median und Maximum in Millisekunden."""
+    return {
+        "min_ms": round(min(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+async def _async_make_hass(config_dir: str) -> HomeAssistant:
+    """Minimale Home-Assistant-Instanz ohne Start der Integrationen."""
+    from homeassistant import loader  # erst nach homeassistant.core importierbar
+
+    hass = HomeAssistant(config_dir)
+    hass.config.config_dir = config_dir
+    loader.async_setup(hass)
+    return hass
+
+
+def _make_entry(url: str) -> ConfigEntry:
+    """Konfigurationseintrag für das Ersatz-Portal."""
+    return ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="Benchmark",
+        data={
+            CONF_URL: url,
+            CONF_USERNAME: "benchmark",
+            CONF_PASSWORD: "benchmark",
+            "sap_client": "201",
+        },
+        source="user",
+        options={},
+    )
+
+
+async def _async_timed(call: Callable[[], Awaitable[Any]]) -> tuple[float, Any]:
+    """Laufzeit eines Aufrufs in Sekunden und sein Ergebnis."""
+    started = time.perf_counter()
+    result = await call()
+    return time.perf_counter() - started, result
+
+
+async def async_bench_refresh(
+    hass: HomeAssistant, scenario: Scenario, latency: float, rounds: int
+) -> tuple[dict[str, Any], BrunataMuenchenCoordinator, FakePortal]:
+    """`_async_update_data`: erster Abruf (mit Login) und Folgeabrufe."""
+    portal = await FakePortal(scenario.portal(latency)).async_start()
+    entry = _make_entry(portal.url)
+    coordinator = BrunataMuenchenCoordinator(hass, entry)
+    coordinator._statistics = _NullStatistics()  # type: ignore[assignment]
+
+    cold, snapshot = await _async_timed(coordinator._async_update_data)
+    coordinator.data = snapshot
+    cold_requests = portal.stats.requests
+    cold_bytes = portal.stats.bytes_sent
+
+    warm: list[float] = []
+    before = portal.stats.requests
+    for _ in range(rounds):
+        seconds, snapshot = await _async_timed(coordinator._async_update_data)
+        coordinator.data = snapshot
+        warm.append(seconds)
+    warm_requests = (portal.stats.requests - before) / rounds
+
+    result = {
+        "scenario": asdict(scenario),
+        "latency_ms": latency * 1000,
+        "cost_types": len(snapshot.cost_types),
+        "cold_ms": round(cold * 1000, 3),
+        "cold_requests": cold_requests,
+        "cold_bytes": cold_bytes,
+        "warm": _summary(warm),
+        "warm_requests": warm_requests,
+        "portal": portal.stats.as_dict(),
+    }
+    return result, coordinator, portal
+
+
+async def async_check_batch(hass: HomeAssistant, latency: float) -> dict[str, Any]:
+    """Anfragen und Daten je Fehlerfall des Ersatz-Portals (Bündel und Einzelabrufe).
+
+    Jeder Fall muss dieselben Daten liefern wie ein fehlerfreies Portal;
+    `checks` hält fest, ob Bündelung, Nachladen einzelner Teile und der
+    Rückfall auf Einzelabrufe wie vorgesehen gegriffen haben.
+    """
+    results: dict[str, Any] = {}
+    reference: dict[str, Any] | None = None
+    for mode, failures in BATCH_MODES.items():
+        config = BATCH_SCENARIO.portal(latency)
+        for name, value in failures.items():
+            setattr(config, name, value)
+        portal = await FakePortal(config).async_start()
+        coordinator = BrunataMuenchenCoordinator(hass, _make_entry(portal.url))
+        coordinator._statistics = _NullStatistics()  # type: ignore[assignment]
+        try:
+            coordinator.data = await coordinator._async_update_data()
+            cold = portal.stats.as_dict()
+            coordinator.data = await coordinator._async_update_data()
+            batch = coordinator.batch
+            assert batch is not None
+            data = dict(coordinator.data.cost_types)
+            reference = data if reference is None else reference
+            results[mode] = {
+                "cold_requests": cold["requests"],
+                "warm_requests": portal.stats.requests - cold["requests"],
+                "batch_parts": portal.stats.batch_parts,
+                "rejected": portal.stats.rejected,
+                "malformed": portal.stats.malformed,
+                "batches": batch.batches,
+                "fallbacks": batch.fallbacks,
+                "batch_enabled": batch.enabled,
+                "cost_types": len(data),
+                "matches_ok": data == reference,
+            }
+        finally:
+            await coordinator.async_shutdown()
+            await portal.async_stop()
+
+    ok, failure, empty, rejected = (results[mode] for mode in BATCH_MODES)
+    results["checks"] = {
+        "valid_multipart": all(results[mode]["malformed"] == 0 for mode in BATCH_MODES),
+        "same_data": all(results[mode]["matches_ok"] for mode in BATCH_MODES),
+        # Folgeabruf: ein einziges $batch für alle Kostenarten
+        "warm_single_request": ok["warm_requests"] == 1 and ok["fallbacks"] == 0,
+        # HZ02 (Zählerstand und Monatsreihe) in beiden Abrufen einzeln nachgeladen
+        "failed_part_refetched": failure["fallbacks"] == 4 and failure["batch_enabled"],
+        # WW01 (Zählerstand und Monatsreihe) in beiden Abrufen einzeln nachgeladen
+        "empty_part_refetched": empty["fallbacks"] == 4 and empty["batch_enabled"],
+        # Abgelehntes Bündel schaltet $batch ab, danach nur Einzelabrufe
+        "rejected_falls_back": rejected["rejected"] == 1
+        and not rejected["batch_enabled"]
+        and rejected["warm_requests"] > ok["warm_requests"],
+    }
+    return results
+
+
+# Zähler je MQTT-Durchgang; jeder hundertste ändert sich im dritten Durchgang
+MQTT_METERS = 10_000
+QUICK_MQTT_METERS = 2_000
+# Payload-Größen mit 1, 2, 3 und 4 Bytes Restlänge
+MQTT_PAYLOAD_SIZES = (10, 200, 20_000, 2_100_000)
+
+
+def _meter_states(meters: int, generation: int) -> list[MeterState]:
+    """Zählerstände; `generation` verändert jeden hundertsten Wert."""
+    return [
+        MeterState(
+            f"HZ{number:05d}",
+            SENSOR_TYPE_METER,
+            float(number + (generation if number % 100 == 0 else 0)),
+            "kWh",
+            "2025-12-31T00:00:00+00:00",
+        )
+        for number in range(meters)
+    ]
+
+
+async def async_bench_mqtt(meters: int) -> dict[str, Any]:
+    """MQTT-Ausgabe vieler Zähler über eine Verbindung zum Ersatz-Broker.
+
+    Drei Durchgänge: alle Werte mit Discovery, dieselben Werte (nichts zu
+    senden) und jeder hundertste Wert geändert. Der Broker dekodiert jedes
+    Paket selbst; ein zweiter Broker streut vor jedem PUBACK ein eigenes
+    PUBLISH ein.
+    """
+    broker = await FakeBroker().async_start()
+    connection = MqttConnection(broker.host, broker.port, client_id="benchmark")
+    bridge = MqttBridge(connection, "bench", "node", discovery=True)
+    try:
+        first_s, first = await _async_timed(
+            lambda: bridge.async_publish(_meter_states(meters, 0))
+        )
+        repeat_s, repeat = await _async_timed(
+            lambda: bridge.async_publish(_meter_states(meters, 0))
+        )
+        changed_s, changed = await _async_timed(
+            lambda: bridge.async_publish(_meter_states(meters, 1))
+        )
+        await connection.async_publish_many(
+            [MqttMessage(f"bench/size/{size}", "x" * size) for size in MQTT_PAYLOAD_SIZES]
+        )
+    finally:
+        await connection.async_close()
+        await broker.async_stop()
+
+    # Alle PUBACKs müssen zwischen den fremden Paketen erkannt werden
+    noisy = await FakeBroker(interleave=True).async_start()
+    noisy_connection = MqttConnection(noisy.host, noisy.port, client_id="benchmark")
+    acked = False
+    try:
+        async with asyncio.timeout(30):
+            await noisy_connection.async_publish_many(
+                [MqttMessage(f"bench/noisy/{number}", "1") for number in range(1000)]
+            )
+        acked = True
+    except (TimeoutError, OSError, asyncio.IncompleteReadError) as err:
+        _LOGGER.warning("MQTT mit eingestreuten Paketen fehlgeschlagen: %r", err)
+    finally:
+        await noisy_connection.async_close()
+        await noisy.async_stop()
+
+    stats = broker.stats
+    retained = stats.retained
+    # Zuletzt gesendeter Wert je Zustands-Topic (dritter Durchgang)
+    expected = {
+        bridge.state_topic(state.cost_type, state.sensor_type): state.value
+        for state in _meter_states(meters, 1)
+    }
+    return {
+        "meters": meters,
+        "first": {
+            "messages": first,
+            "ms": round(first_s * 1000, 3),
+            "messages_per_second": round(first / first_s),
+        },
+        "repeat": {"messages": repeat, "ms": round(repeat_s * 1000, 3)},
+        "changed": {"messages": changed, "ms": round(changed_s * 1000, 3)},
+        "broker": stats.as_dict(),
+        "checks": {
+            "valid_packets": not stats.errors and not noisy.stats.errors,
+            "single_connection": stats.connects == 1,
+            # Discovery und Zustand je Zähler sowie die Größen-Nachrichten
+            "all_retained": len(retained) == 2 * meters + len(MQTT_PAYLOAD_SIZES),
+            "payloads_match": all(
+                json.loads(retained.get(topic, b"{}")).get("value") == value
+                for topic, value in expected.items()
+            ),
+            "length_encoding": all(
+                retained.get(f"bench/size/{size}") == b"x" * size for size in MQTT_PAYLOAD_SIZES
+            ),
+            "unchanged_skipped": repeat == 0,
+            "changed_only": changed == meters // 100,
+            "foreign_packets_skipped": acked and len(noisy.stats.retained) == 1000,
+        },
+    }
+
+
+def bench_import(rounds: int) -> dict[str, Any]:
+    """Importzeit der Integration (Config Flow) in einem frischen Interpreter."""
+    module = f"custom_components.{DOMAIN}.config_flow"
+    code = "; ".join(f"import {name}" for name in (*PRELOADED_MODULES, module))
+    samples: list[float] = []
+    modules: set[str] = set()
+    for _ in range(rounds):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        for line in process.stderr.splitlines():
+            if (match := _IMPORTTIME_RE.match(line)) is None:
+                continue
+            name = match.group(3)
+            modules.add(name)
+            if name == module:
+                samples.append(int(match.group(1)) / 1e6)
+    return {
+        "module": module,
+        **_summary(samples),
+        "loads_brunata_api": "brunata_api" in modules,
+    }
+
+
+async def async_bench_setup(
+    hass: HomeAssistant, scenario: Scenario, latency: float
+) -> dict[str, Any]:
+    """Einrichtung über den Config Flow bis zum ersten Snapshot."""
+    portal = await FakePortal(scenario.portal(latency)).async_start()
+    entry = _make_entry(portal.url)
+    try:
+        flow = BrunataMuenchenConfigFlow()
+        flow.hass = hass
+        flow.handler = DOMAIN
+        flow_seconds, result = await _async_timed(
+            lambda: flow.async_step_user(dict(entry.data))
+        )
+        assert result["type"] == "create_entry", result
+
+        coordinator = BrunataMuenchenCoordinator(hass, entry)
+        coordinator._statistics = _NullStatistics()  # type: ignore[assignment]
+        refresh_seconds, _ = await _async_timed(coordinator._async_update_data)
+        await coordinator.async_shutdown()
+        return {
+            "scenario": scenario.name,
+            "latency_ms": latency * 1000,
+            "flow_ms": round(flow_seconds * 1000, 3),
+            "first_refresh_ms": round(refresh_seconds * 1000, 3),
+            "total_ms": round((flow_seconds + refresh_seconds) * 1000, 3),
+            "logins": portal.stats.logins,
+            "requests": portal.stats.requests,
+        }
+    finally:
+        await portal.async_stop()
+
+
+def bench_cumulative(months: int, rounds: int) -> dict[str, Any]:
+    """Durchsatz von `_build_cumulative_history` (Monatswerte pro Sekunde)."""
+    readings = [
+        Reading(
+            timestamp=datetime(2000 + index // 12, index % 12 + 1, 1, tzinfo=UTC),
+            value=float(index % 17) + 0.25,
+            unit="kWh",
+            kind=ReadingKind.heating,
+        )
+        for index in range(months)
+    ]
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        _build_cumulative_history(readings)
+        samples.append(time.perf_counter() - started)
+    best = min(samples)
+    return {
+        "months": months,
+        **_summary(samples),
+        "readings_per_second": round(months / best) if best else None,
+    }
+
+
+async def async_bench_sensors(
+    hass: HomeAssistant, coordinator: BrunataMuenchenCoordinator, rounds: int
+) -> dict[str, Any]:
+    """Kosten der Properties, die beim Schreiben eines Zustands gelesen werden."""
+    entry = coordinator.entry
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    entities: list[Any] = []
+    await sensor_platform.async_setup_entry(hass, entry, entities.extend)
+    hass.data[DOMAIN].pop(entry.entry_id)
+    sensors = [e for e in entities if isinstance(e, sensor_platform.BrunataSensor)]
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for entity in sensors:
+            for name in SENSOR_PROPERTIES:
+                getattr(entity, name)
+        samples.append(time.perf_counter() - started)
+    best = min(samples)
+    return {
+        "sensors": len(sensors),
+        "properties": len(SENSOR_PROPERTIES),
+        "us_per_sensor": round(best / len(sensors) * 1e6, 3) if sensors else None,
+        "us_per_property": (
+            round(best / (len(sensors) * len(SENSOR_PROPERTIES)) * 1e6, 3) if sensors else None
+        ),
+    }
+
+
+def bench_snapshot_memory(coordinator: BrunataMuenchenCoordinator) -> dict[str, Any]:
+    """Spitzen- und verbleibender Speicher beim Aufbau eines Snapshots."""
+    meters = {
+        cost_type: data.meter
+        for cost_type, data in coordinator.data.cost_types.items()
+        if data.meter is not None
+    }
+    gc.collect()
+    tracemalloc.start()
+    try:
+        snapshot = coordinator._build_snapshot(meters)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "cost_types": len(snapshot.cost_types),
+        "sensor_views": len(snapshot.sensor_views),
+        "peak_bytes": peak,
+        "retained_bytes": retained,
+        "peak_bytes_per_cost_type": round(peak / max(len(snapshot.cost_types), 1)),
+    }
+
+
+def _per_call_us(call: Callable[[], Any], rounds: int) -> float:
+    """Mittlere Dauer eines Aufrufs in Mikrosekunden."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        call()
+    return round((time.perf_counter() - started) / rounds * 1e6, 3)
+
+
+def bench_model(cost_types: int, months: int, rounds: int) -> dict[str, Any]:
+    """Typisiertes Snapshot-Modell gegenüber dem früheren `dict[str, Any]`.
+
+    Früher hielt der Snapshot je Kostenart Listen von brunata-api-Readings
+    (Monatswerte und kumulative Historie) in einem Dict; jetzt `Series` mit
+    Arrays in `CostTypeData`. Gemessen werden der verbleibende Speicher
+    beim Aufbau aus denselben Werten, der letzte kumulative Wert und die
+    Summe über fünf Jahre.
+    """
+    names = [f"HZ{number:02d}" for number in range(1, cost_types + 1)]
+    first = datetime(2000, 1, 1, tzinfo=UTC)
+    epochs = [
+        int(datetime(2000 + index // 12, index % 12 + 1, 1, tzinfo=UTC).timestamp())
+        for index in range(months)
+    ]
+    values = [float(index % 17) + 0.25 for index in range(months)]
+
+    def build_dict() -> dict[str, Any]:
+        monthly: dict[str, list[Reading]] = {}
+        histories: dict[str, list[Reading]] = {}
+        totals: dict[str, float] = {}
+        for name in names:
+            readings = [
+                Reading(
+                    timestamp=datetime.fromtimestamp(epoch, UTC),
+                    value=value,
+                    unit="kWh",
+                    kind=ReadingKind.heating,
+                )
+                for epoch, value in zip(epochs, values)
+            ]
+            total = 0.0
+            history = []
+            for reading in readings:
+                total += reading.value
+                history.append(reading.model_copy(update={"value": total}))
+            monthly[name], histories[name], totals[name] = readings, history, total
+        return {
+            "meter_readings_by_cost_type": {},
+            "monthly_by_cost_type": monthly,
+            "kwh_histories_by_cost_type": histories,
+            "kwh_totals_by_cost_type": totals,
+        }
+
+    def build_typed() -> BrunataSnapshot:
+        data: dict[str, CostTypeData] = {}
+        for name in names:
+            index = CumulativeIndex("kWh")
+            for epoch, value in zip(epochs, values):
+                index.set(epoch, Decimal(repr(value)))
+            monthly, cumulative = index.series()
+            data[name] = CostTypeData(name, None, monthly, cumulative, float(index.total))
+        return BrunataSnapshot(cost_types=data)
+
+    def retained(build: Callable[[], Any]) -> tuple[int, Any]:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = build()
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return size, result
+
+    dict_bytes, old = retained(build_dict)
+    typed_bytes, new = retained(build_typed)
+    name = names[-1]
+    start = first + timedelta(days=365 * (months // 24))
+    end = start + timedelta(days=5 * 365)
+    old_monthly = old["monthly_by_cost_type"][name]
+    return {
+        "cost_types": cost_types,
+        "months": months,
+        "dict": {
+            "retained_bytes": dict_bytes,
+            "last_value_us": _per_call_us(
+                lambda: old["kwh_histories_by_cost_type"][name][-1].value, rounds
+            ),
+            "range_sum_us": _per_call_us(
+                lambda: sum(r.value for r in old_monthly if start <= r.timestamp < end),
+                rounds,
+            ),
+        },
+        "typed": {
+            "retained_bytes": typed_bytes,
+            "last_value_us": _per_call_us(lambda: new.cumulative(name).last_value, rounds),
+            "range_sum_us": _per_call_us(
+                lambda: sum(new.monthly(name).range(start, end).values), rounds
+            ),
+        },
+    }
+
+
+async def async_run(args: argparse.Namespace) -> dict[str, Any]:
+    """Führe alle Benchmarks aus."""
+    scenarios = QUICK_SCENARIOS if args.quick else SCENARIOS
+    rounds = 3 if args.quick else args.rounds
+    results: dict[str, Any] = {
+        "import": bench_import(rounds),
+        "setup": {},
+        "refresh": {},
+        "cumulative": {},
+        "sensors": {},
+        "snapshot_memory": {},
+        "model": bench_model(20, 240, rounds * 1000),
+        "batch": {},
+    }
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_make_hass(config_dir)
+        try:
+            for scenario in scenarios:
+                results["setup"][scenario.name] = await async_bench_setup(
+                    hass, scenario, args.latency / 1000
+                )
+                refresh, coordinator, portal = await async_bench_refresh(
+                    hass, scenario, args.latency / 1000, rounds
+                )
+                results["refresh"][scenario.name] = refresh
+                results["sensors"][scenario.name] = await async_bench_sensors(
+                    hass, coordinator, rounds * 100
+                )
+                results["snapshot_memory"][scenario.name] = bench_snapshot_memory(coordinator)
+                await coordinator.async_shutdown()
+                await portal.async_stop()
+            results["batch"] = await async_check_batch(hass, args.latency / 1000)
+        finally:
+            await hass.async_block_till_done()
+            await hass.async_stop(force=True)
+
+    for months in (12, 120, 1200) if not args.quick else (120,):
+        results["cumulative"][str(months)] = bench_cumulative(months, rounds * 20)
+
+    results["mqtt"] = await async_bench_mqtt(QUICK_MQTT_METERS if args.quick else MQTT_METERS)
+
+    return {
+        "schema": RESULTS_SCHEMA,
+        "version": json.loads(MANIFEST.read_text(encoding="utf-8")).get("version"),
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"latency_ms": args.latency, "rounds": rounds, "quick": args.quick},
+        "results": results,
+        "metrics": flatten_metrics(results),
+    }
+
+
+def flatten_metrics(results: dict[str, Any]) -> dict[str, float]:
+    """Die wichtigsten Messwerte unter stabilen, flachen Namen."""
+    metrics: dict[str, float] = {}
+    if "import" in results:
+        metrics["import.config_flow.median_ms"] = results["import"]["median_ms"]
+    for name, setup in results.get("setup", {}).items():
+        metrics[f"setup.{name}.total_ms"] = setup["total_ms"]
+        metrics[f"setup.{name}.logins"] = setup["logins"]
+    for name, refresh in results["refresh"].items():
+        metrics[f"refresh.{name}.cold_ms"] = refresh["cold_ms"]
+        metrics[f"refresh.{name}.cold_requests"] = refresh["cold_requests"]
+        metrics[f"refresh.{name}.warm_median_ms"] = refresh["warm"]["median_ms"]
+        metrics[f"refresh.{name}.warm_requests"] = refresh["warm_requests"]
+    for months, cumulative in results["cumulative"].items():
+        metrics[f"cumulative.{months}.readings_per_second"] = cumulative["readings_per_second"]
+    for name, sensors in results["sensors"].items():
+        metrics[f"sensors.{name}.us_per_sensor"] = sensors["us_per_sensor"]
+    for name, memory in results["snapshot_memory"].items():
+        metrics[f"snapshot_memory.{name}.peak_bytes"] = memory["peak_bytes"]
+        metrics[f"snapshot_memory.{name}.retained_bytes"] = memory["retained_bytes"]
+    for mode, batch in results.get("batch", {}).items():
+        if mode != "checks":
+            metrics[f"batch.{mode}.cold_requests"] = batch["cold_requests"]
+            metrics[f"batch.{mode}.warm_requests"] = batch["warm_requests"]
+    if "mqtt" in results:
+        metrics["mqtt.first_ms"] = results["mqtt"]["first"]["ms"]
+        metrics["mqtt.first_messages_per_second"] = results["mqtt"]["first"]["messages_per_second"]
+        metrics["mqtt.changed_ms"] = results["mqtt"]["changed"]["ms"]
+    if "model" in results:
+        for layout in ("dict", "typed"):
+            for key, value in results["model"][layout].items():
+                metrics[f"model.{layout}.{key}"] = value
+    return metrics
+
+
+def compare(previous: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    """Tabelle der Änderungen gegenüber einem früheren Lauf."""
+    old, new = previous.get("metrics", {}), current["metrics"]
+    lines = [f"{'Metrik':<48} {'vorher':>14} {'jetzt':>14} {'Faktor':>8}"]
+    for name in sorted(old.keys() | new.keys()):
+        before, after = old.get(name), new.get(name)
+        ratio = f"{after / before:.2f}" if before and after is not None else "-"
+        lines.append(f"{name:<48} {before if before is not None else '-':>14} "
+                     f"{after if after is not None else '-':>14} {ratio:>8}")
+    return lines
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Kommandozeile."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="-", help="Ergebnisdatei (- = stdout)")
+    parser.add_argument("--latency", type=float, default=20.0, help="Portal-Latenz in ms")
+    parser.add_argument("--rounds", type=int, default=10, help="Wiederholungen je Messung")
+    parser.add_argument("--quick", action="store_true", help="Nur ein kleines Szenario")
+    parser.add_argument("--compare", type=Path, help="Früheres Ergebnis zum Vergleich")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.run(async_run(args))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        print("\n".join(compare(previous, result)), file=sys.stderr)
+    failed = [
+        f"{section}.{name}"
+        for section in ("batch", "mqtt")
+        for name, ok in result["results"][section]["checks"].items()
+        if not ok
+    ]
+    if failed:
+        print(f"Prüfungen fehlgeschlagen: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
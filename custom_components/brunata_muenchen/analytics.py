@@ -0,0 +1,164 @@
+"""Kennzahlen aus der Monatsserie einer Kostenart (Vorjahr, 12 Monate, Prognose)."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import insort
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from .model import Series, from_epoch, to_epoch
+
+# Nachkommastellen der berechneten Werte
+_VALUE_DIGITS = 3
+_PERCENT_DIGITS = 1
+
+FORECAST_SEASONAL = "seasonal"
+FORECAST_LINEAR = "linear"
+
+
+def _round(value: float, digits: int) -> float:
+    """Runde und vermeide -0.0 durch Rundungsreste."""
+    return round(value, digits) + 0.0
+
+
+def _median(ordered: list[float]) -> float:
+    """Median einer bereits sortierten Liste."""
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def _month_index(epoch: int) -> int:
+    """Fortlaufende Monatsnummer eines Zeitstempels."""
+    moment = from_epoch(epoch)
+    return moment.year * 12 + moment.month - 1
+
+
+def _month_epoch(index: int) -> int:
+    """Monatsanfang (UTC) einer fortlaufenden Monatsnummer."""
+    return to_epoch(datetime(index // 12, index % 12 + 1, 1, tzinfo=UTC))
+
+
+def _series(first: int, indices: list[int], values: list[float], unit: str | None) -> Series:
+    """Serie aus Positionen im Monatsraster."""
+    return Series(
+        array("q", (_month_epoch(first + i) for i in indices)),
+        array("d", values),
+        unit,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ConsumptionAnalytics:
+    """Aus der Monatsserie abgeleitete Kennzahlen einer Kostenart.
+
+    Die Serien enthalten nur Monate, für die die Kennzahl definiert ist.
+    """
+
+    # Letzter Monat der Eingangsserie (Epoch-Sekunden)
+    latest: int
+    # Differenz zum selben Monat des Vorjahres
+    yoy: Series
+    # Summe der letzten 12 Monate (nur vollständige Fenster)
+    rolling: Series
+    # Abweichung vom Median desselben Kalendermonats früherer Jahre in %
+    deviation: Series
+    # Hochgerechneter Jahresverbrauch des laufenden Kalenderjahres
+    forecast: float | None
+    forecast_method: str | None
+
+    def latest_value(self, series: Series) -> float | None:
+        """Wert einer Kennzahl für den letzten Monat (None, falls undefiniert)."""
+        return series.last_value if series.last_epoch == self.latest else None
+
+
+def compute_analytics(monthly: Series) -> ConsumptionAnalytics | None:
+    """Berechne alle Kennzahlen in einem Durchlauf über das Monatsraster.
+
+    Die Monatswerte werden in ein lückenloses Raster (fehlende Monate = NaN)
+    gelegt; Vorjahresvergleich und 12-Monats-Summen sind dann Verschiebungen
+    um 12 Positionen bzw. Differenzen zweier Präfixsummen. Für die
+    Median-Abweichung wird je Kalendermonat eine sortierte Liste der
+    bisherigen Werte mitgeführt, der Median ist dann ein Zugriff per Index.
+    """
+    if not monthly:
+        return None
+
+    first = _month_index(monthly.timestamps[0])
+    size = _month_index(monthly.timestamps[-1]) - first + 1
+    grid = array("d", [math.nan]) * size
+    for epoch, value in zip(monthly.timestamps, monthly.values):
+        grid[_month_index(epoch) - first] = value
+
+    # Präfixsummen der Werte und der vorhandenen Monate
+    sums = array("d", [0.0]) * (size + 1)
+    counts = array("q", [0]) * (size + 1)
+    for i, value in enumerate(grid):
+        present = not math.isnan(value)
+        sums[i + 1] = sums[i] + (value if present else 0.0)
+        counts[i + 1] = counts[i] + present
+
+    def window(start: int, end: int) -> tuple[float, int]:
+        """Summe und Anzahl vorhandener Monate in [start, end)."""
+        start = max(start, 0)
+        return sums[end] - sums[start], counts[end] - counts[start]
+
+    yoy_at: list[int] = []
+    yoy_values: list[float] = []
+    rolling_at: list[int] = []
+    rolling_values: list[float] = []
+    deviation_at: list[int] = []
+    deviation_values: list[float] = []
+    # Sortierte Werte früherer Jahre je Kalendermonat (0 = Januar)
+    by_month: list[list[float]] = [[] for _ in range(12)]
+    for i in range(size):
+        value = grid[i]
+        if math.isnan(value):
+            continue
+        if i >= 12 and not math.isnan(grid[i - 12]):
+            yoy_at.append(i)
+            yoy_values.append(_round(value - grid[i - 12], _VALUE_DIGITS))
+        total, count = window(i - 11, i + 1)
+        if i >= 11 and count == 12:
+            rolling_at.append(i)
+            rolling_values.append(_round(total, _VALUE_DIGITS))
+        earlier = by_month[(first + i) % 12]
+        if earlier and (reference := _median(earlier)):
+            deviation_at.append(i)
+            deviation_values.append(
+                _round((value - reference) / reference * 100, _PERCENT_DIGITS)
+            )
+        insort(earlier, value)
+
+    # Prognose: Jahresanteil bis zum aktuellen Monat aus dem Vorjahr übernehmen
+    last = size - 1
+    year_start = last - (first + last) % 12
+    ytd, ytd_months = window(year_start, last + 1)
+    forecast: float | None = None
+    method: str | None = None
+    if year_start >= 12:
+        previous_ytd, previous_ytd_months = window(year_start - 12, last - 11)
+        previous_total, previous_months = window(year_start - 12, year_start)
+        if (
+            previous_months == 12
+            and previous_ytd_months == ytd_months
+            and previous_ytd > 0
+        ):
+            forecast = ytd * previous_total / previous_ytd
+            method = FORECAST_SEASONAL
+    if forecast is None and ytd_months:
+        forecast = ytd / ytd_months * 12
+        method = FORECAST_LINEAR
+
+    unit = monthly.unit
+    return ConsumptionAnalytics(
+        latest=_month_epoch(first + last),
+        yoy=_series(first, yoy_at, yoy_values, unit),
+        rolling=_series(first, rolling_at, rolling_values, unit),
+        deviation=_series(first, deviation_at, deviation_values, "%"),
+        forecast=_round(forecast, _VALUE_DIGITS) if forecast is not None else None,
+        forecast_method=method,
+    )
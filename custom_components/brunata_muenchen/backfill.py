@@ -0,0 +1,409 @@
+"""Nachladen der Monatsreihen aller Abrechnungsperioden (fortsetzbar)."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from array import array
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    BACKFILL_BATCH_SIZE,
+    BACKFILL_CONCURRENCY,
+    BACKFILL_SAVE_DELAY,
+    BACKFILL_STORAGE_VERSION,
+    DOMAIN,
+    ENDPOINT_BACKFILL,
+)
+from .model import Series, to_epoch
+
+if TYPE_CHECKING:
+    from .batch import BrunataBatchReader
+    from .resilience import EndpointGuard
+    from .session import BrunataSession
+
+_LOGGER = logging.getLogger(__name__)
+
+# Kostenarten mit Monatsreihe. KW-Zähler werden bewusst nicht nachgeladen:
+# das Portal liefert auch für sie Monatsreihen, die Integration führt für
+# sie aber nur den letzten Wert (Kubikmeter, keine Summen und Statistik).
+_MONTHLY_PREFIXES = ("HZ", "WW")
+
+# Umrechnung verwandter Einheiten: Einheit -> (Größe, Faktor zur Basiseinheit)
+_UNIT_FACTORS: dict[str, tuple[str, float]] = {
+    "Wh": ("energy", 0.001),
+    "kWh": ("energy", 1.0),
+    "MWh": ("energy", 1000.0),
+    "l": ("volume", 0.001),
+    "m³": ("volume", 1.0),
+    "m3": ("volume", 1.0),
+}
+
+
+def _unit_factor(unit: str | None, target: str | None) -> float | None:
+    """Faktor von `unit` nach `target` (1.0 bei gleicher oder fehlender Einheit).
+
+    None, wenn sich die Einheiten nicht ineinander umrechnen lassen.
+    """
+    if unit is None or target is None or unit == target:
+        return 1.0
+    source, goal = _UNIT_FACTORS.get(unit), _UNIT_FACTORS.get(target)
+    if source is None or goal is None or source[0] != goal[0]:
+        return None
+    return source[1] / goal[1]
+
+
+def stitch_series(parts: Sequence[Series]) -> tuple[Series | None, list[Series]]:
+    """Füge die Monatsserien eines Zählers aus mehreren Perioden zusammen.
+
+    `parts` ist nach Periode sortiert, älteste zuerst. Überschneiden sich
+    Perioden, gilt der Wert der jüngeren. Teile in einer anderen Einheit als
+    die jüngste Periode werden umgerechnet (z.B. MWh nach kWh); lässt sich
+    die Einheit nicht umrechnen, wird der Teil nicht übernommen, sondern als
+    zweiter Wert zurückgegeben, damit der Aufrufer ihn melden kann.
+    """
+    parts = [part for part in parts if part]
+    if not parts:
+        return None, []
+    unit = parts[-1].unit
+    values: dict[int, float] = {}
+    rejected: list[Series] = []
+    for part in parts:
+        factor = _unit_factor(part.unit, unit)
+        if factor is None:
+            rejected.append(part)
+            continue
+        values.update(
+            zip(part.timestamps, (value * factor for value in part.values))
+        )
+    epochs = sorted(values)
+    stitched = Series(array("q", epochs), array("d", (values[epoch] for epoch in epochs)), unit)
+    return stitched, rejected
+
+
+def meter_identities(
+    periods: Sequence[tuple[datetime, set[str]]],
+    units: Mapping[tuple[datetime, str], str | None],
+) -> dict[tuple[datetime, str], str]:
+    """Ordne jede (Periodenende, Kostenart) dem Zähler der jüngsten Periode zu.
+
+    `periods` ist nach Periode sortiert, jüngste zuerst. Das Portal liefert
+    keine Zählernummern; Identität ergibt sich aus benachbarten Perioden:
+    Eine Kostenart, die in der nächstjüngeren Periode weiterbesteht, gehört
+    zum selben Zähler. Verschwindet sie und taucht dort eine neue Kostenart
+    gleicher Art (HZ/WW) auf, gilt diese als Nachfolger (Zählertausch oder
+    Umbenennung, z.B. HZ01 -> HZ02); mehrere werden der Reihe nach und nur
+    bei umrechenbarer Einheit (`units`) zugeordnet. Ohne Nachfolger behält
+    die Kostenart ihren eigenen Namen; ist dieser in der Periode schon
+    einem anderen Zähler zugeordnet, fehlt sie im Ergebnis.
+    """
+    identities: dict[tuple[datetime, str], str] = {}
+    newer: tuple[datetime, set[str]] | None = None
+    for bis, cost_types in periods:
+        if newer is None:
+            identities.update(((bis, cost_type), cost_type) for cost_type in cost_types)
+            newer = (bis, cost_types)
+            continue
+
+        newer_bis, newer_types = newer
+        gone = sorted(cost_types - newer_types)
+        successors = sorted(newer_types - cost_types)
+        for cost_type in sorted(cost_types & newer_types):
+            identities[bis, cost_type] = identities[newer_bis, cost_type]
+        for cost_type in gone:
+            unit = units.get((bis, cost_type))
+            match = next(
+                (
+                    successor
+                    for successor in successors
+                    if successor[:2] == cost_type[:2]
+                    and _unit_factor(unit, units.get((newer_bis, successor))) is not None
+                ),
+                None,
+            )
+            if match is not None:
+                successors.remove(match)
+                identities[bis, cost_type] = identities[newer_bis, match]
+            elif cost_type not in {identities.get((bis, other)) for other in cost_types}:
+                identities[bis, cost_type] = cost_type
+        newer = (bis, cost_types)
+    return identities
+
+
+def _task_key(bis: datetime, cost_type: str) -> str:
+    """Schlüssel einer Abfrage im Checkpoint (Periodenende/Kostenart)."""
+    return f"{to_epoch(bis)}/{cost_type}"
+
+
+class BrunataBackfill:
+    """Lädt die Monatsreihen aller Perioden und Kostenarten eines Kontos nach.
+
+    Der reguläre Abruf kennt nur die aktuelle Periode. Hier wird jede
+    Kombination aus Periode und Kostenart abgefragt, gebündelt zu `$batch`-
+    Anfragen mit höchstens `batch_size` Teilen, von denen höchstens
+    `concurrency` gleichzeitig laufen; das Rate-Limit des gemeinsamen
+    Transports gilt auch hier. Erledigte Abfragen landen im Checkpoint,
+    nach einem Neustart wird dort fortgesetzt.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        batch_size: int = BACKFILL_BATCH_SIZE,
+    ) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, BACKFILL_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill"
+        )
+        self._concurrency = concurrency
+        self._batch_size = batch_size
+        self._done: dict[str, Series] = {}
+        self._lock = asyncio.Lock()
+        self.started: datetime | None = None
+        self.finished: datetime | None = None
+        self.completed: datetime | None = None
+        self.periods = 0
+        self.tasks = 0
+        self.failed = 0
+        self.requests = 0
+        # Ältere Kostenarten, die einem anderen Zähler zugeordnet wurden,
+        # und Teile, die nicht übernommen werden konnten (Diagnose)
+        self.merged: list[dict[str, Any]] = []
+        self.discarded: list[dict[str, Any]] = []
+
+    @property
+    def running(self) -> bool:
+        """True, solange ein Lauf aktiv ist."""
+        return self._lock.locked()
+
+    def _checkpoint(self) -> dict[str, Any]:
+        """Gespeicherter Fortschritt."""
+        return {
+            "started": self.started.isoformat() if self.started else None,
+            "completed": self.completed.isoformat() if self.completed else None,
+            "done": {key: series.as_dict() for key, series in self._done.items()},
+            "merged": self.merged,
+            "discarded": self.discarded,
+        }
+
+    async def async_load(self) -> bool:
+        """Lade den Checkpoint. Liefert True, wenn ein Lauf unvollständig ist."""
+        raw = await self._store.async_load()
+        if not raw:
+            return False
+        started, completed = raw.get("started"), raw.get("completed")
+        self.started = dt_util.parse_datetime(started) if started else None
+        self.completed = dt_util.parse_datetime(completed) if completed else None
+        self._done = {
+            key: Series.from_dict(item) for key, item in (raw.get("done") or {}).items()
+        }
+        self.merged = list(raw.get("merged") or ())
+        self.discarded = list(raw.get("discarded") or ())
+        return self.started is not None and self.completed is None
+
+    async def async_run(
+        self,
+        session: BrunataSession,
+        batch: BrunataBatchReader,
+        guard: EndpointGuard,
+        restart: bool = False,
+    ) -> dict[str, Series]:
+        """Lade alle offenen Abfragen und liefere die zusammengesetzten Serien je Zähler.
+
+        Schlüssel ist die Kostenart des Zählers in der jüngsten Periode, in
+        der er vorkommt (siehe `meter_identities`). Ohne `restart` werden bereits erledigte Abfragen aus dem Checkpoint
+        übernommen. Fehlgeschlagene Abfragen bleiben offen (`failed`).
+        """
+        from .batch import billing_periods  # brunata-api erst beim Abruf laden
+
+        async with self._lock:
+            if restart or self.started is None or self.completed is not None:
+                # Neuer Lauf; sonst beim Checkpoint fortsetzen
+                self._done = {}
+                self.started = dt_util.utcnow()
+                self.completed = None
+            self.finished = None
+            self.failed = 0
+            self.requests = 0
+
+            # Alle Perioden, nicht die gekürzte Liste aus dem Metadaten-Cache
+            dates = await guard.async_call(
+                ENDPOINT_BACKFILL, session.async_call, session.client.get_dashboard_dates
+            )
+            # Jüngste Periode zuerst (nach Datum, nicht nach Reihenfolge im Portal)
+            periods = sorted(
+                (
+                    (bis, {ct for ct in cost_types if ct.startswith(_MONTHLY_PREFIXES)})
+                    for bis, cost_types in billing_periods(dates)
+                ),
+                key=lambda period: period[0],
+                reverse=True,
+            )
+            tasks = [
+                (cost_type, bis)
+                for bis, cost_types in periods
+                for cost_type in sorted(cost_types)
+            ]
+            self.periods = len(periods)
+            self.tasks = len(tasks)
+            pending = [task for task in tasks if _task_key(task[1], task[0]) not in self._done]
+            _LOGGER.debug(
+                "Brunata Nachladen: %d Perioden, %d Abfragen, %d offen",
+                len(periods),
+                len(tasks),
+                len(pending),
+            )
+
+            semaphore = asyncio.Semaphore(self._concurrency)
+            await asyncio.gather(
+                *(
+                    self._async_fetch_chunk(
+                        pending[start : start + self._batch_size],
+                        session,
+                        batch,
+                        guard,
+                        semaphore,
+                    )
+                    for start in range(0, len(pending), self._batch_size)
+                )
+            )
+            self.finished = dt_util.utcnow()
+            await self._store.async_save(self._checkpoint())
+
+            return self._stitch(periods)
+
+    def _stitch(self, periods: Sequence[tuple[datetime, set[str]]]) -> dict[str, Series]:
+        """Setze die geladenen Teile je Zähler zusammen (`periods` jüngste zuerst).
+
+        Zugeordnete und nicht übernommene Teile landen in `merged` bzw.
+        `discarded` (Diagnose-Download) und im Log.
+        """
+        done = {
+            (bis, cost_type): series
+            for bis, cost_types in periods
+            for cost_type in cost_types
+            if (series := self._done.get(_task_key(bis, cost_type))) is not None
+        }
+        identities = meter_identities(
+            periods, {key: series.unit for key, series in done.items()}
+        )
+        self.merged, self.discarded = [], []
+
+        # Perioden älteste zuerst, damit jüngere Werte gewinnen
+        parts: dict[str, list[tuple[datetime, str, Series]]] = {}
+        for (bis, cost_type), series in sorted(done.items(), key=lambda item: item[0]):
+            meter = identities.get((bis, cost_type))
+            if meter is None:
+                self._discard(bis, cost_type, series, None, "keine eindeutige Zuordnung")
+                continue
+            if meter != cost_type:
+                self.merged.append(
+                    {"cost_type": cost_type, "period_end": bis.date().isoformat(), "meter": meter}
+                )
+                _LOGGER.info(
+                    "Brunata Nachladen: %s der Periode bis %s als Vorgänger von %s übernommen",
+                    cost_type,
+                    bis.date(),
+                    meter,
+                )
+            parts.setdefault(meter, []).append((bis, cost_type, series))
+
+        stitched: dict[str, Series] = {}
+        for meter, items in parts.items():
+            series, rejected = stitch_series([part for _bis, _ct, part in items])
+            rejected_ids = {id(part) for part in rejected}
+            for bis, cost_type, part in items:
+                if id(part) in rejected_ids:
+                    self._discard(bis, cost_type, part, meter, "Einheit nicht umrechenbar")
+            if series is not None:
+                stitched[meter] = series
+        return stitched
+
+    def _discard(
+        self,
+        bis: datetime,
+        cost_type: str,
+        series: Series,
+        meter: str | None,
+        reason: str,
+    ) -> None:
+        """Merke einen Teil, der nicht in die Historie übernommen wird."""
+        self.discarded.append(
+            {
+                "cost_type": cost_type,
+                "period_end": bis.date().isoformat(),
+                "meter": meter,
+                "unit": series.unit,
+                "months": len(series),
+                "reason": reason,
+            }
+        )
+        _LOGGER.warning(
+            "Brunata Nachladen: %d Monate von %s (Periode bis %s, Einheit %s) "
+            "nicht übernommen: %s",
+            len(series),
+            cost_type,
+            bis.date(),
+            series.unit,
+            reason,
+        )
+
+    async def _async_fetch_chunk(
+        self,
+        chunk: Sequence[tuple[str, datetime]],
+        session: BrunataSession,
+        batch: BrunataBatchReader,
+        guard: EndpointGuard,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Eine `$batch`-Anfrage; Ergebnisse in den Checkpoint übernehmen."""
+        async with semaphore:
+            self.requests += 1
+            try:
+                results = await guard.async_call(
+                    ENDPOINT_BACKFILL, session.async_call, batch.async_read_monthly, chunk
+                )
+            except Exception as err:
+                _LOGGER.debug("Brunata Nachladen: Anfrage fehlgeschlagen: %r", err)
+                self.failed += len(chunk)
+                return
+
+        for (cost_type, bis), readings in zip(chunk, results):
+            if readings is None:
+                self.failed += 1
+                continue
+            self._done[_task_key(bis, cost_type)] = Series.from_readings(readings)
+        self._store.async_delay_save(self._checkpoint, BACKFILL_SAVE_DELAY)
+
+    async def async_mark_completed(self) -> None:
+        """Lauf abgeschlossen und übernommen; die Rohdaten werden nicht mehr gebraucht."""
+        self.completed = dt_util.utcnow()
+        self._done = {}
+        await self._store.async_save(self._checkpoint())
+
+    async def async_remove(self) -> None:
+        """Lösche den Checkpoint."""
+        await self._store.async_remove()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Fortschritt für die Diagnose."""
+        return {
+            "running": self.running,
+            "started": self.started.isoformat() if self.started else None,
+            "finished": self.finished.isoformat() if self.finished else None,
+            "completed": self.completed.isoformat() if self.completed else None,
+            "periods": self.periods,
+            "tasks": self.tasks,
+            "done": len(self._done),
+            "failed": self.failed,
+            "requests": self.requests,
+            "merged": self.merged,
+            "discarded": self.discarded,
+        }
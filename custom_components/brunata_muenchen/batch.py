@@ -0,0 +1,470 @@
+"""Bündelt alle Lesezugriffe eines Abrufs in einem OData-$batch."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from urllib.parse import quote
+
+from brunata_api import BrunataClient, ReadingKind
+from brunata_api.models import MeterReading, Reading
+
+from .compat import (
+    SessionExpired,
+    async_post_dashboard_batch,
+    extract_json_objects,
+    is_logged_in,
+    parse_sap_date,
+    parse_sap_number,
+    redirected_to_login,
+)
+from .const import (
+    CACHE_PERIODS,
+    ENDPOINT_COLD_WATER,
+    ENDPOINT_METER_READINGS,
+    ENDPOINT_MONTHLY_HEATING,
+    ENDPOINT_MONTHLY_HOT_WATER,
+)
+from .metadata import MetadataCache, prune_periods
+
+_LOGGER = logging.getLogger(__name__)
+
+_BOUNDARY_RE = re.compile(r'boundary=(?:"([^"]+)"|([^;\s]+))', re.IGNORECASE)
+_STATUS_RE = re.compile(r"HTTP/1\.1\s+(\d{3})")
+
+
+class BatchRejected(Exception):
+    """Das Portal hat den gebündelten Abruf abgelehnt oder nicht verstanden."""
+
+
+@dataclass(frozen=True, slots=True)
+class PortalData:
+    """Rohdaten eines Abrufs, gleich ob gebündelt oder einzeln geladen."""
+
+    meter_readings: dict[str, MeterReading]
+    monthly_heating: dict[str, list[Reading]]
+    monthly_hot_water: dict[str, list[Reading]]
+    supported_types: dict[str, set[str]]
+    cold_water: dict[str, Reading]
+    # Endpunkte, die (teilweise) fehlgeschlagen sind; deren Werte fehlen
+    failed: frozenset[str] = frozenset()
+
+
+@dataclass(frozen=True, slots=True)
+class _Plan:
+    """Abfragen eines Abrufs, abgeleitet aus den Abrechnungsperioden."""
+
+    bis: datetime | None
+    meter_types: list[str]
+    monthly_types: list[str]
+    supported_types: dict[str, set[str]]
+
+
+def supported_cost_types(dates: Mapping[str, Any]) -> dict[str, set[str]]:
+    """Kostenarten je Periode wie `BrunataClient.get_supported_cost_types`."""
+    supported_types: dict[str, set[str]] = {}
+    for period in _rows(dates):
+        abdatum = period.get("Abdatum")
+        cost_types = _cost_types(period)
+        if cost_types:
+            supported_types[str(abdatum) if abdatum is not None else "unknown"] = (
+                cost_types
+            )
+    return supported_types
+
+
+def period_key(dates: Mapping[str, Any]) -> tuple:
+    """Alles an den Perioden, wovon die geplanten Abfragen abhängen."""
+    return tuple(
+        (period.get("Abdatum"), period.get("Bisdatum"), tuple(sorted(_cost_types(period))))
+        for period in _rows(dates)
+    )
+
+
+def cold_water_meter_ids(supported_types: Mapping[str, set[str]]) -> list[str]:
+    """KW-Zähler der jüngsten Abrechnungsperiode (nach Periodenbeginn, nicht Reihenfolge)."""
+    if not supported_types:
+        return []
+
+    def started(key: str) -> datetime:
+        return parse_sap_date(key) or datetime.min.replace(tzinfo=UTC)
+
+    latest_period = max(supported_types, key=started)
+    return _cold_water_ids(supported_types[latest_period])
+
+
+def _cold_water_ids(cost_types: set[str]) -> list[str]:
+    """KW-Zähler unter den Kostenarten einer Periode."""
+    return sorted(meter_id for meter_id in cost_types if meter_id.startswith("KW"))
+
+
+def billing_periods(dates: Mapping[str, Any]) -> list[tuple[datetime, set[str]]]:
+    """Alle Abrechnungsperioden als (Periodenende, Kostenarten), jüngste zuerst."""
+    periods: list[tuple[datetime, set[str]]] = []
+    for period in _rows(dates):
+        bis_raw = period.get("Bisdatum")
+        bis = parse_sap_date(bis_raw) if isinstance(bis_raw, str) else None
+        cost_types = _cost_types(period)
+        if bis is not None and cost_types:
+            periods.append((bis, cost_types))
+    return periods
+
+
+def current_period(dates: Mapping[str, Any]) -> tuple[datetime, set[str]] | None:
+    """Abrechnungsperiode mit dem spätesten Periodenende (unabhängig von der Reihenfolge)."""
+    periods = billing_periods(dates)
+    return max(periods, key=lambda period: period[0]) if periods else None
+
+
+def build_batch_body(
+    boundary: str, relative_gets: Sequence[str], headers: Mapping[str, str]
+) -> str:
+    """Erstelle den Multipart-Body mit einem GET je Teil."""
+    header_lines = "".join(f"{key}: {value}\r\n" for key, value in headers.items())
+    parts = "".join(
+        f"\r\n--{boundary}\r\n"
+        "Content-Type: application/http\r\n"
+        "Content-Transfer-Encoding: binary\r\n\r\n"
+        f"GET {relative_get} HTTP/1.1\r\n"
+        f"{header_lines}\r\n"
+        for relative_get in relative_gets
+    )
+    return f"{parts}\r\n--{boundary}--\r\n"
+
+
+def parse_batch_response(
+    content_type: str, text: str
+) -> list[tuple[int, dict[str, Any] | None]]:
+    """Zerlege die Multipart-Antwort in (Status, JSON) je Teil, in Reihenfolge."""
+    match = _BOUNDARY_RE.search(content_type or "")
+    if match is None:
+        raise BatchRejected(f"Antwort ohne Multipart-Boundary: {content_type!r}")
+    boundary = match.group(1) or match.group(2)
+
+    results: list[tuple[int, dict[str, Any] | None]] = []
+    for part in text.split(f"--{boundary}")[1:]:
+        if part.startswith("--"):
+            break
+        status = _STATUS_RE.search(part)
+        if status is None:
+            continue
+        objects = extract_json_objects(part[status.end() :])
+        results.append((int(status.group(1)), objects[0] if objects else None))
+    return results
+
+
+def _bis_filter(bis: datetime) -> str:
+    """Filterwert für das Periodenende (wie im Portal: 23:00 Uhr)."""
+    bis_filter = bis.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(
+        hours=23
+    )
+    return bis_filter.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _kind(cost_type: str) -> ReadingKind:
+    """Art der Messung einer Kostenart (wie in brunata-api)."""
+    return ReadingKind.heating if cost_type.startswith("HZ") else ReadingKind.hot_water
+
+
+def monthly_endpoint(cost_type: str) -> str:
+    """Endpunkt, über den die Monatsreihe einer Kostenart geladen wird."""
+    if cost_type.startswith("KW"):
+        return ENDPOINT_COLD_WATER
+    if cost_type.startswith("HZ"):
+        return ENDPOINT_MONTHLY_HEATING
+    return ENDPOINT_MONTHLY_HOT_WATER
+
+
+def _rows(data: Mapping[str, Any] | None) -> list[dict[str, Any]]:
+    """Ergebniszeilen einer OData-Antwort."""
+    if not data:
+        return []
+    return [row for row in (data.get("d") or {}).get("results") or [] if isinstance(row, dict)]
+
+
+def _cost_types(period: Mapping[str, Any]) -> set[str]:
+    """Kostenarten einer Abrechnungsperiode (`Units`-Expansion)."""
+    return {
+        row["CostType"]
+        for row in (period.get("Units") or {}).get("results") or []
+        if isinstance(row, dict) and isinstance(row.get("CostType"), str)
+    }
+
+
+def _parse_monthly(rows: Sequence[Mapping[str, Any]], cost_type: str) -> list[Reading]:
+    """Monatswerte wie `BrunataClient.get_monthly_consumption` auswerten."""
+    kind = _kind(cost_type)
+    unique: dict[tuple[datetime, float], Reading] = {}
+    for row in rows:
+        timestamp = None
+        for key in ("Datum", "Bis"):
+            raw = row.get(key)
+            if isinstance(raw, str):
+                timestamp = parse_sap_date(raw)
+                if timestamp:
+                    break
+        if not timestamp or row.get("Verbrauch") is None:
+            continue
+        try:
+            value = float(str(row["Verbrauch"]).replace(",", "."))
+        except ValueError:
+            continue
+        unit = row.get("MassreadTxt") or row.get("Massread")
+        reading = Reading(
+            timestamp=timestamp, value=value, unit=str(unit) if unit else None, kind=kind
+        )
+        unique[(reading.timestamp, reading.value)] = reading
+    return sorted(unique.values(), key=lambda r: r.timestamp)
+
+
+def _parse_meter(
+    rows: Sequence[Mapping[str, Any]], cost_type: str, bis: datetime
+) -> MeterReading | None:
+    """Zählerstand wie `BrunataClient.get_meter_reading` auswerten."""
+    if not rows or not isinstance(rows[0].get("Verbrauch"), str):
+        return None
+    row = rows[0]
+    unit = row.get("MassreadTxt") or row.get("Massread")
+    return MeterReading(
+        timestamp=bis,
+        value=parse_sap_number(row["Verbrauch"]),
+        unit=str(unit) if unit else None,
+        cost_type=cost_type,
+        kind=_kind(cost_type),
+    )
+
+
+class BrunataBatchReader:
+    """Liest alle Daten eines Abrufs mit einer (höchstens zwei) Anfragen.
+
+    Zählerstände und Monatsreihen aller Kostenarten inklusive KW-Zähler
+    gehen in einen einzigen `$batch`. Die Abfragen hängen von den
+    Abrechnungsperioden (`DatesSet`) ab; sind diese im Cache, werden sie im
+    selben `$batch` mitgeladen und gegengeprüft, sonst vorab geladen.
+    brunata-api schickt jede Abfrage als eigenen `$batch` mit einem Teil und
+    lädt die Perioden vor jeder Abfrage erneut.
+    """
+
+    def __init__(self, client: BrunataClient, cache: MetadataCache | None = None) -> None:
+        self.client = client
+        self._cache = cache
+        self.enabled = True
+        self.batches = 0
+        self.batched_requests = 0
+        self.fallbacks = 0
+        self.period_changes = 0
+
+    def _relative(self, entity_set: str, cost_type: str, bis: datetime) -> str:
+        """Relativer GET einer Abfrage (identisch zu brunata-api)."""
+        client = self.client
+        relative = (
+            f"{entity_set}?sap-client={quote(client.sap_client)}&$filter="
+            f"Nutzein%20eq%20%27{quote(client.user_unit_id() or '')}%27%20and%20"
+            f"Bis%20eq%20datetime%27{quote(_bis_filter(bis))}%27%20and%20"
+            f"Kotyp%20eq%20%27{quote(cost_type)}%27"
+        )
+        if entity_set == "CumuConsumptionMonSet":
+            relative += "%20and%20InKwh%20eq%20true"
+        return relative
+
+    async def _async_post(
+        self, relative_gets: Sequence[str]
+    ) -> list[tuple[int, dict[str, Any] | None]]:
+        """Sende alle GETs in einem `$batch` und ordne die Antworten zu."""
+        client = self.client
+        response = await async_post_dashboard_batch(
+            client,
+            lambda boundary, headers: build_batch_body(boundary, relative_gets, headers),
+        )
+
+        if response.status_code in (401, 403) or redirected_to_login(client, response):
+            # Sitzung abgelaufen: BrunataSession meldet neu an
+            raise SessionExpired(f"Dashboard batch failed: HTTP {response.status_code}")
+        if response.status_code != 202:
+            if 400 <= response.status_code < 500 or response.status_code == 501:
+                # Bündeln wird nicht unterstützt: für diesen Client abschalten
+                self.enabled = False
+            raise BatchRejected(f"HTTP {response.status_code}")
+
+        results = parse_batch_response(
+            response.headers.get("content-type", ""), response.text or ""
+        )
+        if len(results) != len(relative_gets):
+            raise BatchRejected(
+                f"{len(results)} Antworten auf {len(relative_gets)} Anfragen"
+            )
+        self.batches += 1
+        self.batched_requests += len(relative_gets)
+        return results
+
+    async def _async_fallback_meter(self, cost_type: str) -> MeterReading | None:
+        """Einzelabruf eines Zählerstands, dessen Teil im $batch fehlschlug."""
+        self.fallbacks += 1
+        return await self.client.get_meter_reading(cost_type=cost_type)
+
+    async def _async_fallback_monthly(self, cost_type: str) -> list[Reading]:
+        """Einzelabruf einer Monatsreihe (sucht auch in älteren Perioden)."""
+        self.fallbacks += 1
+        return await self.client.get_monthly_consumption(cost_type=cost_type)
+
+    def _dates_relative(self) -> str:
+        """Relativer GET der Abrechnungsperioden (identisch zu brunata-api)."""
+        client = self.client
+        return (
+            f"DatesSet?sap-client={quote(client.sap_client)}&$expand=Units"
+            f"&$filter=Nutzein%20eq%20%27{quote(client.user_unit_id() or '')}%27"
+        )
+
+    def _plan(self, dates: Mapping[str, Any]) -> _Plan:
+        """Bestimme alle Abfragen für die aktuellen Abrechnungsperioden."""
+        supported_types = supported_cost_types(dates)
+        if not _rows(dates):
+            return _Plan(None, [], [], supported_types)
+
+        # Zählerstände, Monatsreihen und KW-Zähler aus derselben Periode
+        current = current_period(dates)
+        if current is None:
+            raise BatchRejected("Keine Periode mit Bisdatum und Kostenarten")
+        bis, cost_types = current
+
+        meter_types = sorted(ct for ct in cost_types if ct.startswith(("HZ", "WW")))
+        monthly_types = [*meter_types, *_cold_water_ids(cost_types)]
+        return _Plan(bis, meter_types, monthly_types, supported_types)
+
+    def _plan_gets(self, plan: _Plan) -> list[str]:
+        """Relative GETs eines Plans (erst Zählerstände, dann Monatsreihen)."""
+        assert plan.bis is not None
+        return [
+            self._relative("CumuConsumptionSet", ct, plan.bis) for ct in plan.meter_types
+        ] + [
+            self._relative("CumuConsumptionMonSet", ct, plan.bis)
+            for ct in plan.monthly_types
+        ]
+
+    async def _async_load_dates(self) -> dict[str, Any]:
+        """Lade die Abrechnungsperioden einzeln und lege sie im Cache ab."""
+        dates = prune_periods(await self.client.get_dashboard_dates())
+        if self._cache is not None:
+            self._cache.put(CACHE_PERIODS, dates)
+        return dates
+
+    async def async_read_all(self) -> PortalData:
+        """Lade Zählerstände, Monatsreihen, Kostenarten und KW-Zähler."""
+        client = self.client
+        if not is_logged_in(client):
+            await client.login()
+
+        cached = self._cache.get(CACHE_PERIODS) if self._cache is not None else None
+        if cached is not None:
+            # Abfragen mit den gespeicherten Perioden planen und die Perioden
+            # im selben $batch neu laden: bleiben sie gleich, genügt eine Anfrage
+            plan = self._plan(cached)
+            if plan.bis is not None and plan.monthly_types:
+                results = await self._async_post(
+                    [self._dates_relative(), *self._plan_gets(plan)]
+                )
+                status, fresh = results[0]
+                if status < 400 and fresh is not None:
+                    fresh = prune_periods(fresh)
+                    self._cache.put(CACHE_PERIODS, fresh)
+                    if period_key(fresh) == period_key(cached):
+                        return await self._async_demux(plan, results[1:])
+                    self.period_changes += 1
+                    _LOGGER.debug("Brunata Abrechnungsperioden geändert, neu planen")
+                    dates = fresh
+                else:
+                    dates = await self._async_load_dates()
+            else:
+                dates = await self._async_load_dates()
+        else:
+            dates = await self._async_load_dates()
+
+        plan = self._plan(dates)
+        if plan.bis is None or not plan.monthly_types:
+            return PortalData({}, {}, {}, plan.supported_types, {})
+        return await self._async_demux(plan, await self._async_post(self._plan_gets(plan)))
+
+    async def async_read_monthly(
+        self, requests: Sequence[tuple[str, datetime]]
+    ) -> list[list[Reading] | None]:
+        """Monatsreihen beliebiger Perioden (Kostenart, Periodenende) in einem $batch.
+
+        Fehlgeschlagene Teile liefern None, leere Perioden eine leere Liste.
+        """
+        if not is_logged_in(self.client):
+            await self.client.login()
+        results = await self._async_post(
+            [self._relative("CumuConsumptionMonSet", ct, bis) for ct, bis in requests]
+        )
+        return [
+            _parse_monthly(_rows(data), cost_type) if status < 400 else None
+            for (cost_type, _bis), (status, data) in zip(requests, results)
+        ]
+
+    async def _async_demux(
+        self, plan: _Plan, results: Sequence[tuple[int, dict[str, Any] | None]]
+    ) -> PortalData:
+        """Verteile die Teilantworten auf die Ergebnisse der Client-Methoden."""
+        assert plan.bis is not None
+        meter_types, monthly_types = plan.meter_types, plan.monthly_types
+        meter_results = results[: len(meter_types)]
+        monthly_results = results[len(meter_types) :]
+
+        # Fehlgeschlagene oder leere Teile einzeln nachladen
+        meters: dict[str, MeterReading | None] = {}
+        retry_meters: list[str] = []
+        for cost_type, (status, data) in zip(meter_types, meter_results):
+            meter = _parse_meter(_rows(data), cost_type, plan.bis) if status < 400 else None
+            if meter is None:
+                retry_meters.append(cost_type)
+            meters[cost_type] = meter
+
+        monthly: dict[str, list[Reading]] = {}
+        retry_monthly: list[str] = []
+        for cost_type, (status, data) in zip(monthly_types, monthly_results):
+            readings = _parse_monthly(_rows(data), cost_type) if status < 400 else []
+            if not readings:
+                retry_monthly.append(cost_type)
+            monthly[cost_type] = readings
+
+        failed: set[str] = set()
+        if retry_meters or retry_monthly:
+            retried = await asyncio.gather(
+                *(self._async_fallback_meter(ct) for ct in retry_meters),
+                *(self._async_fallback_monthly(ct) for ct in retry_monthly),
+                return_exceptions=True,
+            )
+            for cost_type, meter in zip(retry_meters, retried[: len(retry_meters)]):
+                if isinstance(meter, BaseException):
+                    _LOGGER.debug("Fehler beim Abruf des Zählerstands %s: %s", cost_type, meter)
+                    failed.add(ENDPOINT_METER_READINGS)
+                    meter = None
+                meters[cost_type] = meter
+            for cost_type, readings in zip(retry_monthly, retried[len(retry_meters) :]):
+                if isinstance(readings, BaseException):
+                    _LOGGER.debug("Fehler beim Abruf von %s: %s", cost_type, readings)
+                    failed.add(monthly_endpoint(cost_type))
+                    readings = []
+                monthly[cost_type] = readings
+
+        return PortalData(
+            meter_readings={ct: m for ct, m in meters.items() if m is not None},
+            monthly_heating={
+                ct: monthly[ct] for ct in meter_types if ct.startswith("HZ")
+            },
+            monthly_hot_water={
+                ct: monthly[ct] for ct in meter_types if ct.startswith("WW")
+            },
+            supported_types=plan.supported_types,
+            cold_water={
+                ct: monthly[ct][-1]
+                for ct in monthly_types
+                if ct.startswith("KW") and monthly[ct]
+            },
+            failed=frozenset(failed),
+        )
@@ -0,0 +1,140 @@
+"""Abhängigkeiten von Interna und Fehlermeldungen von brunata-api.
+
+brunata-api bietet weder ein Zurücksetzen der Sitzung noch einen eigenen
+Transport, keine unterscheidbaren Fehlerklassen, keinen `$batch` mit
+mehreren Teilen und keine öffentlichen Parser für SAP-Datumswerte und
+-Zahlen. Was sich dafür auf private Attribute, private Methoden oder den
+Text von Fehlermeldungen verlässt, steht nur hier; die übrigen Module
+nutzen ausschließlich die Funktionen dieser Datei und die öffentliche API
+des Clients. Geprüft gegen brunata-nutzerportal-api 0.1.4 (siehe
+manifest.json); bei einem Update der Bibliothek zuerst diese Datei abgleichen.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Mapping
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+import httpx
+
+from brunata_api import BrunataClient
+from brunata_api.errors import LoginError
+
+_DASHBOARD_SERVICE = "NP_DASHBOARD_SRV"
+
+# brunata-api 0.1.4 meldet jeden Fehler als LoginError, auch leere Perioden
+# ("No CumuConsumptionSet results ...") oder HTTP 5xx. Nur diese Meldungen
+# bedeuten, dass das Portal die Sitzung nicht (mehr) anerkennt.
+_AUTH_FAILURE_RE = re.compile(
+    r"HTTP 40[13]\b"  # Anfrage abgewiesen
+    r"|Missing x-csrf-token"  # HEAD ohne Token, z.B. nach Umleitung zum Login
+    r"|Missing user context"
+    r"|Missing UserUnitID"
+)
+
+
+class SessionExpired(LoginError):
+    """Das Portal hat die Sitzung abgewiesen (401/403 oder Umleitung zum Login)."""
+
+
+def is_auth_failure(err: BaseException) -> bool:
+    """True, wenn `err` eine abgelaufene oder abgewiesene Sitzung meldet."""
+    if isinstance(err, SessionExpired):
+        return True
+    return isinstance(err, LoginError) and _AUTH_FAILURE_RE.search(str(err)) is not None
+
+
+def is_logged_in(client: BrunataClient) -> bool:
+    """True, sobald der Client einen Login abgeschlossen hat."""
+    return client._logged_in
+
+
+def reset_session(client: BrunataClient) -> None:
+    """Verwirf Login-Status, CSRF-Tokens und Cookies vor einem erneuten Login."""
+    client._logged_in = False
+    client._csrf_tokens.clear()
+    client._client.cookies.clear()
+
+
+async def async_use_transport(
+    client: BrunataClient, transport: httpx.AsyncBaseTransport
+) -> None:
+    """Lass den Client über `transport` senden (eigene Cookies bleiben getrennt).
+
+    brunata-api erlaubt keinen eigenen Transport; der interne httpx-Client
+    wird mit gleichen Einstellungen ersetzt und der alte geschlossen.
+    """
+    own = client._client
+    client._client = httpx.AsyncClient(
+        timeout=own.timeout,
+        headers=own.headers,
+        follow_redirects=own.follow_redirects,
+        transport=transport,
+    )
+    await own.aclose()
+
+
+def redirected_to_login(client: BrunataClient, response: httpx.Response) -> bool:
+    """True, wenn das Portal die Anfrage auf die Login-Seite umgeleitet hat."""
+    return bool(response.history) and (
+        response.url.path == httpx.URL(client._referer_login()).path
+    )
+
+
+def parse_sap_date(value: str) -> datetime | None:
+    """Zeitstempel eines SAP-Datums ("/Date(1767139200000)/"), sonst None."""
+    return BrunataClient._sap_date_to_datetime(value)
+
+
+def parse_sap_number(value: str) -> float:
+    """Zahl im SAP-Format (ggf. mit Leerzeichen aufgefüllt)."""
+    return BrunataClient._parse_sap_number(value)
+
+
+def extract_json_objects(text: str) -> list[dict[str, Any]]:
+    """Alle JSON-Objekte in einem Teil einer `$batch`-Antwort."""
+    return BrunataClient._extract_json_objects(text)
+
+
+async def async_post_dashboard_batch(
+    client: BrunataClient, build_body: Callable[[str, Mapping[str, str]], str]
+) -> httpx.Response:
+    """Sende einen `$batch` an den Dashboard-Dienst mit Sitzung und CSRF-Token des Clients.
+
+    brunata-api sendet nur Batches mit einem Teil. `build_body(boundary,
+    headers)` erstellt den Multipart-Body; `headers` sind die Kopfzeilen,
+    die das Portal in jedem Teil erwartet (wie in brunata-api).
+    """
+    referer = client._referer_services()
+    csrf = await client._fetch_csrf_token(_DASHBOARD_SERVICE, referer=referer)
+    user_unit_id, contact_person = client.user_unit_id(), client.contact_person()
+    boundary = f"batch_{uuid4().hex[:4]}-{uuid4().hex[:4]}-{uuid4().hex[:4]}"
+    body = build_body(
+        boundary,
+        {
+            "sap-cancel-on-close": "true",
+            "UserUnitID": user_unit_id or "",
+            "ContactPerson": contact_person or "",
+            "sap-contextid-accept": "header",
+            "Accept": "application/json",
+            "x-csrf-token": csrf,
+            "Accept-Language": "de",
+            "DataServiceVersion": "2.0",
+            "MaxDataServiceVersion": "2.0",
+            "X-Requested-With": "XMLHttpRequest",
+        },
+    )
+    headers = {
+        **client._odata_headers(
+            referer=referer,
+            csrf_token=csrf,
+            user_unit_id=user_unit_id,
+            contact_person=contact_person,
+        ),
+        "Accept": "multipart/mixed",
+        "Content-Type": f"multipart/mixed;boundary={boundary}",
+    }
+    return await client._post_batch(_DASHBOARD_SERVICE, body=body, headers=headers)
@@ -1,31 +1,43 @@
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, CONF_URL
-from brunata_api import BrunataClient
+from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN
+from .const import (
+    CONF_COLD_WATER_CONCURRENCY,
+    CONF_HISTORY_ATTRIBUTE,
+    CONF_MQTT_DISCOVERY,
+    CONF_MQTT_PREFIX,
+    CONF_MQTT_PUBLISH,
+    CONF_SCAN_INTERVAL,
+    DEFAULT_COLD_WATER_CONCURRENCY,
+    DEFAULT_HISTORY_ATTRIBUTE,
+    DEFAULT_MQTT_DISCOVERY,
+    DEFAULT_MQTT_PREFIX,
+    DEFAULT_MQTT_PUBLISH,
+    DOMAIN,
+)
 
 class BrunataMuenchenConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Behandelt den Setup-Dialog in der UI."""
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Optionen (Abrufintervall etc.) nachträglich ändern."""
+        return BrunataMuenchenOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input=None):
         """Erster Schritt bei der manuellen Einrichtung."""
         errors = {}
         if user_input is not None:
             try:
                 # Validierung: Klappt der Login mit diesen Daten?
-                client = BrunataClient(
-                    base_url=user_input[CONF_URL],
-                    username=user_input[CONF_USERNAME],
-                    password=user_input[CONF_PASSWORD],
-                    sap_client=user_input["sap_client"],
-                )
-                async with client:
-                    await client.login()
-                
+                await self._async_login(user_input)
+
                 return self.async_create_entry(
                     title=f"Brunata ({user_input[CONF_USERNAME]})", 
                     data=user_input
@@ -43,4 +55,68 @@ class BrunataMuenchenConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required("sap_client", default="201"): str,
             }),
             errors=errors,
-        )
\ No newline at end of file
+        )
+
+    async def _async_login(self, user_input):
+        """Melde an und übergib den angemeldeten Client an den ersten Abruf."""
+        # brunata-api erst laden, wenn tatsächlich eingerichtet wird
+        from .hub import async_acquire_transport, async_discard_client, park_client
+        from .session import BrunataSession
+        from .transport import async_create_client
+
+        transport = await async_acquire_transport(self.hass, user_input[CONF_URL])
+        client = None
+        try:
+            client = await async_create_client(user_input, transport)
+            session = BrunataSession(client)
+            await session.async_ensure_login()
+        except BaseException:
+            await async_discard_client(self.hass, transport, client)
+            raise
+        park_client(self.hass, user_input, transport, session)
+
+
+class BrunataMuenchenOptionsFlow(config_entries.OptionsFlow):
+    """Behandelt den Optionen-Dialog in der UI."""
+
+    def __init__(self, config_entry):
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Einziger Schritt der Optionen."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                # 0 = adaptiv, sonst festes Intervall in Stunden
+                vol.Required(
+                    CONF_SCAN_INTERVAL,
+                    default=options.get(CONF_SCAN_INTERVAL, 0),
+                ): vol.All(vol.Coerce(float), vol.Any(0, vol.Range(min=1, max=168))),
+                vol.Required(
+                    CONF_HISTORY_ATTRIBUTE,
+                    default=options.get(CONF_HISTORY_ATTRIBUTE, DEFAULT_HISTORY_ATTRIBUTE),
+                ): bool,
+                vol.Required(
+                    CONF_COLD_WATER_CONCURRENCY,
+                    default=options.get(
+                        CONF_COLD_WATER_CONCURRENCY, DEFAULT_COLD_WATER_CONCURRENCY
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                vol.Required(
+                    CONF_MQTT_PUBLISH,
+                    default=options.get(CONF_MQTT_PUBLISH, DEFAULT_MQTT_PUBLISH),
+                ): bool,
+                vol.Required(
+                    CONF_MQTT_PREFIX,
+                    default=options.get(CONF_MQTT_PREFIX, DEFAULT_MQTT_PREFIX),
+                ): str,
+                vol.Required(
+                    CONF_MQTT_DISCOVERY,
+                    default=options.get(CONF_MQTT_DISCOVERY, DEFAULT_MQTT_DISCOVERY),
+                ): bool,
+            }),
+        )
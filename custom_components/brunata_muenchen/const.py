@@ -1,39 +1,183 @@
-"""Constants for the Brunata München integration."""
+"""Constants for the Brunata München integration.
 
-from datetime import timedelta
+Ohne Abhängigkeit von Home Assistant, damit Portal-Code und eigenständiger
+Dienst (`daemon`) auch ohne HA importierbar sind.
+"""
 
-from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
-from homeassistant.const import UnitOfEnergy, UnitOfVolume
+from datetime import timedelta
 
 DOMAIN = "brunata_muenchen"
 
+# Schlüssel der Zugangsdaten (gleichlautend mit CONF_URL, CONF_USERNAME und
+# CONF_PASSWORD von Home Assistant, damit ein Config Entry direkt passt)
+ACCOUNT_URL = "url"
+ACCOUNT_USERNAME = "username"
+ACCOUNT_PASSWORD = "password"
+
 # Scan interval settings
 CONF_SCAN_INTERVAL = "scan_interval"
 DEFAULT_SCAN_INTERVAL = timedelta(hours=12)
 
-# Mapping der SAP-Präfixe auf HA-Klassen
+# Adaptives Polling (wenn kein festes Intervall eingestellt ist): häufig um
+# die gelernten Veröffentlichungszeiten, selten dazwischen
+POLL_ACTIVE_INTERVAL = timedelta(hours=1)
+POLL_QUIET_INTERVAL = timedelta(hours=24)
+POLL_MIN_INTERVAL = timedelta(minutes=5)
+POLL_WINDOW_BEFORE = timedelta(hours=6)
+POLL_WINDOW_AFTER = timedelta(days=1)
+POLL_MIN_OBSERVATIONS = 2
+POLL_MAX_OBSERVATIONS = 24
+POLL_JITTER = 0.1  # Anteil des Intervalls
+POLL_BACKOFF_BASE = timedelta(minutes=5)
+POLL_BACKOFF_MAX = timedelta(hours=6)
+
+# Gemeinsamer Verbindungs-Pool und Rate-Limit je Portal (über alle Einträge)
+DATA_TRANSPORTS = f"{DOMAIN}_transports"
+POOL_MAX_CONNECTIONS = 10
+POOL_MAX_KEEPALIVE = 5
+POOL_KEEPALIVE_EXPIRY = 60.0  # Sekunden
+RATE_LIMIT_PER_SECOND = 5.0
+RATE_LIMIT_BURST = 20
+
+# Im Config Flow angemeldeter Client, bis der erste Abruf ihn übernimmt
+DATA_PARKED_CLIENTS = f"{DOMAIN}_parked_clients"
+PARKED_CLIENT_TTL = 300  # Sekunden
+
+# Eigenständiger Dienst für viele Konten (python -m ...daemon)
+DAEMON_WORKERS = 16
+DAEMON_MAX_CONNECTIONS = 32
+DAEMON_RATE_LIMIT = 20.0  # Anfragen pro Sekunde je Portal
+
+# Sitzung wird wiederverwendet, bis sie abläuft oder das Portal sie ablehnt
+SESSION_MAX_AGE = timedelta(hours=24)
+
+# Kaltwasser-Abruf (KW-Zähler werden parallel abgefragt)
+CONF_COLD_WATER_CONCURRENCY = "cold_water_concurrency"
+DEFAULT_COLD_WATER_CONCURRENCY = 4
+
+# Endpunkte eines Abrufs mit eigenem Zeitlimit, Wiederholung und Circuit Breaker
+ENDPOINT_BATCH = "batch"
+ENDPOINT_METER_READINGS = "meter_readings"
+ENDPOINT_MONTHLY_HEATING = "monthly_heating"
+ENDPOINT_MONTHLY_HOT_WATER = "monthly_hot_water"
+ENDPOINT_COST_TYPES = "cost_types"
+ENDPOINT_COLD_WATER = "cold_water"  # je KW-Zähler
+ENDPOINT_BACKFILL = "backfill"  # ältere Perioden, eigene Sperre
+# (Zeitlimit je Versuch, Frist inkl. Wiederholungen, Versuche), Sekunden
+ENDPOINT_POLICIES = {
+    ENDPOINT_BATCH: (30, 30, 1),  # Wiederholung = Einzelabrufe
+    ENDPOINT_METER_READINGS: (30, 75, 2),
+    ENDPOINT_MONTHLY_HEATING: (45, 100, 2),
+    ENDPOINT_MONTHLY_HOT_WATER: (45, 100, 2),
+    ENDPOINT_COST_TYPES: (20, 45, 2),
+    ENDPOINT_COLD_WATER: (30, 60, 2),
+    ENDPOINT_BACKFILL: (60, 180, 3),
+}
+ENDPOINT_RETRY_BACKOFF = 2.0  # Sekunden, verdoppelt je Versuch
+# Nach so vielen Fehlschlägen in Folge wird ein Endpunkt gesperrt ...
+CIRCUIT_FAILURE_THRESHOLD = 3
+# ... und erst nach dieser Zeit mit einem Probeabruf wieder versucht
+CIRCUIT_RESET_TIMEOUT = timedelta(hours=1)
+
+# Phasen eines Abrufs, die einzeln gemessen werden (zusätzlich je Endpunkt)
+PHASE_REFRESH = "refresh"  # gesamter Abruf
+PHASE_LOGIN = "login"
+PHASE_FETCH = "fetch"
+PHASE_MERGE = "merge"  # Monatsreihen und kumulative Summen fortschreiben
+PHASE_SNAPSHOT = "snapshot"  # Snapshot, Kennzahlen und Sensor-Sichten
+REFRESH_PHASES = (PHASE_REFRESH, PHASE_LOGIN, PHASE_FETCH, PHASE_MERGE, PHASE_SNAPSHOT)
+# Perzentile über so viele letzte Messungen
+INSTRUMENTATION_WINDOW = 50
+
+# Vollständiger Abgleich der Monatshistorie (sonst nur inkrementell)
+FULL_RESYNC_INTERVAL = timedelta(days=7)
+
+# Metadaten-Cache (Ablaufzeit je Endpunkt, wird mit dem Snapshot gespeichert)
+CACHE_PERIODS = "periods"  # Abrechnungsperioden inkl. Kostenarten (DatesSet)
+CACHE_COST_TYPES = "cost_types"  # Kostenarten je Periode (Einzelabruf)
+CACHE_READINGS = "readings"  # Zeitpunkt des letzten vollständigen Abrufs
+METADATA_TTL = {
+    CACHE_PERIODS: timedelta(days=3),
+    CACHE_COST_TYPES: timedelta(days=3),
+    CACHE_READINGS: timedelta(hours=1),
+}
+# Länger abgeschlossene Perioden werden aus dem Cache entfernt
+METADATA_PERIOD_RETENTION = timedelta(days=730)
+
+# Persistenter Snapshot-Cache
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 10  # Sekunden
+
+# Nachladen aller Abrechnungsperioden (fortsetzbar)
+BACKFILL_STORAGE_VERSION = 1
+BACKFILL_SAVE_DELAY = 5  # Sekunden
+BACKFILL_CONCURRENCY = 2  # gleichzeitige $batch-Anfragen
+BACKFILL_BATCH_SIZE = 12  # Monatsreihen je $batch
+
+# Profilierung eines Abrufs auf Anfrage (Service profile_refresh)
+PROFILE_TOP = 20  # Funktionen und Awaits in der Zusammenfassung
+PROFILE_TIMELINE_LIMIT = 5000  # Spannen in der gespeicherten Zeitleiste
+
+# Lokale Historie (SQLite)
+HISTORY_SCHEMA_VERSION = 1
+HISTORY_BUCKETS = ("month", "year")
+
+# Optionen
+CONF_HISTORY_ATTRIBUTE = "history_attribute"
+DEFAULT_HISTORY_ATTRIBUTE = True
+
+# MQTT-Ausgabe (retained, optional mit Home-Assistant-Discovery)
+CONF_MQTT_PUBLISH = "mqtt_publish"
+DEFAULT_MQTT_PUBLISH = False
+CONF_MQTT_PREFIX = "mqtt_prefix"
+DEFAULT_MQTT_PREFIX = "brunata"
+CONF_MQTT_DISCOVERY = "mqtt_discovery"
+DEFAULT_MQTT_DISCOVERY = False
+MQTT_DISCOVERY_PREFIX = "homeassistant"
+# Höchstens so viele unbestätigte Nachrichten je Verbindung
+MQTT_MAX_IN_FLIGHT = 256
+
+# Services
+ATTR_ENTRY_ID = "entry_id"
+SERVICE_FULL_RESYNC = "full_resync"
+SERVICE_CLEAR_CACHE = "clear_cache"
+SERVICE_QUERY_HISTORY = "query_history"
+SERVICE_BACKFILL = "backfill"
+SERVICE_PROFILE_REFRESH = "profile_refresh"
+ATTR_RESTART = "restart"
+ATTR_COST_TYPE = "cost_type"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_BUCKET = "bucket"
+
+# Mapping der SAP-Präfixe auf HA-Klassen (Werte von SensorDeviceClass,
+# UnitOfEnergy/UnitOfVolume und SensorStateClass)
 METER_MAPPING = {
     "HZ": {
-        "device_class": SensorDeviceClass.ENERGY,
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "device_class": "energy",
+        "unit": "kWh",
         "name": "Heizung",
-        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "state_class": "total_increasing",
     },
     "WW": {
-        "device_class": SensorDeviceClass.WATER,
-        "unit": UnitOfVolume.CUBIC_METERS,
+        "device_class": "water",
+        "unit": "m³",
         "name": "Warmwasser",
-        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "state_class": "total_increasing",
     },
     "KW": {
-        "device_class": SensorDeviceClass.WATER,
-        "unit": UnitOfVolume.CUBIC_METERS,
+        "device_class": "water",
+        "unit": "m³",
         "name": "Kaltwasser",
-        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "state_class": "total_increasing",
     },
 }
 
 # Sensor-Typen die erstellt werden
 SENSOR_TYPE_METER = "meter"
 SENSOR_TYPE_MONTHLY = "monthly"
-SENSOR_TYPE_CUMULATIVE = "cumulative"
\ No newline at end of file
+SENSOR_TYPE_CUMULATIVE = "cumulative"
+SENSOR_TYPE_YOY = "yoy"
+SENSOR_TYPE_ROLLING = "rolling_12m"
+SENSOR_TYPE_FORECAST = "forecast"
+SENSOR_TYPE_MEDIAN_DEVIATION = "median_deviation"
@@ -0,0 +1,619 @@
+"""Koordinator der Brunata München Integration (Abruf, Fortschreiben, Snapshot)."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_URL, CONF_USERNAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import (
+    CACHE_READINGS,
+    CONF_COLD_WATER_CONCURRENCY,
+    CONF_HISTORY_ATTRIBUTE,
+    CONF_MQTT_DISCOVERY,
+    CONF_MQTT_PREFIX,
+    CONF_MQTT_PUBLISH,
+    CONF_SCAN_INTERVAL,
+    DEFAULT_COLD_WATER_CONCURRENCY,
+    DEFAULT_HISTORY_ATTRIBUTE,
+    DEFAULT_MQTT_DISCOVERY,
+    DEFAULT_MQTT_PREFIX,
+    DEFAULT_MQTT_PUBLISH,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    FULL_RESYNC_INTERVAL,
+    METADATA_TTL,
+    PHASE_FETCH,
+    PHASE_LOGIN,
+    PHASE_MERGE,
+    PHASE_REFRESH,
+    PHASE_SNAPSHOT,
+)
+from .analytics import compute_analytics
+from .backfill import BrunataBackfill
+from .cumulative import CumulativeIndex
+from .history import BrunataHistoryStore
+from .instrumentation import Instrumentation
+from .metadata import MetadataCache
+from .model import BrunataSnapshot, CostTypeData, MeterValue, Series
+from .mqtt import HassMqttSink, MqttBridge, states_from_snapshot
+from .resilience import EndpointGuard
+from .scheduler import PollScheduler, new_reading_epochs
+from .statistics import BrunataStatisticsImporter
+from .view import build_sensor_views, changed_sensor_views
+from .store import BrunataSnapshotStore
+
+if TYPE_CHECKING:
+    # brunata-api (pydantic) und der HTTP-Stack werden erst beim ersten
+    # Abruf geladen, nicht schon beim Import der Integration
+    from brunata_api import BrunataClient
+    from brunata_api.models import Reading
+
+    from .batch import BrunataBatchReader
+    from .fetch import PortalFetcher
+    from .session import BrunataSession
+    from .transport import SharedTransport
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _build_cumulative_history(monthly_readings: Iterable[Reading]) -> Series:
+    """Erstelle die kumulative kWh-Historie aus Monats-Readings."""
+    return CumulativeIndex.from_readings(monthly_readings).series()[1]
+
+
+class BrunataMuenchenCoordinator(DataUpdateCoordinator[BrunataSnapshot]):
+    """Klasse zur Verwaltung des Datenabrufs mit erweiterter Datenstruktur."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        # Fest eingestelltes Intervall (Stunden, 0 = adaptiv)
+        scan_hours = entry.options.get(CONF_SCAN_INTERVAL, 0)
+        fixed_interval = timedelta(hours=scan_hours) if scan_hours else None
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=fixed_interval or DEFAULT_SCAN_INTERVAL,
+        )
+        self.entry = entry
+        self.scheduler = PollScheduler(fixed_interval)
+        self.metadata = MetadataCache(METADATA_TTL)
+        self.instrumentation = Instrumentation()
+        self.guard = EndpointGuard(instrumentation=self.instrumentation)
+        self._client: BrunataClient | None = None
+        self._session: BrunataSession | None = None
+        self._transport: SharedTransport | None = None
+        self._batch: BrunataBatchReader | None = None
+        self._fetcher: PortalFetcher | None = None
+        self._client_lock = asyncio.Lock()
+
+        # Zustand für inkrementelles Polling (Summen-Index je Kostenart)
+        self._cumulative: dict[str, CumulativeIndex] = {}
+        # Frühester korrigierter Monat je Kostenart seit dem letzten Import
+        self._changed_from: dict[str, int] = {}
+        self._last_full_resync: datetime | None = None
+        self._full_resync_requested = False
+        self._snapshot_store = BrunataSnapshotStore(hass, entry.entry_id)
+        self._statistics = BrunataStatisticsImporter(hass, entry)
+        self.history = BrunataHistoryStore(hass, entry.entry_id)
+        self.backfill = BrunataBackfill(hass, entry.entry_id)
+        self._backfill_task: asyncio.Task | None = None
+        # Kostenarten mit nachgeladener Historie (bleiben auch ohne aktuelle Werte)
+        self._backfilled: set[str] = set()
+        self.mqtt: MqttBridge | None = None
+        if entry.options.get(CONF_MQTT_PUBLISH, DEFAULT_MQTT_PUBLISH):
+            self.mqtt = MqttBridge(
+                HassMqttSink(hass),
+                entry.options.get(CONF_MQTT_PREFIX, DEFAULT_MQTT_PREFIX),
+                slugify(entry.data[CONF_USERNAME]),
+                discovery=entry.options.get(CONF_MQTT_DISCOVERY, DEFAULT_MQTT_DISCOVERY),
+            )
+
+        # Nur Sensoren mit geänderten Werten benachrichtigen (None = alle)
+        self._changed_views: set[tuple[str, str]] | None = None
+        self.suppressed_writes = 0
+        self.skipped_updates = 0
+
+        # Endpunkte, die beim letzten Abruf fehlten (letzte Werte behalten)
+        self.failed_endpoints: frozenset[str] = frozenset()
+        self.partial_updates = 0
+
+    async def _async_get_client(self) -> BrunataClient:
+        """Hole oder erstelle den API Client."""
+        if self._client is not None:
+            return self._client
+
+        async with self._client_lock:
+            if self._client is not None:
+                return self._client
+
+            from .batch import BrunataBatchReader
+            from .fetch import PortalFetcher
+            from .hub import async_acquire_transport, claim_client
+            from .session import BrunataSession
+            from .transport import async_create_client
+
+            if (parked := claim_client(self.hass, self.entry.data)) is not None:
+                # Bei der Einrichtung bereits angemeldet: kein zweiter Login
+                _LOGGER.debug("Brunata Client aus der Einrichtung übernommen")
+                self._transport = parked.transport
+                self._client = parked.client
+                self._session = parked.session
+            else:
+                self._transport = await async_acquire_transport(
+                    self.hass, self.entry.data[CONF_URL]
+                )
+                self._client = await async_create_client(
+                    self.entry.data, self._transport
+                )
+                self._session = BrunataSession(self._client)
+            self._batch = BrunataBatchReader(self._client, self.metadata)
+            self._fetcher = PortalFetcher(
+                self._session,
+                self._batch,
+                self.guard,
+                self.metadata,
+                self.entry.options.get(
+                    CONF_COLD_WATER_CONCURRENCY, DEFAULT_COLD_WATER_CONCURRENCY
+                ),
+            )
+            return self._client
+
+    async def _async_get_session(self) -> BrunataSession:
+        """Hole die Sitzung des (ggf. neu erstellten) API Clients."""
+        await self._async_get_client()
+        assert self._session is not None
+        return self._session
+
+    @property
+    def session(self) -> BrunataSession | None:
+        """Aktuelle Portal-Sitzung (None, solange kein Client existiert)."""
+        return self._session
+
+    @property
+    def batch(self) -> BrunataBatchReader | None:
+        """Bündelung der Lesezugriffe (None, solange kein Client existiert)."""
+        return self._batch
+
+    @property
+    def transport(self) -> SharedTransport | None:
+        """Gemeinsamer Transport des Portals (None, solange kein Client existiert)."""
+        return self._transport
+
+    async def async_restore_snapshot(self) -> bool:
+        """Übernimm den zuletzt gespeicherten Snapshot als Startwert."""
+        restored = await self._snapshot_store.async_load()
+        if restored is None:
+            return False
+
+        meters, self._cumulative, self._last_full_resync, extras = restored
+        self.scheduler.restore(extras.get("schedule") or {})
+        self.metadata.restore(extras.get("metadata") or {})
+        self._backfilled = set(extras.get("backfilled") or ())
+        self.data = self._build_snapshot(meters)
+        # Bestehende Installationen: lokale Historie aus dem Cache befüllen
+        self._schedule_history_write(self.data)
+        self._schedule_mqtt_publish(self.data)
+        if self.readings_fresh:
+            # Gerade erst abgerufen (z.B. Neustart): regulär weiter planen
+            self._schedule_next_poll()
+        _LOGGER.debug(
+            "Brunata Snapshot aus dem Cache geladen: %d Kostenarten",
+            len(self.data.cost_types),
+        )
+        return True
+
+    def _build_snapshot(
+        self,
+        meters: Mapping[str, MeterValue],
+        previous: BrunataSnapshot | None = None,
+    ) -> BrunataSnapshot:
+        """Erstelle den Snapshot inkl. einmalig vorberechneter Sensor-Sichten."""
+        cost_types: dict[str, CostTypeData] = {}
+        for cost_type in sorted({*meters, *self._cumulative}):
+            index = self._cumulative.get(cost_type)
+            monthly, cumulative = index.series() if index else (None, None)
+            before = previous.get(cost_type) if previous is not None else None
+            if before is not None and before.monthly == monthly:
+                # Kennzahlen nur für geänderte Monatsserien neu berechnen
+                analytics = before.analytics
+            else:
+                analytics = compute_analytics(monthly) if monthly else None
+            cost_types[cost_type] = CostTypeData(
+                cost_type=cost_type,
+                meter=meters.get(cost_type),
+                monthly=monthly,
+                cumulative=cumulative,
+                total=index.published_total() if index else None,
+                analytics=analytics,
+            )
+
+        return BrunataSnapshot(
+            cost_types=cost_types,
+            sensor_views=build_sensor_views(
+                cost_types,
+                include_history=self.entry.options.get(
+                    CONF_HISTORY_ATTRIBUTE, DEFAULT_HISTORY_ATTRIBUTE
+                ),
+                previous=previous,
+            ),
+        )
+
+    @property
+    def readings_fresh(self) -> bool:
+        """True, wenn der letzte vollständige Abruf noch nicht abgelaufen ist."""
+        return self.metadata.is_fresh(CACHE_READINGS)
+
+    async def async_clear_cache(self) -> None:
+        """Verwirf den Metadaten-Cache und frage das Portal erneut ab."""
+        self.metadata.invalidate()
+        await self.async_refresh()
+
+    @callback
+    def async_start_backfill(self, restart: bool = False) -> None:
+        """Lade alle Abrechnungsperioden im Hintergrund nach (höchstens ein Lauf)."""
+        if self._backfill_task is not None and not self._backfill_task.done():
+            return
+        self._backfill_task = self.entry.async_create_background_task(
+            self.hass, self._async_backfill(restart), f"{DOMAIN}_backfill"
+        )
+
+    @callback
+    def async_resume_backfill(self) -> None:
+        """Setze einen unterbrochenen Lauf fort (Checkpoint)."""
+
+        async def _async_resume() -> None:
+            if await self.backfill.async_load():
+                _LOGGER.debug("Brunata Nachladen wird fortgesetzt")
+                await self._async_backfill(restart=False)
+
+        self._backfill_task = self.entry.async_create_background_task(
+            self.hass, _async_resume(), f"{DOMAIN}_backfill"
+        )
+
+    async def _async_backfill(self, restart: bool) -> None:
+        """Ein Lauf; der reguläre Abruf läuft unabhängig davon weiter."""
+        try:
+            session = await self._async_get_session()
+            await session.async_ensure_login()
+            assert self._batch is not None
+            stitched = await self.backfill.async_run(
+                session, self._batch, self.guard, restart=restart
+            )
+        except Exception as err:
+            _LOGGER.warning("Nachladen älterer Brunata Perioden fehlgeschlagen: %s", err)
+            return
+
+        if stitched:
+            self._apply_backfill(stitched)
+            # Sofort speichern: danach wird der Checkpoint nicht mehr gebraucht
+            await self._snapshot_store.async_save(*self._save_args())
+        if self.backfill.failed:
+            _LOGGER.warning(
+                "Brunata Nachladen unvollständig: %d Abfragen fehlgeschlagen",
+                self.backfill.failed,
+            )
+            return
+        await self.backfill.async_mark_completed()
+        _LOGGER.info(
+            "Brunata Historie aus %d Perioden nachgeladen (%d Kostenarten)",
+            self.backfill.periods,
+            len(stitched),
+        )
+
+    @callback
+    def _apply_backfill(self, stitched: Mapping[str, Series]) -> None:
+        """Führe die zusammengesetzten Serien in die Summen-Indizes ein."""
+        changed = False
+        for cost_type, monthly in stitched.items():
+            index = self._cumulative.get(cost_type)
+            if index is None:
+                index = self._cumulative[cost_type] = CumulativeIndex(monthly.unit)
+            if index.merge_series(monthly) is not None:
+                changed = True
+            self._backfilled.add(cost_type)
+        if not changed:
+            return
+
+        previous = self.data
+        meters = {
+            cost_type: data.meter
+            for cost_type, data in (previous.cost_types if previous else {}).items()
+            if data.meter is not None
+        }
+        snapshot = self._build_snapshot(meters, previous)
+        self._changed_views = (
+            changed_sensor_views(previous.sensor_views, snapshot.sensor_views)
+            if previous is not None
+            else None
+        )
+        # Nicht async_set_updated_data: die Abrufplanung bleibt unverändert
+        self.data = snapshot
+        self.async_update_listeners()
+        self.entry.async_create_background_task(
+            self.hass,
+            self._statistics.async_import(snapshot.cost_types, full=True),
+            f"{DOMAIN}_statistics_import",
+        )
+        self._schedule_history_write(snapshot)
+        self._schedule_mqtt_publish(snapshot)
+
+    def _needs_full_resync(self) -> bool:
+        """Prüfe, ob die komplette Historie neu aufgebaut werden muss."""
+        if self._full_resync_requested or self._last_full_resync is None:
+            return True
+        return dt_util.utcnow() - self._last_full_resync >= FULL_RESYNC_INTERVAL
+
+    async def async_full_resync(self) -> None:
+        """Erzwinge einen vollständigen Abgleich der Historie."""
+        self._full_resync_requested = True
+        self.metadata.invalidate()
+        await self.async_refresh()
+
+    def _merge_monthly(
+        self,
+        fetched_by_cost_type: dict[str, list[Reading]],
+        full_resync: bool,
+        partial: bool = False,
+    ) -> None:
+        """Führe neue Monatswerte in die Summen-Indizes ein.
+
+        Bei einem unvollständigen Abruf bleiben die Indizes nicht geladener
+        Kostenarten erhalten, ebenso immer die mit nachgeladener Historie.
+        Ein vollständiger Abgleich ersetzt nur die geladenen Monate; ältere
+        (frühere Perioden) bleiben erhalten.
+        """
+        indexes: dict[str, CumulativeIndex] = {}
+        if partial:
+            indexes.update(self._cumulative)
+        else:
+            indexes.update(
+                (cost_type, index)
+                for cost_type, index in self._cumulative.items()
+                if cost_type in self._backfilled
+            )
+
+        for cost_type, fetched in fetched_by_cost_type.items():
+            if not fetched:
+                continue
+
+            index = self._cumulative.get(cost_type)
+            if full_resync or index is None:
+                rebuilt = CumulativeIndex.from_readings(fetched)
+                if index is not None:
+                    rebuilt.carry_older(index)
+                    # Veröffentlichte Summe darf auch nach dem Neuaufbau nicht sinken
+                    rebuilt.high_water = max(rebuilt.high_water, index.high_water)
+                index = rebuilt
+            elif (changed_from := index.merge(fetched)) is not None:
+                _LOGGER.debug("Brunata %s: Monatswerte ergänzt/korrigiert", cost_type)
+                self._changed_from[cost_type] = min(
+                    changed_from, self._changed_from.get(cost_type, changed_from)
+                )
+
+            indexes[cost_type] = index
+
+        self._cumulative = indexes
+        if full_resync and not partial:
+            self._last_full_resync = dt_util.utcnow()
+            self._full_resync_requested = False
+            _LOGGER.debug("Brunata Historie vollständig neu aufgebaut")
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Benachrichtige nur Sensoren, deren Sicht sich geändert hat."""
+        changed, self._changed_views = self._changed_views, None
+        if changed is None:
+            super().async_update_listeners()
+            return
+
+        if not changed:
+            self.skipped_updates += 1
+        for update_callback, context in list(self._listeners.values()):
+            # Sensoren ohne Kontext (Diagnose) werden immer aktualisiert
+            if context is None or context in changed:
+                update_callback()
+            else:
+                self.suppressed_writes += 1
+
+    def _schedule_next_poll(self) -> None:
+        """Setze den Abstand zum nächsten Abruf (wird nach dem Update geplant)."""
+        self.update_interval = self.scheduler.next_interval()
+        _LOGGER.debug(
+            "Nächster Brunata Abruf in %s (Fehlversuche: %d, gelernte Zeitpunkte: %d)",
+            self.update_interval,
+            self.scheduler.failures,
+            self.scheduler.observations,
+        )
+
+    def _extras(self) -> dict[str, Any]:
+        """Weiterer Zustand, der mit dem Snapshot gespeichert wird."""
+        return {
+            "schedule": self.scheduler.as_dict(),
+            "metadata": self.metadata.as_dict(),
+            "backfilled": sorted(self._backfilled),
+        }
+
+    def _save_args(self) -> tuple:
+        """Argumente für das Speichern des aktuellen Zustands."""
+        meters = {
+            cost_type: data.meter
+            for cost_type, data in (self.data.cost_types if self.data else {}).items()
+            if data.meter is not None
+        }
+        return (
+            meters,
+            self._cumulative,
+            self._last_full_resync,
+            self._extras(),
+        )
+
+    @callback
+    def _schedule_history_write(self, snapshot: BrunataSnapshot) -> None:
+        """Schreibe geänderte Monatsreihen im Hintergrund in die lokale Historie."""
+        self.entry.async_create_background_task(
+            self.hass,
+            self.history.async_write(snapshot.cost_types),
+            f"{DOMAIN}_history_write",
+        )
+
+    @callback
+    def _schedule_mqtt_publish(self, snapshot: BrunataSnapshot) -> None:
+        """Veröffentliche geänderte Werte im Hintergrund per MQTT."""
+        if self.mqtt is not None:
+            self.entry.async_create_background_task(
+                self.hass, self._async_mqtt_publish(snapshot), f"{DOMAIN}_mqtt_publish"
+            )
+
+    async def _async_mqtt_publish(self, snapshot: BrunataSnapshot) -> None:
+        """Ein MQTT-Fehler darf den Abruf nicht beeinträchtigen."""
+        assert self.mqtt is not None
+        try:
+            await self.mqtt.async_publish(states_from_snapshot(snapshot))
+        except Exception as err:  # nächster Abruf versucht es erneut
+            _LOGGER.warning("Brunata MQTT Veröffentlichung fehlgeschlagen: %s", err)
+
+    async def async_shutdown(self) -> None:
+        """Schließe den Client beim Entladen."""
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+        if self.data is not None:
+            # Ausstehendes verzögertes Speichern sofort ausführen
+            await self._snapshot_store.async_save(*self._save_args())
+        await self.history.async_close()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._session = None
+            self._batch = None
+            self._fetcher = None
+        if self._transport is not None:
+            from .hub import async_release_transport
+
+            await async_release_transport(self.hass, self._transport)
+            self._transport = None
+
+    async def async_profile_refresh(self) -> dict[str, Any]:
+        """Führe einen Abruf unter dem Profiler aus (Profil und Zusammenfassung als Datei)."""
+        from .profiling import async_profile  # cProfile nur bei Bedarf laden
+
+        stamp = dt_util.utcnow().strftime("%Y%m%d-%H%M%S")
+        summary = await async_profile(
+            self.hass,
+            self.instrumentation,
+            self.async_refresh,
+            self.hass.config.path(f"{DOMAIN}.{self.entry.entry_id}.profile.{stamp}"),
+        )
+        return {**summary, "last_update_success": self.last_update_success}
+
+    async def _async_update_data(self) -> BrunataSnapshot:
+        """Daten von der API abrufen mit erweiterter Struktur."""
+        try:
+            with self.instrumentation.measure(PHASE_REFRESH):
+                return await self._async_fetch_snapshot()
+        except Exception as err:
+            self._changed_views = None
+            self.scheduler.record_failure()
+            self._schedule_next_poll()
+            _LOGGER.error("Fehler beim Abruf der Brunata Daten: %s", err)
+            raise UpdateFailed(f"Fehler beim Abruf der Brunata Daten: {err}") from err
+
+    async def _async_fetch_snapshot(self) -> BrunataSnapshot:
+        """Ein Abruf; Login, Laden, Fortschreiben und Snapshot werden einzeln gemessen."""
+        session = await self._async_get_session()
+
+        # Login nur, wenn keine gültige Sitzung besteht
+        with self.instrumentation.measure(PHASE_LOGIN):
+            await session.async_ensure_login()
+
+        # Alle Lesezugriffe in einem $batch (oder einzeln, parallel)
+        assert self._fetcher is not None
+        with self.instrumentation.measure(PHASE_FETCH):
+            portal = await self._fetcher.async_fetch()
+        meter_readings = portal.meter_readings
+        cold_water_data = portal.cold_water
+
+        # Zusammenführen der monatlichen Daten
+        fetched_by_cost_type: dict[str, list[Reading]] = {}
+        fetched_by_cost_type.update(portal.monthly_heating)
+        fetched_by_cost_type.update(portal.monthly_hot_water)
+
+        # Bei Teilausfällen die letzten gültigen Werte der betroffenen
+        # Kostenarten behalten und die frisch geladenen veröffentlichen
+        partial = bool(portal.failed)
+        self.failed_endpoints = portal.failed
+        if partial:
+            self.partial_updates += 1
+            _LOGGER.info(
+                "Brunata Abruf unvollständig (%s), letzte Werte bleiben erhalten",
+                ", ".join(sorted(portal.failed)),
+            )
+
+        # Kumulative kWh-Historien inkrementell fortschreiben
+        full_resync = self._needs_full_resync()
+        with self.instrumentation.measure(PHASE_MERGE):
+            self._merge_monthly(fetched_by_cost_type, full_resync, partial)
+
+        # Snapshot je Kostenart zusammenstellen
+        previous = self.data
+        meters: dict[str, MeterValue] = {}
+        if partial and previous is not None:
+            meters.update(
+                (cost_type, data.meter)
+                for cost_type, data in previous.cost_types.items()
+                if data.meter is not None
+            )
+        meters.update(
+            (cost_type, MeterValue.from_reading(reading))
+            for cost_type, reading in {**cold_water_data, **meter_readings}.items()
+        )
+        with self.instrumentation.measure(PHASE_SNAPSHOT):
+            snapshot = self._build_snapshot(meters, previous)
+            if previous is not None and self.last_update_success:
+                self._changed_views = changed_sensor_views(
+                    previous.sensor_views, snapshot.sensor_views
+                )
+            else:
+                # Erstes Update oder Wiederverfügbarkeit: alle Sensoren schreiben
+                self._changed_views = None
+
+        self.scheduler.record_success(
+            dt_util.utcnow(), new_reading_epochs(previous, snapshot)
+        )
+        self._schedule_next_poll()
+        if not partial:
+            self.metadata.put(CACHE_READINGS, True)
+
+        self._snapshot_store.async_schedule_save(
+            meters, self._cumulative, self._last_full_resync, self._extras()
+        )
+        changed_from, self._changed_from = self._changed_from, {}
+        self.entry.async_create_background_task(
+            self.hass,
+            self._statistics.async_import(
+                snapshot.cost_types, full=full_resync, changed_from=changed_from
+            ),
+            f"{DOMAIN}_statistics_import",
+        )
+        self._schedule_history_write(snapshot)
+        self._schedule_mqtt_publish(snapshot)
+
+        _LOGGER.debug(
+            "Brunata Daten aktualisiert: %d Zähler, %d Monatsserien, %d KW-Zähler "
+            "(Logins: %d, eingespart: %d)",
+            len(meter_readings),
+            len(self._cumulative),
+            len(cold_water_data),
+            session.logins,
+            session.logins_avoided,
+        )
+
+        return snapshot
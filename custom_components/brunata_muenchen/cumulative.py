@@ -0,0 +1,183 @@
+"""Inkrementelle, exakte kumulative Summen je Kostenart."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Mapping
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any
+
+from .model import Series, to_epoch
+
+if TYPE_CHECKING:
+    from brunata_api.models import Reading
+
+
+def _decimal(value: float) -> Decimal:
+    """Dezimalwert eines Floats (kürzeste Darstellung, wie vom Portal geliefert)."""
+    return Decimal(repr(float(value)))
+
+
+class CumulativeIndex:
+    """Präfixsummen über die Monatswerte einer Kostenart.
+
+    Die Summen werden mit `Decimal` exakt geführt. Ein neuer Monat wird in
+    O(1) angehängt; ein korrigierter oder nachgelieferter älterer Monat
+    aktualisiert nur die Summen ab diesem Monat. `published_total()` sinkt
+    nie, damit TOTAL_INCREASING-Sensoren keinen Zählerwechsel melden; der
+    Höchststand (`high_water`) wird bei jeder Änderung in `set` nachgeführt.
+    """
+
+    __slots__ = (
+        "_epochs",
+        "_values",
+        "_prefix",
+        "_positions",
+        "_series",
+        "high_water",
+        "unit",
+    )
+
+    def __init__(self, unit: str | None = None) -> None:
+        self._epochs: list[int] = []
+        self._values: list[Decimal] = []
+        self._prefix: list[Decimal] = []
+        self._positions: dict[int, int] = {}
+        self._series: tuple[Series, Series] | None = None
+        self.high_water: Decimal = Decimal(0)
+        self.unit = unit
+
+    @classmethod
+    def from_readings(cls, readings: Iterable[Reading]) -> CumulativeIndex:
+        """Baue den Index vollständig aus Monats-Readings auf."""
+        index = cls()
+        index.merge(readings)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._epochs)
+
+    @property
+    def last_epoch(self) -> int | None:
+        """Zeitstempel des jüngsten Monats (Wasserzeichen)."""
+        return self._epochs[-1] if self._epochs else None
+
+    @property
+    def total(self) -> Decimal:
+        """Exakte Summe aller Monate."""
+        return self._prefix[-1] if self._prefix else Decimal(0)
+
+    def published_total(self) -> float:
+        """Monoton steigende Summe für TOTAL_INCREASING-Sensoren."""
+        return float(self.high_water)
+
+    def _shift(self, start: int, delta: Decimal) -> None:
+        """Verschiebe alle Summen ab `start` um `delta`."""
+        prefix = self._prefix
+        for i in range(start, len(prefix)):
+            prefix[i] += delta
+
+    def set(self, epoch: int, value: Decimal) -> bool:
+        """Setze den Wert eines Monats. Liefert True bei einer Änderung."""
+        position = self._positions.get(epoch)
+
+        if position is not None:
+            # Korrektur eines bekannten Monats
+            delta = value - self._values[position]
+            if not delta:
+                return False
+            self._values[position] = value
+            self._shift(position, delta)
+        elif not self._epochs or epoch > self._epochs[-1]:
+            # Neuer Monat am Ende: O(1)
+            self._positions[epoch] = len(self._epochs)
+            self._epochs.append(epoch)
+            self._values.append(value)
+            self._prefix.append(self.total + value)
+        else:
+            # Nachgelieferter älterer Monat
+            position = bisect_left(self._epochs, epoch)
+            before = self._prefix[position - 1] if position else Decimal(0)
+            self._epochs.insert(position, epoch)
+            self._values.insert(position, value)
+            self._prefix.insert(position, before)
+            self._shift(position, value)
+            for i in range(position, len(self._epochs)):
+                self._positions[self._epochs[i]] = i
+
+        self.high_water = max(self.high_water, self.total)
+        self._series = None
+        return True
+
+    def merge(self, readings: Iterable[Reading]) -> int | None:
+        """Übernimm Monats-Readings.
+
+        Liefert den frühesten Monat (Epoch), ab dem sich Summen geändert
+        haben, sonst None.
+        """
+        changed_from: int | None = None
+        for reading in sorted(readings, key=lambda r: r.timestamp):
+            epoch = to_epoch(reading.timestamp)
+            if self.set(epoch, _decimal(reading.value)) and changed_from is None:
+                changed_from = epoch
+            if reading.unit and reading.unit != self.unit:
+                self.unit = reading.unit
+                self._series = None
+                changed_from = self._epochs[0]
+        return changed_from
+
+    def merge_series(self, monthly: Series) -> int | None:
+        """Übernimm eine Monatsserie. Rückgabe wie `merge`."""
+        changed_from: int | None = None
+        for epoch, value in zip(monthly.timestamps, monthly.values):
+            if self.set(epoch, _decimal(value)) and changed_from is None:
+                changed_from = epoch
+        if monthly.unit and monthly.unit != self.unit:
+            self.unit = monthly.unit
+            self._series = None
+            changed_from = self._epochs[0] if self._epochs else None
+        return changed_from
+
+    def carry_older(self, other: CumulativeIndex) -> None:
+        """Übernimm die Monate von `other`, die vor dem ersten eigenen Monat liegen."""
+        first = self._epochs[0] if self._epochs else None
+        for epoch, value in zip(other._epochs, other._values):
+            if first is not None and epoch >= first:
+                break
+            self.set(epoch, value)
+
+    def series(self) -> tuple[Series, Series]:
+        """Monats- und kumulative Serie (zwischengespeichert bis zur nächsten Änderung)."""
+        if self._series is None:
+            timestamps = array("q", self._epochs)
+            self._series = (
+                Series(timestamps, array("d", map(float, self._values)), self.unit),
+                Series(
+                    array("q", timestamps),
+                    array("d", map(float, self._prefix)),
+                    self.unit or "kWh",
+                ),
+            )
+        return self._series
+
+    def as_dict(self) -> dict[str, Any]:
+        """JSON-fähige Darstellung (Dezimalwerte als Zeichenketten)."""
+        return {
+            "t": list(self._epochs),
+            "v": [str(value) for value in self._values],
+            "p": [str(total) for total in self._prefix],
+            "h": str(self.high_water),
+            "u": self.unit,
+        }
+
+    @classmethod
+    def from_dict(cls, raw: Mapping[str, Any]) -> CumulativeIndex:
+        """Stelle den Index aus `as_dict` wieder her."""
+        index = cls(raw.get("u"))
+        index._epochs = [int(epoch) for epoch in raw["t"]]
+        index._values = [Decimal(value) for value in raw["v"]]
+        index._prefix = [Decimal(total) for total in raw["p"]]
+        index._positions = {epoch: i for i, epoch in enumerate(index._epochs)}
+        index.high_water = max(Decimal(raw.get("h", "0")), index.total)
+        return index
@@ -0,0 +1,397 @@
+"""Eigenständiger Abruf vieler Konten ohne Home Assistant.
+
+Aufruf::
+
+    python -m custom_components.brunata_muenchen.daemon accounts.json -o readings.jsonl
+
+Die Kontendatei ist eine JSON-Liste mit `username`, `password` und optional
+`id`, `url` und `sap_client`. Alle Konten werden über einen begrenzten Pool
+von Workern abgefragt; Konten desselben Portals teilen sich Verbindungs-Pool
+und Rate-Limit. Fehlschläge einzelner Konten brechen den Lauf nicht ab.
+
+Mit `--mqtt host[:port]` werden die Werte jedes Kontos zusätzlich retained
+unter `<prefix>/<konto>/<kostenart>/reading|monthly|cumulative` veröffentlicht.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sys
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any
+
+from brunata_api import BrunataClient
+
+from .batch import BrunataBatchReader, PortalData
+from .const import (
+    ACCOUNT_PASSWORD,
+    ACCOUNT_URL,
+    ACCOUNT_USERNAME,
+    DAEMON_MAX_CONNECTIONS,
+    DAEMON_RATE_LIMIT,
+    DAEMON_WORKERS,
+    DEFAULT_MQTT_PREFIX,
+    METADATA_TTL,
+)
+from .cumulative import CumulativeIndex
+from .fetch import PortalFetcher
+from .metadata import MetadataCache
+from .model import MeterValue, from_epoch
+from .mqtt import MqttBridge, MqttConnection, parse_broker, states_from_records
+from .resilience import EndpointGuard
+from .session import BrunataSession
+from .transport import SharedTransport, async_create_client, create_transport, portal_key
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_URL = "https://nutzerportal.brunata-muenchen.de"
+
+# Alles außer Kleinbuchstaben und Ziffern wird im MQTT-Topic zu "_"
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+# Spalten der normalisierten Ausgabe
+COLUMNS = ("account", "cost_type", "kind", "timestamp", "value", "cumulative", "unit")
+
+
+@dataclass(slots=True)
+class Account:
+    """Zugangsdaten eines Kontos und sein Zustand über mehrere Läufe."""
+
+    id: str
+    data: Mapping[str, Any]
+    fetcher: PortalFetcher | None = None
+    client: BrunataClient | None = None
+    mqtt: MqttBridge | None = None
+
+
+@dataclass(slots=True)
+class PassResult:
+    """Ergebnis eines Laufs über alle Konten."""
+
+    accounts: int = 0
+    succeeded: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+    partial: int = 0
+    records: int = 0
+    requests: int = 0
+    published: int = 0
+    seconds: float = 0.0
+
+    @property
+    def accounts_per_minute(self) -> float:
+        """Durchsatz in Konten pro Minute."""
+        return self.accounts / self.seconds * 60 if self.seconds else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """JSON-fähige Zusammenfassung."""
+        return {
+            "accounts": self.accounts,
+            "succeeded": self.succeeded,
+            "failed": len(self.failed),
+            "partial": self.partial,
+            "records": self.records,
+            "requests": self.requests,
+            "published": self.published,
+            "seconds": round(self.seconds, 3),
+            "accounts_per_minute": round(self.accounts_per_minute, 1),
+            "errors": self.failed,
+        }
+
+
+def node_id(account_id: str) -> str:
+    """Topic-taugliche Kennung eines Kontos (wie `slugify` in Home Assistant)."""
+    return _SLUG_RE.sub("_", account_id.lower()).strip("_") or "unknown"
+
+
+def load_accounts(path: Path) -> list[Account]:
+    """Lies die Kontendatei (JSON-Liste oder Objekt mit `accounts`)."""
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(raw, Mapping):
+        raw = raw.get("accounts") or []
+    accounts: list[Account] = []
+    for position, item in enumerate(raw):
+        data = {
+            ACCOUNT_URL: item.get("url") or DEFAULT_URL,
+            ACCOUNT_USERNAME: item["username"],
+            ACCOUNT_PASSWORD: item["password"],
+            "sap_client": str(item.get("sap_client") or "201"),
+        }
+        accounts.append(Account(str(item.get("id") or item["username"] or position), data))
+    return accounts
+
+
+def normalise(account: str, portal: PortalData) -> Iterator[dict[str, Any]]:
+    """Normalisierte Datensätze eines Abrufs (Zählerstände und Monatswerte).
+
+    Die kumulativen Summen entstehen wie im Koordinator über den
+    Präfixsummen-Index der Monatswerte.
+    """
+    meters = {**portal.cold_water, **portal.meter_readings}
+    for cost_type in sorted(meters):
+        meter = MeterValue.from_reading(meters[cost_type])
+        yield {
+            "account": account,
+            "cost_type": cost_type,
+            "kind": "meter",
+            "timestamp": meter.timestamp.isoformat(),
+            "value": meter.value,
+            "cumulative": None,
+            "unit": meter.unit,
+        }
+
+    monthly = {**portal.monthly_heating, **portal.monthly_hot_water}
+    for cost_type in sorted(monthly):
+        if not monthly[cost_type]:
+            continue
+        values, totals = CumulativeIndex.from_readings(monthly[cost_type]).series()
+        for epoch, value, total in zip(values.timestamps, values.values, totals.values):
+            yield {
+                "account": account,
+                "cost_type": cost_type,
+                "kind": "monthly",
+                "timestamp": from_epoch(epoch).isoformat(),
+                "value": value,
+                "cumulative": total,
+                "unit": values.unit or "kWh",
+            }
+
+
+class JsonlWriter:
+    """Schreibt jeden Datensatz sofort als JSON-Zeile."""
+
+    def __init__(self, stream: IO[str]) -> None:
+        self._stream = stream
+
+    def write(self, records: Sequence[Mapping[str, Any]]) -> None:
+        """Schreibe die Datensätze eines Kontos."""
+        self._stream.writelines(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for record in records
+        )
+        self._stream.flush()
+
+    def close(self) -> None:
+        """Nichts zu tun; die Zeilen sind bereits geschrieben."""
+
+
+class ColumnarWriter:
+    """Sammelt die Datensätze spaltenweise und schreibt sie am Ende als JSON."""
+
+    def __init__(self, stream: IO[str]) -> None:
+        self._stream = stream
+        self._columns: dict[str, list[Any]] = {column: [] for column in COLUMNS}
+
+    def write(self, records: Sequence[Mapping[str, Any]]) -> None:
+        """Hänge die Datensätze eines Kontos an die Spalten an."""
+        for column, values in self._columns.items():
+            values.extend(record[column] for record in records)
+
+    def close(self) -> None:
+        """Schreibe alle Spalten."""
+        json.dump(
+            {"columns": list(COLUMNS), "data": self._columns},
+            self._stream,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        self._stream.write("\n")
+        self._stream.flush()
+
+
+class BrunataDaemon:
+    """Fragt viele Konten mit begrenzter Parallelität ab."""
+
+    def __init__(
+        self,
+        accounts: Sequence[Account],
+        writer: JsonlWriter | ColumnarWriter,
+        workers: int = DAEMON_WORKERS,
+        max_connections: int = DAEMON_MAX_CONNECTIONS,
+        rate: float = DAEMON_RATE_LIMIT,
+        mqtt: MqttConnection | None = None,
+        mqtt_prefix: str = DEFAULT_MQTT_PREFIX,
+        mqtt_discovery: bool = False,
+    ) -> None:
+        self.accounts = accounts
+        self._writer = writer
+        self._workers = max(1, workers)
+        self._max_connections = max_connections
+        self._rate = rate
+        self._transports: dict[str, SharedTransport] = {}
+        # Eine MQTT-Verbindung für alle Konten, je Konto eigene Topics
+        self._mqtt = mqtt
+        if mqtt is not None:
+            for account in accounts:
+                account.mqtt = MqttBridge(
+                    mqtt, mqtt_prefix, node_id(account.id), discovery=mqtt_discovery
+                )
+
+    async def _async_transport(self, url: str) -> SharedTransport:
+        """Gemeinsamer Transport des Portals eines Kontos."""
+        key = portal_key(url)
+        if key not in self._transports:
+            self._transports[key] = await asyncio.to_thread(
+                create_transport,
+                key,
+                self._max_connections,
+                self._max_connections,
+                self._rate,
+            )
+        return self._transports[key]
+
+    async def _async_fetcher(self, account: Account) -> PortalFetcher:
+        """Client, Sitzung und Cache eines Kontos (bleiben über Läufe erhalten)."""
+        if account.fetcher is None:
+            transport = await self._async_transport(account.data[ACCOUNT_URL])
+            client = await async_create_client(account.data, transport)
+            metadata = MetadataCache(METADATA_TTL)
+            account.client = client
+            account.fetcher = PortalFetcher(
+                BrunataSession(client),
+                BrunataBatchReader(client, metadata),
+                EndpointGuard(),
+                metadata,
+            )
+        return account.fetcher
+
+    async def _async_poll(self, account: Account, result: PassResult) -> None:
+        """Frage ein Konto ab und schreibe dessen Datensätze."""
+        fetcher = await self._async_fetcher(account)
+        await fetcher.session.async_ensure_login()
+        portal = await fetcher.async_fetch()
+        records = list(normalise(account.id, portal))
+        self._writer.write(records)
+        result.records += len(records)
+        if account.mqtt is not None:
+            published = await account.mqtt.async_publish(states_from_records(records))
+            result.published += published
+        result.succeeded += 1
+        if portal.failed:
+            result.partial += 1
+
+    async def _async_worker(self, queue: asyncio.Queue[Account], result: PassResult) -> None:
+        """Arbeite Konten aus der Warteschlange ab, bis sie leer ist."""
+        while True:
+            try:
+                account = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await self._async_poll(account, result)
+            except Exception as err:  # ein Konto darf den Lauf nicht abbrechen
+                _LOGGER.warning("Konto %s fehlgeschlagen: %r", account.id, err)
+                result.failed[account.id] = repr(err)
+
+    async def async_run_once(self) -> PassResult:
+        """Ein Lauf über alle Konten."""
+        queue: asyncio.Queue[Account] = asyncio.Queue()
+        for account in self.accounts:
+            queue.put_nowait(account)
+
+        result = PassResult(accounts=len(self.accounts))
+        requests_before = sum(t.requests for t in self._transports.values())
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                self._async_worker(queue, result)
+                for _ in range(min(self._workers, len(self.accounts)))
+            )
+        )
+        result.seconds = time.perf_counter() - started
+        result.requests = (
+            sum(t.requests for t in self._transports.values()) - requests_before
+        )
+        return result
+
+    async def async_close(self) -> None:
+        """Schließe alle Clients und Verbindungs-Pools."""
+        for account in self.accounts:
+            if account.client is not None:
+                await account.client.aclose()
+                account.client = None
+                account.fetcher = None
+        for transport in self._transports.values():
+            await transport.async_close_pool()
+        self._transports.clear()
+        if self._mqtt is not None:
+            await self._mqtt.async_close()
+        self._writer.close()
+
+
+async def async_main(args: argparse.Namespace, output: IO[str]) -> int:
+    """Führe einen oder (mit `--interval`) fortlaufend Läufe aus."""
+    accounts = load_accounts(args.accounts)
+    writer = ColumnarWriter(output) if args.format == "columnar" else JsonlWriter(output)
+    mqtt = None
+    if args.mqtt:
+        host, port = parse_broker(args.mqtt)
+        mqtt = MqttConnection(
+            host, port, username=args.mqtt_username, password=args.mqtt_password
+        )
+    daemon = BrunataDaemon(
+        accounts,
+        writer,
+        args.workers,
+        args.max_connections,
+        args.rate,
+        mqtt,
+        args.mqtt_prefix,
+        args.mqtt_discovery,
+    )
+    failed = 0
+    try:
+        while True:
+            result = await daemon.async_run_once()
+            failed = len(result.failed)
+            print(json.dumps(result.as_dict(), ensure_ascii=False), file=sys.stderr)
+            if not args.interval:
+                break
+            await asyncio.sleep(args.interval * 60)
+    finally:
+        await daemon.async_close()
+    return 1 if failed == len(accounts) and accounts else 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Kommandozeile."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("accounts", type=Path, help="Kontendatei (JSON)")
+    parser.add_argument("-o", "--output", default="-", help="Ausgabedatei (- = stdout)")
+    parser.add_argument("--format", choices=("jsonl", "columnar"), default="jsonl")
+    parser.add_argument("--workers", type=int, default=DAEMON_WORKERS)
+    parser.add_argument("--max-connections", type=int, default=DAEMON_MAX_CONNECTIONS)
+    parser.add_argument(
+        "--rate", type=float, default=DAEMON_RATE_LIMIT, help="Anfragen/s je Portal"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=0, help="Minuten zwischen Läufen (0 = einmal)"
+    )
+    parser.add_argument("--mqtt", metavar="HOST[:PORT]", help="Werte per MQTT veröffentlichen")
+    parser.add_argument("--mqtt-prefix", default=DEFAULT_MQTT_PREFIX)
+    parser.add_argument("--mqtt-username")
+    parser.add_argument("--mqtt-password")
+    parser.add_argument(
+        "--mqtt-discovery", action="store_true", help="Home-Assistant-Discovery senden"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    if args.output == "-":
+        return asyncio.run(async_main(args, sys.stdout))
+    with open(args.output, "w", encoding="utf-8") as output:
+        return asyncio.run(async_main(args, output))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
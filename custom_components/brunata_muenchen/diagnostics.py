@@ -0,0 +1,115 @@
+"""Diagnose-Download der Brunata München Integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, ENDPOINT_POLICIES, REFRESH_PHASES
+from .model import from_epoch
+
+# Zugangsdaten und alles, was das Konto identifiziert
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME, "title", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Messwerte je Abrufphase und Endpunkt sowie der Zustand des Koordinators."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    measurements = coordinator.instrumentation.as_dict()
+    session = coordinator.session
+    transport = coordinator.transport
+    batch = coordinator.batch
+    snapshot = coordinator.data
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "refresh": {
+            "last_update_success": coordinator.last_update_success,
+            "phases": {
+                name: measurements[name] for name in REFRESH_PHASES if name in measurements
+            },
+            "endpoints": {
+                name: measurements[name] for name in ENDPOINT_POLICIES if name in measurements
+            },
+            "failed_endpoints": sorted(coordinator.failed_endpoints),
+            "open_endpoints": coordinator.guard.open_endpoints,
+            "retries": coordinator.guard.retries,
+            "timeouts": coordinator.guard.timeouts,
+            "rejected": coordinator.guard.rejected,
+            "partial_updates": coordinator.partial_updates,
+            "skipped_updates": coordinator.skipped_updates,
+            "suppressed_writes": coordinator.suppressed_writes,
+        },
+        "schedule": {
+            **coordinator.scheduler.as_dict(),
+            "next_poll": (
+                coordinator.scheduler.next_poll.isoformat()
+                if coordinator.scheduler.next_poll
+                else None
+            ),
+            "failures": coordinator.scheduler.failures,
+        },
+        "session": (
+            {
+                "logins": session.logins,
+                "logins_avoided": session.logins_avoided,
+                "relogins": session.relogins,
+                "valid": session.valid,
+            }
+            if session is not None
+            else None
+        ),
+        "transport": (
+            {
+                "requests": transport.requests,
+                "bytes_received": transport.bytes_received,
+                "throttled": transport.throttled,
+                "throttle_seconds": round(transport.throttle_seconds, 3),
+                "users": transport.users,
+            }
+            if transport is not None
+            else None
+        ),
+        "batch": (
+            {
+                "enabled": batch.enabled,
+                "batches": batch.batches,
+                "batched_requests": batch.batched_requests,
+                "fallbacks": batch.fallbacks,
+                "period_changes": batch.period_changes,
+            }
+            if batch is not None
+            else None
+        ),
+        "backfill": coordinator.backfill.as_dict(),
+        "metadata_cache": {
+            "hits": coordinator.metadata.hits,
+            "misses": coordinator.metadata.misses,
+        },
+        "cost_types": (
+            {
+                cost_type: {
+                    "meter": data.meter.value if data.meter else None,
+                    "meter_timestamp": (
+                        from_epoch(data.meter.epoch).isoformat() if data.meter else None
+                    ),
+                    "unit": data.meter.unit if data.meter else None,
+                    "monthly_points": len(data.monthly) if data.monthly else 0,
+                    "last_month": (
+                        from_epoch(data.monthly.last_epoch).isoformat()
+                        if data.monthly
+                        else None
+                    ),
+                }
+                for cost_type, data in sorted(snapshot.cost_types.items())
+            }
+            if snapshot is not None
+            else {}
+        ),
+    }
@@ -0,0 +1,201 @@
+"""Abruf aller Daten eines Kontos (gebündelt oder einzeln, fehlertolerant)."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from brunata_api import ReadingKind
+from brunata_api.models import Reading
+
+from .batch import BatchRejected, BrunataBatchReader, PortalData, cold_water_meter_ids
+from .compat import is_auth_failure
+from .const import (
+    CACHE_COST_TYPES,
+    DEFAULT_COLD_WATER_CONCURRENCY,
+    ENDPOINT_BATCH,
+    ENDPOINT_COLD_WATER,
+    ENDPOINT_COST_TYPES,
+    ENDPOINT_METER_READINGS,
+    ENDPOINT_MONTHLY_HEATING,
+    ENDPOINT_MONTHLY_HOT_WATER,
+)
+from .metadata import MetadataCache
+from .resilience import EndpointGuard, endpoint_key
+from .session import BrunataSession
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PortalUnavailable(Exception):
+    """Kein Endpunkt des Portals hat Daten geliefert."""
+
+
+class PortalFetcher:
+    """Lädt Zählerstände, Monatsreihen und KW-Zähler eines Kontos.
+
+    Wird vom Koordinator und vom eigenständigen Dienst (`daemon`) genutzt
+    und hängt deshalb nicht von Home Assistant Einträgen ab.
+    """
+
+    def __init__(
+        self,
+        session: BrunataSession,
+        batch: BrunataBatchReader,
+        guard: EndpointGuard,
+        metadata: MetadataCache,
+        cold_water_concurrency: int = DEFAULT_COLD_WATER_CONCURRENCY,
+    ) -> None:
+        self.session = session
+        self.batch = batch
+        self.guard = guard
+        self.metadata = metadata
+        self._cold_water_concurrency = cold_water_concurrency
+
+    async def _async_guarded(
+        self, endpoint: str, failed: set[str], method, *args: Any, **kwargs: Any
+    ) -> Any | None:
+        """Rufe einen Endpunkt abgesichert auf; Fehlschläge in `failed` vermerken."""
+        try:
+            return await self.guard.async_call(endpoint, method, *args, **kwargs)
+        except Exception as err:
+            _LOGGER.debug("Brunata Endpunkt %s fehlgeschlagen: %r", endpoint, err)
+            failed.add(endpoint)
+            return None
+
+    async def _async_fetch_cold_water_meter(
+        self,
+        meter_id: str,
+        semaphore: asyncio.Semaphore,
+        failed: set[str],
+    ) -> Reading | None:
+        """Hole den letzten Monatswert eines KW-Zählers (eigene Sperre je Zähler)."""
+        session = self.session
+        async with semaphore:
+            data = await self._async_guarded(
+                endpoint_key(ENDPOINT_COLD_WATER, meter_id),
+                failed,
+                session.async_call,
+                session.client.get_monthly_consumption,
+                cost_type=meter_id,
+            )
+        # Nur der letzte Wert wird benötigt, die restliche Serie verwerfen
+        return data[-1] if data else None
+
+    async def _async_fetch_cost_types_and_cold_water(
+        self, failed: set[str]
+    ) -> tuple[dict[str, set[str]], dict[str, Reading]]:
+        """Hole die Kostenarten (Cache) und anschließend parallel alle KW-Zähler."""
+        session = self.session
+        cold_water_data: dict[str, Reading] = {}
+        cached = self.metadata.get(CACHE_COST_TYPES)
+        if cached is not None:
+            supported_types = {period: set(types) for period, types in cached.items()}
+        else:
+            supported_types = await self._async_guarded(
+                ENDPOINT_COST_TYPES,
+                failed,
+                session.async_call,
+                session.client.get_supported_cost_types,
+            )
+            if supported_types is None:
+                # Ohne Kostenarten sind die KW-Zähler unbekannt
+                failed.add(ENDPOINT_COLD_WATER)
+                return {}, cold_water_data
+            self.metadata.put(
+                CACHE_COST_TYPES,
+                {period: sorted(types) for period, types in supported_types.items()},
+            )
+
+        meter_ids = cold_water_meter_ids(supported_types)
+        if not meter_ids:
+            return supported_types, cold_water_data
+
+        semaphore = asyncio.Semaphore(self._cold_water_concurrency)
+        results = await asyncio.gather(
+            *(
+                self._async_fetch_cold_water_meter(meter_id, semaphore, failed)
+                for meter_id in meter_ids
+            )
+        )
+        for meter_id, reading in zip(meter_ids, results):
+            if reading is not None:
+                cold_water_data[meter_id] = reading
+
+        return supported_types, cold_water_data
+
+    async def _async_fetch_individual(self) -> PortalData:
+        """Lade alle Daten mit einzelnen Client-Aufrufen (parallel).
+
+        Jeder Endpunkt hat eine eigene Frist; fehlgeschlagene Endpunkte
+        liefern keine Werte und werden in `PortalData.failed` vermerkt.
+        """
+        session = self.session
+        client = session.client
+        failed: set[str] = set()
+        (
+            meter_readings,
+            monthly_heating,
+            monthly_hot_water,
+            (supported_types, cold_water_data),
+        ) = await asyncio.gather(
+            self._async_guarded(
+                ENDPOINT_METER_READINGS,
+                failed,
+                session.async_call,
+                client.get_meter_readings,
+            ),
+            self._async_guarded(
+                ENDPOINT_MONTHLY_HEATING,
+                failed,
+                session.async_call,
+                client.get_monthly_consumptions,
+                ReadingKind.heating,
+                in_kwh=True,
+            ),
+            self._async_guarded(
+                ENDPOINT_MONTHLY_HOT_WATER,
+                failed,
+                session.async_call,
+                client.get_monthly_consumptions,
+                ReadingKind.hot_water,
+                in_kwh=True,
+            ),
+            self._async_fetch_cost_types_and_cold_water(failed),
+        )
+        if not cold_water_data and {
+            ENDPOINT_METER_READINGS,
+            ENDPOINT_MONTHLY_HEATING,
+            ENDPOINT_MONTHLY_HOT_WATER,
+        } <= failed:
+            # Nichts Neues geladen: als fehlgeschlagenen Abruf behandeln
+            raise PortalUnavailable(
+                f"Alle Brunata Endpunkte fehlgeschlagen: {', '.join(sorted(failed))}"
+            )
+        return PortalData(
+            meter_readings=meter_readings or {},
+            monthly_heating=monthly_heating or {},
+            monthly_hot_water=monthly_hot_water or {},
+            supported_types=supported_types or {},
+            cold_water=cold_water_data,
+            failed=frozenset(failed),
+        )
+
+    async def async_fetch(self) -> PortalData:
+        """Lade alle Daten gebündelt per $batch, sonst einzeln."""
+        session, batch = self.session, self.batch
+        if batch.enabled:
+            try:
+                return await self.guard.async_call(
+                    ENDPOINT_BATCH, session.async_call, batch.async_read_all
+                )
+            except BatchRejected as err:
+                _LOGGER.debug("Brunata $batch abgelehnt, Einzelabrufe: %s", err)
+            except Exception as err:
+                if is_auth_failure(err):
+                    # Auch nach erneutem Login abgewiesen
+                    raise
+                _LOGGER.debug("Brunata $batch fehlgeschlagen, Einzelabrufe: %r", err)
+        return await self._async_fetch_individual()
+
@@ -0,0 +1,191 @@
+"""Lokale, indizierte Historie der Monatswerte (SQLite)."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import DOMAIN, HISTORY_BUCKETS, HISTORY_SCHEMA_VERSION
+from .model import CostTypeData, from_epoch, to_epoch
+
+_LOGGER = logging.getLogger(__name__)
+
+# Primärschlüssel (cost_type, ts) ohne Rowid: die Tabelle ist selbst der Index
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS monthly (
+    cost_type TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    unit TEXT,
+    PRIMARY KEY (cost_type, ts)
+) WITHOUT ROWID
+"""
+
+_UPSERT = """
+INSERT INTO monthly (cost_type, ts, value, unit) VALUES (?, ?, ?, ?)
+ON CONFLICT (cost_type, ts) DO UPDATE SET value = excluded.value, unit = excluded.unit
+WHERE value != excluded.value OR unit IS NOT excluded.unit
+"""
+
+_RANGE = "cost_type = ? AND ts >= ? AND ts < ?"
+
+_BUCKET_FORMATS = {"month": "%Y-%m-01", "year": "%Y-01-01"}
+
+
+def _round(value: float | None) -> float | None:
+    """Runde Summen aus Gleitkommawerten auf eine sinnvolle Stellenzahl."""
+    return round(value, 6) if value is not None else None
+
+
+class BrunataHistoryStore:
+    """Monatswerte aller Kostenarten eines Eintrags in einer SQLite-Datei.
+
+    Jeder Abruf schreibt nur Kostenarten, deren Daten sich geändert haben.
+    Abfragen laufen ausschließlich über den Index (cost_type, ts) und
+    greifen nie auf das Portal zu.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self.path = Path(hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry_id}.history.db"))
+        self._connection: sqlite3.Connection | None = None
+        self._lock = asyncio.Lock()
+        self._closed = False
+        # Fingerprint der zuletzt geschriebenen Daten je Kostenart
+        self._written: dict[str, int] = {}
+        self.rows_written = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne die Datenbank und lege das Schema an (im Executor)."""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+            connection.execute(f"PRAGMA user_version={HISTORY_SCHEMA_VERSION}")
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _write(self, rows: list[tuple[str, int, float, str | None]]) -> int:
+        """Schreibe Monatswerte (Upsert, unveränderte Zeilen bleiben)."""
+        connection = self._connect()
+        with connection:
+            before = connection.total_changes
+            connection.executemany(_UPSERT, rows)
+            return connection.total_changes - before
+
+    async def async_write(self, cost_types: Mapping[str, CostTypeData]) -> None:
+        """Übernimm die Monatsreihen aller geänderten Kostenarten."""
+        changed = [
+            data
+            for cost_type, data in cost_types.items()
+            if data.monthly and self._written.get(cost_type) != data.fingerprint
+        ]
+        if not changed or self._closed:
+            return
+
+        rows = [
+            (data.cost_type, epoch, value, data.monthly.unit)
+            for data in changed
+            for epoch, value in zip(data.monthly.timestamps, data.monthly.values)
+        ]
+        async with self._lock:
+            written = await self.hass.async_add_executor_job(self._write, rows)
+        for data in changed:
+            self._written[data.cost_type] = data.fingerprint
+        self.rows_written += written
+        if written:
+            _LOGGER.debug("Brunata Historie: %d Monatswerte geschrieben", written)
+
+    def _query(
+        self, cost_type: str, start: int, end: int, bucket: str | None
+    ) -> dict[str, Any]:
+        """Aggregiere einen Zeitraum über den Index (im Executor)."""
+        connection = self._connect()
+        args = (cost_type, start, end)
+        count, total, minimum, maximum, first, last = connection.execute(
+            f"SELECT COUNT(*), SUM(value), MIN(value), MAX(value), MIN(ts), MAX(ts) "
+            f"FROM monthly WHERE {_RANGE}",
+            args,
+        ).fetchone()
+        unit = connection.execute(
+            f"SELECT unit FROM monthly WHERE {_RANGE} ORDER BY ts DESC LIMIT 1", args
+        ).fetchone()
+
+        result: dict[str, Any] = {
+            "cost_type": cost_type,
+            "unit": unit[0] if unit else None,
+            "count": count,
+            "sum": _round(total),
+            "min": minimum,
+            "max": maximum,
+            "first": from_epoch(first).isoformat() if first is not None else None,
+            "last": from_epoch(last).isoformat() if last is not None else None,
+        }
+        if bucket is not None:
+            result["buckets"] = [
+                {
+                    "start": period,
+                    "count": bucket_count,
+                    "sum": _round(bucket_sum),
+                    "min": bucket_min,
+                    "max": bucket_max,
+                }
+                for period, bucket_count, bucket_sum, bucket_min, bucket_max in connection.execute(
+                    f"SELECT strftime(?, ts, 'unixepoch') AS period, COUNT(*), "
+                    f"SUM(value), MIN(value), MAX(value) "
+                    f"FROM monthly WHERE {_RANGE} GROUP BY period ORDER BY period",
+                    (_BUCKET_FORMATS[bucket], *args),
+                )
+            ]
+        return result
+
+    async def async_query(
+        self,
+        cost_type: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        bucket: str | None = "month",
+    ) -> dict[str, Any]:
+        """Summe, Minimum, Maximum und Buckets der Monatswerte in [start, end)."""
+        if bucket is not None and bucket not in HISTORY_BUCKETS:
+            raise ValueError(f"Unbekannte Gruppierung: {bucket}")
+        async with self._lock:
+            return await self.hass.async_add_executor_job(
+                self._query,
+                cost_type,
+                to_epoch(start) if start else -(2**62),
+                to_epoch(end) if end else 2**62,
+                bucket,
+            )
+
+    def _close(self) -> None:
+        """Schließe die Datenbank (im Executor)."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def async_close(self) -> None:
+        """Schließe die Datenbank beim Entladen."""
+        self._closed = True
+        async with self._lock:
+            await self.hass.async_add_executor_job(self._close)
+
+    async def async_remove(self) -> None:
+        """Lösche die Datenbank beim Entfernen des Eintrags."""
+        await self.async_close()
+
+        def _unlink() -> None:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+
+        await self.hass.async_add_executor_job(_unlink)
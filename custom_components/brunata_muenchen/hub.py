@@ -0,0 +1,137 @@
+"""Gemeinsame Transporte und geparkte Clients einer Home-Assistant-Instanz."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.const import CONF_PASSWORD, CONF_URL, CONF_USERNAME
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from brunata_api import BrunataClient
+
+from .const import DATA_PARKED_CLIENTS, DATA_TRANSPORTS, PARKED_CLIENT_TTL
+from .transport import SharedTransport, create_transport, portal_key
+
+if TYPE_CHECKING:
+    from .session import BrunataSession
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_acquire_transport(hass: HomeAssistant, base_url: str) -> SharedTransport:
+    """Hole (oder erstelle) den gemeinsamen Transport eines Portals."""
+    transports: dict[str, SharedTransport] = hass.data.setdefault(DATA_TRANSPORTS, {})
+    key = portal_key(base_url)
+    transport = transports.get(key)
+    if transport is None:
+        created = await hass.async_add_executor_job(create_transport, key)
+        # Zwischenzeitlich von einem anderen Eintrag angelegt?
+        transports = hass.data.setdefault(DATA_TRANSPORTS, {})
+        transport = transports.setdefault(key, created)
+        if transport is not created:
+            await created.async_close_pool()
+    transport.users += 1
+    return transport
+
+
+async def async_release_transport(
+    hass: HomeAssistant, transport: SharedTransport
+) -> None:
+    """Gib den Transport frei und schließe ihn nach dem letzten Nutzer."""
+    transport.users -= 1
+    if transport.users > 0:
+        return
+
+    transports: dict[str, SharedTransport] = hass.data.get(DATA_TRANSPORTS, {})
+    transports.pop(transport.portal, None)
+    if not transports:
+        hass.data.pop(DATA_TRANSPORTS, None)
+    await transport.async_close_pool()
+    _LOGGER.debug("Brunata Verbindungs-Pool für %s geschlossen", transport.portal)
+
+
+async def async_discard_client(
+    hass: HomeAssistant, transport: SharedTransport, client: BrunataClient | None
+) -> None:
+    """Schließe einen Client und gib seinen Transport frei."""
+    if client is not None:
+        await client.aclose()
+    await async_release_transport(hass, transport)
+
+
+@dataclass(slots=True)
+class ParkedClient:
+    """Im Config Flow angemeldeter Client, bis der erste Abruf ihn übernimmt."""
+
+    transport: SharedTransport
+    client: BrunataClient
+    session: BrunataSession
+    cancel_expiry: CALLBACK_TYPE
+
+
+def _parked_key(data: Mapping[str, Any]) -> tuple[str, str, str, str]:
+    """Zugangsdaten, für die ein geparkter Client gilt."""
+    return (
+        portal_key(data[CONF_URL]),
+        data.get("sap_client", "201"),
+        data[CONF_USERNAME],
+        data[CONF_PASSWORD],
+    )
+
+
+@callback
+def park_client(
+    hass: HomeAssistant,
+    data: Mapping[str, Any],
+    transport: SharedTransport,
+    session: BrunataSession,
+) -> None:
+    """Halte einen angemeldeten Client für den ersten Abruf bereit.
+
+    Übernimmt ihn kein Eintrag innerhalb von `PARKED_CLIENT_TTL`, wird er
+    geschlossen und der Transport freigegeben.
+    """
+    parked: dict[tuple[str, str, str, str], ParkedClient] = hass.data.setdefault(
+        DATA_PARKED_CLIENTS, {}
+    )
+    key = _parked_key(data)
+
+    @callback
+    def _expire(_now: datetime) -> None:
+        if (item := claim_client(hass, data)) is not None:
+            hass.async_create_background_task(
+                async_discard_client(hass, item.transport, item.client),
+                "brunata_muenchen_discard_parked_client",
+            )
+
+    if (previous := parked.pop(key, None)) is not None:
+        previous.cancel_expiry()
+        hass.async_create_background_task(
+            async_discard_client(hass, previous.transport, previous.client),
+            "brunata_muenchen_discard_parked_client",
+        )
+    parked[key] = ParkedClient(
+        transport,
+        session.client,
+        session,
+        async_call_later(hass, PARKED_CLIENT_TTL, _expire),
+    )
+
+
+@callback
+def claim_client(hass: HomeAssistant, data: Mapping[str, Any]) -> ParkedClient | None:
+    """Übernimm den geparkten Client zu diesen Zugangsdaten (falls vorhanden)."""
+    parked: dict[tuple[str, str, str, str], ParkedClient] = hass.data.get(
+        DATA_PARKED_CLIENTS, {}
+    )
+    item = parked.pop(_parked_key(data), None)
+    if not parked:
+        hass.data.pop(DATA_PARKED_CLIENTS, None)
+    if item is not None:
+        item.cancel_expiry()
+    return item
@@ -0,0 +1,150 @@
+"""Messung von Dauer, Datenmenge und Fehlern je Abrufphase und Portal-Aufruf."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from .const import INSTRUMENTATION_WINDOW
+
+# Laufende Messungen des aktuellen Tasks; parallele Aufrufe (gather) erhalten
+# je eine Kopie des Kontexts, empfangene Bytes landen so beim richtigen Aufruf
+_ACTIVE: ContextVar[tuple[OperationStats, ...]] = ContextVar(
+    "brunata_instrumentation", default=()
+)
+
+
+def record_bytes(count: int) -> None:
+    """Rechne empfangene Bytes allen laufenden Messungen zu."""
+    for stats in _ACTIVE.get():
+        stats.bytes_received += count
+
+
+@dataclass(slots=True)
+class TraceSpan:
+    """Eine Spanne der Zeitleiste (Beginn in `time.perf_counter`-Sekunden)."""
+
+    name: str
+    kind: str  # "measure" (Phase, Portal-Aufruf) oder "task"
+    start: float
+    duration: float
+    task: str | None = None
+    error: str | None = None
+
+
+class OperationStats:
+    """Kennzahlen einer Phase oder eines Aufrufs über die letzten Messungen."""
+
+    __slots__ = (
+        "_samples",
+        "calls",
+        "errors",
+        "retries",
+        "bytes_received",
+        "last_duration",
+        "last_error",
+    )
+
+    def __init__(self, window: int = INSTRUMENTATION_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_received = 0
+        self.last_duration: float | None = None
+        self.last_error: str | None = None
+
+    def record(self, duration: float, error: str | None) -> None:
+        """Merke eine abgeschlossene Messung."""
+        self.calls += 1
+        self.last_duration = duration
+        self._samples.append(duration)
+        if error is not None:
+            self.errors += 1
+            self.last_error = error
+
+    def percentile(self, quantile: float) -> float | None:
+        """Perzentil der Dauer über das gleitende Fenster (Nearest Rank)."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[max(math.ceil(quantile * len(ordered)) - 1, 0)]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Kennzahlen in Sekunden (gerundet) für Attribute und Diagnose."""
+
+        def _seconds(value: float | None) -> float | None:
+            return round(value, 3) if value is not None else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes_received": self.bytes_received,
+            "last": _seconds(self.last_duration),
+            "p50": _seconds(self.percentile(0.5)),
+            "p95": _seconds(self.percentile(0.95)),
+            "max": _seconds(max(self._samples, default=None)),
+            "last_error": self.last_error,
+        }
+
+
+class Instrumentation:
+    """Sammelt die Kennzahlen aller Phasen und Aufrufe eines Koordinators."""
+
+    def __init__(self, window: int = INSTRUMENTATION_WINDOW) -> None:
+        self._window = window
+        self._stats: dict[str, OperationStats] = {}
+        # Zeitleiste aller Messungen, nur während einer Profilierung gesetzt
+        self.trace: list[TraceSpan] | None = None
+
+    def stats(self, name: str) -> OperationStats:
+        """Kennzahlen einer Phase oder eines Aufrufs (werden bei Bedarf angelegt)."""
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = OperationStats(self._window)
+        return stats
+
+    def get(self, name: str) -> OperationStats | None:
+        """Kennzahlen, falls bereits gemessen."""
+        return self._stats.get(name)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[OperationStats]:
+        """Miss Dauer, empfangene Bytes und Fehlerklasse des umschlossenen Blocks."""
+        stats = self.stats(name)
+        token = _ACTIVE.set((*_ACTIVE.get(), stats))
+        error: str | None = None
+        started = time.perf_counter()
+        try:
+            yield stats
+        except BaseException as err:
+            error = type(err).__name__
+            raise
+        finally:
+            _ACTIVE.reset(token)
+            duration = time.perf_counter() - started
+            stats.record(duration, error)
+            if self.trace is not None:
+                task = asyncio.current_task()
+                self.trace.append(
+                    TraceSpan(
+                        name,
+                        "measure",
+                        started,
+                        duration,
+                        task.get_name() if task is not None else None,
+                        error,
+                    )
+                )
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Alle Kennzahlen, nach Namen sortiert."""
+        return {name: self._stats[name].as_dict() for name in sorted(self._stats)}
@@ -0,0 +1,106 @@
+"""Cache mit Ablaufzeit je Endpunkt für selten geänderte Portal-Metadaten."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from .const import METADATA_PERIOD_RETENTION
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    """Zwischengespeicherter Wert eines Endpunkts."""
+
+    value: Any
+    fetched_at: datetime
+
+
+class MetadataCache:
+    """Zwischenspeicher mit eigener Ablaufzeit (TTL) je Endpunkt.
+
+    Die Werte müssen JSON-fähig sein, damit der Cache mit dem Snapshot
+    gespeichert und nach einem Neustart weiterverwendet werden kann.
+    """
+
+    def __init__(self, ttls: Mapping[str, timedelta]) -> None:
+        self._ttls = ttls
+        self._entries: dict[str, CacheEntry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, endpoint: str, now: datetime | None = None) -> Any | None:
+        """Gültiger Wert eines Endpunkts (None, falls fehlend oder abgelaufen)."""
+        entry = self._entries.get(endpoint)
+        if entry is None or (now or datetime.now(UTC)) - entry.fetched_at >= self._ttls[endpoint]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.value
+
+    def is_fresh(self, endpoint: str, now: datetime | None = None) -> bool:
+        """True, solange der Endpunkt nicht abgelaufen ist (ohne Zählung)."""
+        entry = self._entries.get(endpoint)
+        return (
+            entry is not None
+            and (now or datetime.now(UTC)) - entry.fetched_at < self._ttls[endpoint]
+        )
+
+    def put(self, endpoint: str, value: Any, now: datetime | None = None) -> None:
+        """Speichere einen frisch geladenen Wert."""
+        self._entries[endpoint] = CacheEntry(value, now or datetime.now(UTC))
+
+    def invalidate(self, endpoint: str | None = None) -> None:
+        """Verwirf einen Endpunkt oder (ohne Angabe) den ganzen Cache."""
+        if endpoint is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(endpoint, None)
+
+    def as_dict(self) -> dict[str, Any]:
+        """JSON-fähige Darstellung."""
+        return {
+            endpoint: {"v": entry.value, "t": entry.fetched_at.isoformat()}
+            for endpoint, entry in self._entries.items()
+        }
+
+    def restore(self, raw: Mapping[str, Any]) -> None:
+        """Übernimm gespeicherte Einträge aus `as_dict` (unbekannte verwerfen)."""
+        for endpoint, item in raw.items():
+            try:
+                fetched_at = datetime.fromisoformat(item.get("t") or "")
+            except ValueError:
+                continue
+            if endpoint in self._ttls:
+                self._entries[endpoint] = CacheEntry(item.get("v"), fetched_at)
+
+
+def prune_periods(
+    dates: Mapping[str, Any], now: datetime | None = None
+) -> dict[str, Any]:
+    """Entferne lange abgeschlossene Perioden aus einer `DatesSet`-Antwort.
+
+    Die Periode mit dem spätesten Periodenende (die aktuelle) bleibt immer
+    erhalten, ebenso Perioden ohne Bisdatum.
+    """
+    from .compat import parse_sap_date  # brunata-api erst beim ersten Abruf laden
+
+    cutoff = (now or datetime.now(UTC)) - METADATA_PERIOD_RETENTION
+    periods = [
+        period
+        for period in (dates.get("d") or {}).get("results") or []
+        if isinstance(period, dict)
+    ]
+    ends = [
+        parse_sap_date(bis_raw) if isinstance(bis_raw := period.get("Bisdatum"), str) else None
+        for period in periods
+    ]
+    latest = max((bis for bis in ends if bis is not None), default=None)
+    kept = [
+        period
+        for period, bis in zip(periods, ends)
+        if bis is None or bis >= cutoff or bis == latest
+    ]
+    return {"d": {"results": kept}}
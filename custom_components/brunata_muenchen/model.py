@@ -0,0 +1,201 @@
+"""Kompaktes, typisiertes Snapshot-Modell der Brunata Daten."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from brunata_api.models import MeterReading, Reading
+
+    from .analytics import ConsumptionAnalytics
+    from .view import SensorView
+
+
+def to_epoch(timestamp: datetime) -> int:
+    """Wandle einen Zeitstempel in Sekunden seit Epoch (UTC) um."""
+    return int(timestamp.timestamp())
+
+
+def from_epoch(epoch: int) -> datetime:
+    """Wandle Sekunden seit Epoch in einen UTC-Zeitstempel um."""
+    return datetime.fromtimestamp(epoch, UTC)
+
+
+@dataclass(frozen=True, slots=True)
+class Series:
+    """Zeitreihe mit spaltenweiser Ablage (Epoch-Sekunden und Werte).
+
+    Die Zeitstempel sind aufsteigend sortiert. Die Arrays werden nach dem
+    Erstellen nicht mehr verändert.
+    """
+
+    timestamps: array = field(default_factory=lambda: array("q"))
+    values: array = field(default_factory=lambda: array("d"))
+    unit: str | None = None
+
+    @classmethod
+    def from_readings(cls, readings: Iterable[Reading]) -> Series:
+        """Erstelle eine sortierte Serie aus Readings der API."""
+        ordered = sorted(readings, key=lambda r: r.timestamp)
+        return cls(
+            timestamps=array("q", (to_epoch(r.timestamp) for r in ordered)),
+            values=array("d", (float(r.value) for r in ordered)),
+            unit=ordered[-1].unit if ordered else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __bool__(self) -> bool:
+        return len(self.timestamps) > 0
+
+    @property
+    def last_value(self) -> float | None:
+        """Letzter Wert der Serie."""
+        return self.values[-1] if self.values else None
+
+    @property
+    def last_epoch(self) -> int | None:
+        """Zeitstempel des letzten Werts in Epoch-Sekunden."""
+        return self.timestamps[-1] if self.timestamps else None
+
+    @property
+    def last_timestamp(self) -> datetime | None:
+        """Zeitstempel des letzten Werts."""
+        return from_epoch(self.timestamps[-1]) if self.timestamps else None
+
+    def timestamp_at(self, index: int) -> datetime:
+        """Zeitstempel eines Eintrags."""
+        return from_epoch(self.timestamps[index])
+
+    def tail(self, count: int) -> Series:
+        """Die letzten `count` Einträge."""
+        if count >= len(self):
+            return self
+        return Series(self.timestamps[-count:], self.values[-count:], self.unit)
+
+    def head(self, count: int) -> Series:
+        """Die ersten `count` Einträge."""
+        if count >= len(self):
+            return self
+        return Series(self.timestamps[:count], self.values[:count], self.unit)
+
+    def concat(self, other: Series) -> Series:
+        """Neue Serie aus dieser und einer zeitlich anschließenden Serie."""
+        return Series(
+            self.timestamps + other.timestamps,
+            self.values + other.values,
+            other.unit or self.unit,
+        )
+
+    def range(self, start: datetime | None = None, end: datetime | None = None) -> Series:
+        """Einträge mit `start <= timestamp < end` (binäre Suche)."""
+        lo = bisect_left(self.timestamps, to_epoch(start)) if start else 0
+        hi = bisect_left(self.timestamps, to_epoch(end)) if end else len(self)
+        return Series(self.timestamps[lo:hi], self.values[lo:hi], self.unit)
+
+    def points(self) -> Iterator[tuple[datetime, float]]:
+        """Iteriere über (Zeitstempel, Wert)-Paare."""
+        for epoch, value in zip(self.timestamps, self.values):
+            yield from_epoch(epoch), value
+
+    def as_dict(self) -> dict[str, Any]:
+        """JSON-fähige Darstellung."""
+        return {
+            "t": self.timestamps.tolist(),
+            "v": self.values.tolist(),
+            "u": self.unit,
+        }
+
+    @classmethod
+    def from_dict(cls, raw: Mapping[str, Any]) -> Series:
+        """Stelle eine Serie aus `as_dict` wieder her."""
+        return cls(array("q", raw["t"]), array("d", raw["v"]), raw.get("u"))
+
+
+@dataclass(frozen=True, slots=True)
+class MeterValue:
+    """Einzelner Zählerstand."""
+
+    epoch: int
+    value: float
+    unit: str | None
+
+    @classmethod
+    def from_reading(cls, reading: MeterReading | Reading) -> MeterValue:
+        """Übernimm einen Zählerstand bzw. den letzten Monatswert der API."""
+        return cls(to_epoch(reading.timestamp), float(reading.value), reading.unit)
+
+    @property
+    def timestamp(self) -> datetime:
+        """Zeitstempel des Zählerstands."""
+        return from_epoch(self.epoch)
+
+    def as_dict(self) -> dict[str, Any]:
+        """JSON-fähige Darstellung."""
+        return {"t": self.epoch, "v": self.value, "u": self.unit}
+
+    @classmethod
+    def from_dict(cls, raw: Mapping[str, Any]) -> MeterValue:
+        """Stelle einen Zählerstand aus `as_dict` wieder her."""
+        return cls(int(raw["t"]), float(raw["v"]), raw.get("u"))
+
+
+@dataclass(frozen=True, slots=True)
+class CostTypeData:
+    """Alle Daten einer Kostenart (z.B. HZ01, WW01, KW01)."""
+
+    cost_type: str
+    meter: MeterValue | None = None
+    monthly: Series | None = None
+    cumulative: Series | None = None
+    # Veröffentlichte Gesamtsumme (sinkt auch bei Korrekturen nie)
+    total: float | None = None
+    # Aus der Monatsserie abgeleitete Kennzahlen (gehen nicht in die Prüfsumme ein)
+    analytics: ConsumptionAnalytics | None = field(default=None, compare=False)
+    # Prüfsumme aller Eingangsdaten, um unveränderte Kostenarten zu erkennen
+    fingerprint: int = field(init=False, compare=False)
+
+    def __post_init__(self) -> None:
+        monthly = self.monthly
+        object.__setattr__(
+            self,
+            "fingerprint",
+            hash(
+                (
+                    self.cost_type,
+                    self.meter,
+                    monthly.timestamps.tobytes() if monthly else None,
+                    monthly.values.tobytes() if monthly else None,
+                    monthly.unit if monthly else None,
+                    self.total,
+                )
+            ),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class BrunataSnapshot:
+    """Ergebnis eines Koordinator-Updates."""
+
+    cost_types: Mapping[str, CostTypeData] = field(default_factory=dict)
+    sensor_views: Mapping[tuple[str, str], SensorView] = field(default_factory=dict)
+
+    def get(self, cost_type: str) -> CostTypeData | None:
+        """Daten einer Kostenart."""
+        return self.cost_types.get(cost_type)
+
+    def monthly(self, cost_type: str) -> Series | None:
+        """Monatsserie einer Kostenart."""
+        data = self.cost_types.get(cost_type)
+        return data.monthly if data else None
+
+    def cumulative(self, cost_type: str) -> Series | None:
+        """Kumulative Serie einer Kostenart."""
+        data = self.cost_types.get(cost_type)
+        return data.cumulative if data else None
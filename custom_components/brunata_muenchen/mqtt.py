@@ -0,0 +1,433 @@
+"""Veröffentlichung der Zählerwerte per MQTT (retained, mit Discovery)."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import struct
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, NamedTuple, Protocol
+
+from .const import (
+    METER_MAPPING,
+    MQTT_DISCOVERY_PREFIX,
+    MQTT_MAX_IN_FLIGHT,
+    SENSOR_TYPE_CUMULATIVE,
+    SENSOR_TYPE_METER,
+    SENSOR_TYPE_MONTHLY,
+)
+from .model import BrunataSnapshot
+
+if TYPE_CHECKING:
+    # Nur HassMqttSink braucht Home Assistant; der Dienst nutzt MqttConnection
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sensor-Typ -> Name des Unter-Topics
+TOPICS = {
+    SENSOR_TYPE_METER: "reading",
+    SENSOR_TYPE_MONTHLY: "monthly",
+    SENSOR_TYPE_CUMULATIVE: "cumulative",
+}
+
+_DISCOVERY_NAMES = {
+    SENSOR_TYPE_METER: "Zählerstand",
+    SENSOR_TYPE_MONTHLY: "Monatsverbrauch",
+    SENSOR_TYPE_CUMULATIVE: "Verbrauch Kumulativ",
+}
+
+
+class MqttMessage(NamedTuple):
+    """Eine zu veröffentlichende Nachricht."""
+
+    topic: str
+    payload: str
+    retain: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class MeterState:
+    """Wert eines Zählers für ein Topic (reading, monthly oder cumulative)."""
+
+    cost_type: str
+    sensor_type: str
+    value: float | None
+    unit: str | None
+    timestamp: str | None
+    last_reset: str | None = None
+
+
+class MqttSink(Protocol):
+    """Ziel, das viele Nachrichten über eine Verbindung veröffentlicht."""
+
+    async def async_publish_many(self, messages: Sequence[MqttMessage]) -> None:
+        """Veröffentliche alle Nachrichten (Reihenfolge je Topic bleibt erhalten)."""
+
+
+def states_from_snapshot(snapshot: BrunataSnapshot) -> list[MeterState]:
+    """Zählerwerte aus den vorberechneten Sensor-Sichten eines Snapshots."""
+    return [
+        MeterState(
+            cost_type=cost_type,
+            sensor_type=sensor_type,
+            value=view.value,
+            unit=view.unit,
+            timestamp=view.last_reading,
+            last_reset=view.last_reset.isoformat() if view.last_reset else None,
+        )
+        for (sensor_type, cost_type), view in snapshot.sensor_views.items()
+        if sensor_type in TOPICS
+    ]
+
+
+class MqttBridge:
+    """Erzeugt die Nachrichten eines Abrufs und veröffentlicht nur Änderungen.
+
+    Zustände und Discovery-Konfigurationen werden retained gesendet. Ein
+    Wert, der dem zuletzt gesendeten Wert seines Topics entspricht, wird
+    übersprungen; alle übrigen gehen gesammelt an die Senke.
+    """
+
+    def __init__(
+        self,
+        sink: MqttSink,
+        prefix: str,
+        node_id: str,
+        *,
+        discovery: bool = False,
+        discovery_prefix: str = MQTT_DISCOVERY_PREFIX,
+    ) -> None:
+        self._sink = sink
+        self._prefix = prefix.rstrip("/")
+        self._node_id = node_id
+        self._discovery = discovery
+        self._discovery_prefix = discovery_prefix.rstrip("/")
+        # Zuletzt gesendeter Zustand je (Sensor-Typ, Kostenart)
+        self._retained: dict[tuple[str, str], MeterState] = {}
+        self._lock = asyncio.Lock()
+        self.published = 0
+        self.skipped = 0
+
+    def state_topic(self, cost_type: str, sensor_type: str) -> str:
+        """Topic eines Zählerwerts."""
+        return f"{self._prefix}/{self._node_id}/{cost_type.lower()}/{TOPICS[sensor_type]}"
+
+    def _discovery_message(self, state: MeterState) -> MqttMessage:
+        """Discovery-Konfiguration für Home Assistant."""
+        object_id = f"{self._node_id}_{TOPICS[state.sensor_type]}_{state.cost_type.lower()}"
+        mapping = METER_MAPPING.get(state.cost_type[:2], {})
+        config: dict[str, Any] = {
+            "name": f"{state.cost_type} {_DISCOVERY_NAMES[state.sensor_type]}",
+            "unique_id": f"brunata_{object_id}",
+            "object_id": f"brunata_{object_id}",
+            "state_topic": self.state_topic(state.cost_type, state.sensor_type),
+            "value_template": "{{ value_json.value }}",
+            "json_attributes_topic": self.state_topic(state.cost_type, state.sensor_type),
+            "unit_of_measurement": state.unit,
+            "device": {
+                "identifiers": [f"brunata_{self._node_id}"],
+                "name": "Brunata München Nutzeinheit",
+                "manufacturer": "Brunata Metrona",
+                "model": "Digitales Nutzerportal",
+            },
+        }
+        if state.sensor_type == SENSOR_TYPE_METER:
+            if device_class := mapping.get("device_class"):
+                config["device_class"] = str(device_class)
+            config["state_class"] = "total_increasing"
+        elif state.sensor_type == SENSOR_TYPE_MONTHLY:
+            config["device_class"] = "energy"
+            config["state_class"] = "total"
+            config["last_reset_value_template"] = "{{ value_json.last_reset }}"
+        else:
+            config["device_class"] = "energy"
+            config["state_class"] = "total_increasing"
+        return MqttMessage(
+            f"{self._discovery_prefix}/sensor/brunata_{object_id}/config",
+            json.dumps(config, ensure_ascii=False, separators=(",", ":")),
+        )
+
+    def _state_message(self, state: MeterState) -> MqttMessage:
+        """Zustand eines Zählerwerts als JSON."""
+        return MqttMessage(
+            self.state_topic(state.cost_type, state.sensor_type),
+            json.dumps(
+                {
+                    "value": state.value,
+                    "unit": state.unit,
+                    "timestamp": state.timestamp,
+                    "last_reset": state.last_reset,
+                },
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ),
+        )
+
+    def messages(
+        self, states: Iterable[MeterState]
+    ) -> tuple[list[MqttMessage], dict[tuple[str, str], MeterState]]:
+        """Nachrichten aller Werte, die sich seit dem letzten Senden geändert haben.
+
+        Gleiche Zustände ergeben denselben Payload; verglichen wird daher der
+        Zustand selbst, serialisiert werden nur Änderungen.
+        """
+        messages: list[MqttMessage] = []
+        changed: dict[tuple[str, str], MeterState] = {}
+        for state in states:
+            key = (state.sensor_type, state.cost_type)
+            previous = self._retained.get(key)
+            if previous == state:
+                self.skipped += 1
+                continue
+            # Konfiguration vor dem ersten Zustand senden (und bei neuer Einheit)
+            if self._discovery and (previous is None or previous.unit != state.unit):
+                messages.append(self._discovery_message(state))
+            messages.append(self._state_message(state))
+            changed[key] = state
+        return messages, changed
+
+    async def async_publish(self, states: Iterable[MeterState]) -> int:
+        """Veröffentliche die geänderten Werte eines Abrufs gesammelt."""
+        async with self._lock:
+            messages, changed = self.messages(states)
+            if not messages:
+                return 0
+            await self._sink.async_publish_many(messages)
+            # Erst nach erfolgreichem Senden als veröffentlicht merken
+            self._retained.update(changed)
+            self.published += len(messages)
+            _LOGGER.debug("Brunata MQTT: %d Nachrichten veröffentlicht", len(messages))
+            return len(messages)
+
+
+class HassMqttSink:
+    """Senke über die MQTT-Verbindung von Home Assistant."""
+
+    def __init__(self, hass: HomeAssistant, qos: int = 1) -> None:
+        self.hass = hass
+        self._qos = qos
+
+    async def async_publish_many(self, messages: Sequence[MqttMessage]) -> None:
+        """Gib alle Nachrichten an den Client, bevor auf Bestätigungen gewartet wird."""
+        from homeassistant.components import mqtt  # nur bei aktivierter Option
+
+        if not await mqtt.async_wait_for_mqtt_client(self.hass):
+            raise ConnectionError("MQTT ist nicht verfügbar")
+        for start in range(0, len(messages), MQTT_MAX_IN_FLIGHT):
+            await asyncio.gather(
+                *(
+                    mqtt.async_publish(
+                        self.hass, message.topic, message.payload, self._qos, message.retain
+                    )
+                    for message in messages[start : start + MQTT_MAX_IN_FLIGHT]
+                )
+            )
+
+
+# Größte mit vier Bytes kodierbare Restlänge (MQTT 3.1.1, Abschnitt 2.2.3)
+_MAX_REMAINING_LENGTH = 268_435_455
+
+
+def _encode_length(length: int) -> bytes:
+    """Restlänge eines MQTT-Pakets (variable Länge)."""
+    if not 0 <= length <= _MAX_REMAINING_LENGTH:
+        raise ValueError(f"MQTT Paket zu groß ({length} Bytes)")
+    encoded = bytearray()
+    while True:
+        length, digit = divmod(length, 128)
+        encoded.append(digit | (0x80 if length else 0))
+        if not length:
+            return bytes(encoded)
+
+
+def _encode_string(value: str | bytes) -> bytes:
+    """UTF-8-Zeichenkette mit Längenpräfix."""
+    raw = value.encode() if isinstance(value, str) else value
+    return struct.pack("!H", len(raw)) + raw
+
+
+async def _async_read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """Lies ein Paket: erstes Byte des festen Headers und die Restdaten."""
+    first = (await reader.readexactly(1))[0]
+    length = 0
+    for shift in range(0, 28, 7):
+        digit = (await reader.readexactly(1))[0]
+        length |= (digit & 0x7F) << shift
+        if not digit & 0x80:
+            break
+    else:
+        raise ConnectionError("MQTT Restlänge länger als vier Bytes")
+    return first, await reader.readexactly(length) if length else b""
+
+
+class MqttConnection:
+    """Schlanker MQTT-3.1.1-Publisher für den eigenständigen Dienst.
+
+    Alle Nachrichten einer Sammlung werden über eine Verbindung
+    geschrieben, ohne nach jeder auf das PUBACK zu warten; höchstens
+    `MQTT_MAX_IN_FLIGHT` Nachrichten sind unbestätigt unterwegs.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 1883,
+        *,
+        client_id: str = "brunata-muenchen",
+        username: str | None = None,
+        password: str | None = None,
+        qos: int = 1,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._client_id = client_id
+        self._username = username
+        self._password = password
+        self._qos = qos
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        # Mehrere Aufrufer teilen sich die Verbindung; je Sammlung exklusiv
+        self._lock = asyncio.Lock()
+        self._next_id = 0
+        self.connects = 0
+
+    async def _async_connect(self) -> None:
+        """Baue die Verbindung auf (CONNECT/CONNACK)."""
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        flags = 0x02  # clean session
+        payload = _encode_string(self._client_id)
+        if self._username is not None:
+            flags |= 0x80
+            payload += _encode_string(self._username)
+            if self._password is not None:
+                flags |= 0x40
+                payload += _encode_string(self._password)
+        # Keep-Alive 0: die Verbindung bleibt zwischen Abrufen ohne PINGREQ offen
+        variable = _encode_string("MQTT") + bytes((4, flags)) + struct.pack("!H", 0)
+        body = variable + payload
+        writer.write(bytes((0x10,)) + _encode_length(len(body)) + body)
+        await writer.drain()
+        try:
+            first, ack = await _async_read_packet(reader)
+        except BaseException:
+            writer.close()
+            raise
+        if first != 0x20 or len(ack) != 2 or ack[1] != 0:
+            writer.close()
+            code = ack[1] if first == 0x20 and len(ack) == 2 else None
+            raise ConnectionError(f"MQTT Verbindung abgelehnt (Code {code})")
+        self._reader, self._writer = reader, writer
+        self.connects += 1
+
+    def _packet_id(self) -> int:
+        """Nächste Paket-ID (1 bis 65535)."""
+        self._next_id = self._next_id % 0xFFFF + 1
+        return self._next_id
+
+    def _publish_packet(self, message: MqttMessage, packet_id: int | None) -> bytes:
+        """PUBLISH-Paket einer Nachricht."""
+        body = _encode_string(message.topic)
+        if packet_id is not None:
+            body += struct.pack("!H", packet_id)
+        body += message.payload.encode()
+        header = 0x30 | (self._qos << 1) | (0x01 if message.retain else 0)
+        return bytes((header,)) + _encode_length(len(body)) + body
+
+    async def _async_read_acks(self, expected: set[int]) -> None:
+        """Warte auf die PUBACKs aller gesendeten Pakete."""
+        assert self._reader is not None
+        while expected:
+            first, body = await _async_read_packet(self._reader)
+            # Andere Pakete (z.B. PUBLISH abonnierter Topics) überspringen
+            if first == 0x40 and len(body) == 2:
+                expected.discard(struct.unpack("!H", body)[0])
+
+    async def async_publish_many(self, messages: Sequence[MqttMessage]) -> None:
+        """Veröffentliche alle Nachrichten über eine (ggf. neue) Verbindung."""
+        async with self._lock:
+            try:
+                await self._async_publish_many(messages)
+            except (OSError, asyncio.IncompleteReadError):
+                # Verbindung verloren: einmal neu aufbauen und alles erneut senden
+                await self._async_disconnect()
+                await self._async_publish_many(messages)
+
+    async def _async_publish_many(self, messages: Sequence[MqttMessage]) -> None:
+        """Schreibe die Nachrichten in Fenstern und warte je Fenster auf PUBACKs."""
+        if self._writer is None:
+            await self._async_connect()
+        assert self._writer is not None
+        for start in range(0, len(messages), MQTT_MAX_IN_FLIGHT):
+            window = messages[start : start + MQTT_MAX_IN_FLIGHT]
+            if self._qos:
+                ids = [self._packet_id() for _ in window]
+                self._writer.write(
+                    b"".join(map(self._publish_packet, window, ids))
+                )
+                await self._writer.drain()
+                await self._async_read_acks(set(ids))
+            else:
+                self._writer.write(
+                    b"".join(self._publish_packet(message, None) for message in window)
+                )
+                await self._writer.drain()
+
+    async def async_close(self) -> None:
+        """Trenne die Verbindung (DISCONNECT)."""
+        async with self._lock:
+            await self._async_disconnect()
+
+    async def _async_disconnect(self) -> None:
+        """Sende DISCONNECT und schließe den Socket."""
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is None:
+            return
+        try:
+            writer.write(b"\xe0\x00")
+            await writer.drain()
+        except OSError:
+            pass
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+def parse_broker(value: str) -> tuple[str, int]:
+    """Zerlege `host[:port]`."""
+    host, _, port = value.rpartition(":") if ":" in value else (value, "", "")
+    return host, int(port) if port else 1883
+
+
+def states_from_records(records: Iterable[Mapping[str, Any]]) -> list[MeterState]:
+    """Letzte Werte je Kostenart aus normalisierten Datensätzen des Dienstes."""
+    latest: dict[tuple[str, str], MeterState] = {}
+    for record in records:
+        cost_type = record["cost_type"]
+        if record["kind"] == "meter":
+            latest[(SENSOR_TYPE_METER, cost_type)] = MeterState(
+                cost_type, SENSOR_TYPE_METER, record["value"], record["unit"], record["timestamp"]
+            )
+            continue
+        # Monatswerte sind aufsteigend sortiert: der letzte gewinnt
+        month_start = record["timestamp"][:8] + "01T00:00:00+00:00"
+        latest[(SENSOR_TYPE_MONTHLY, cost_type)] = MeterState(
+            cost_type,
+            SENSOR_TYPE_MONTHLY,
+            record["value"],
+            record["unit"],
+            record["timestamp"],
+            month_start,
+        )
+        latest[(SENSOR_TYPE_CUMULATIVE, cost_type)] = MeterState(
+            cost_type,
+            SENSOR_TYPE_CUMULATIVE,
+            record["cumulative"],
+            record["unit"],
+            record["timestamp"],
+        )
+    return list(latest.values())
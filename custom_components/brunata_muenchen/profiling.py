@@ -0,0 +1,201 @@
+"""Profilierung eines einzelnen Abrufs auf Anfrage (CPU-Profil und Await-Zeitleiste).
+
+Das Modul wird erst beim Aufruf des Services geladen. Außerhalb eines Laufs
+ist weder der Profiler noch die Task-Factory aktiv.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import json
+import logging
+import pstats
+import sys
+import time
+from collections.abc import Awaitable, Callable, Coroutine
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import PROFILE_TIMELINE_LIMIT, PROFILE_TOP
+from .instrumentation import Instrumentation, TraceSpan
+
+_LOGGER = logging.getLogger(__name__)
+
+# Es kann nur ein Profiler je Thread aktiv sein (auch über mehrere Einträge)
+_LOCK = asyncio.Lock()
+
+
+class _TaskRecorder:
+    """Task-Factory, die Beginn und Ende jeder neu erstellten Task festhält."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._previous = loop.get_task_factory()
+        self._open: dict[asyncio.Task[Any], tuple[str, float]] = {}
+        self.spans: list[TraceSpan] = []
+
+    def __call__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        coro: Coroutine[Any, Any, Any],
+        **kwargs: Any,
+    ) -> asyncio.Future[Any]:
+        if self._previous is not None:
+            task = self._previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        self._open[task] = (
+            getattr(coro, "__qualname__", type(coro).__name__),
+            time.perf_counter(),
+        )
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task: asyncio.Task[Any]) -> None:
+        if (item := self._open.pop(task, None)) is None:
+            return
+        coro, started = item
+        error = None
+        if task.cancelled():
+            error = "CancelledError"
+        elif (exc := task.exception()) is not None:
+            error = type(exc).__name__
+        self.spans.append(
+            TraceSpan(coro, "task", started, time.perf_counter() - started, task.get_name(), error)
+        )
+
+    def start(self) -> None:
+        self._loop.set_task_factory(self)
+
+    def stop(self) -> None:
+        """Alte Task-Factory wiederherstellen; laufende Tasks als offen vermerken."""
+        self._loop.set_task_factory(self._previous)
+        now = time.perf_counter()
+        for task, (coro, started) in self._open.items():
+            task.remove_done_callback(self._done)
+            self.spans.append(
+                TraceSpan(coro, "task", started, now - started, task.get_name(), "pending")
+            )
+        self._open.clear()
+
+
+def _function_name(key: tuple[str, int, str]) -> str:
+    """Kurzer Name einer Funktion aus pstats (letzte zwei Pfadteile)."""
+    filename, line, name = key
+    if filename == "~":
+        return name  # eingebaute Funktion
+    return f"{'/'.join(Path(filename).parts[-2:])}:{line}({name})"
+
+
+def _is_idle(key: tuple[str, int, str]) -> bool:
+    """Warten des Selectors auf I/O (epoll/kqueue/select) ist keine Rechenzeit."""
+    return key[0] == "~" and "of 'select." in key[2]
+
+
+def _top_functions(stats: pstats.Stats, index: int, top: int) -> list[dict[str, Any]]:
+    """Die `top` Funktionen nach Eigenzeit (index 2) oder Gesamtzeit (index 3)."""
+    # {(datei, zeile, name): (cc, nc, tt, ct, aufrufer)}
+    entries = [item for item in stats.stats.items() if not _is_idle(item[0])]
+    rows = sorted(entries, key=lambda item: item[1][index], reverse=True)
+    return [
+        {
+            "function": _function_name(key),
+            "calls": calls,
+            "own_s": round(own, 4),
+            "cumulative_s": round(cumulative, 4),
+        }
+        for key, (_, calls, own, cumulative, _) in rows[:top]
+    ]
+
+
+def _span_dict(span: TraceSpan, origin: float) -> dict[str, Any]:
+    """Spanne relativ zum Beginn des Laufs."""
+    return {
+        "name": span.name,
+        "kind": span.kind,
+        "start_s": round(span.start - origin, 4),
+        "duration_s": round(span.duration, 4),
+        "task": span.task,
+        "error": span.error,
+    }
+
+
+def _write_files(
+    profiler: cProfile.Profile, summary: dict[str, Any], timeline: list[dict[str, Any]]
+) -> None:
+    """Profil (pstats-Format) und Zusammenfassung samt Zeitleiste schreiben."""
+    profiler.dump_stats(summary["profile_file"])
+    Path(summary["summary_file"]).write_text(
+        json.dumps({**summary, "timeline": timeline}, indent=2), encoding="utf-8"
+    )
+
+
+async def async_profile(
+    hass: HomeAssistant,
+    instrumentation: Instrumentation,
+    refresh: Callable[[], Awaitable[Any]],
+    base: str,
+    top: int = PROFILE_TOP,
+) -> dict[str, Any]:
+    """Führe `refresh` unter cProfile aus und zeichne Tasks und Awaits auf.
+
+    cProfile erfasst alles, was in dieser Zeit im Thread der Ereignisschleife
+    läuft, also auch andere Integrationen; Executor-Jobs erscheinen nur als
+    Wartezeit. Gespeichert werden `<base>.cprof` und `<base>.json`, zurück
+    kommt die Zusammenfassung ohne Zeitleiste.
+    """
+    if _LOCK.locked():
+        raise HomeAssistantError("Brunata Profilierung läuft bereits")
+    async with _LOCK:
+        if sys.getprofile() is not None:
+            raise HomeAssistantError("Ein anderer Profiler ist bereits aktiv")
+
+        loop = asyncio.get_running_loop()
+        recorder = _TaskRecorder(loop)
+        profiler = cProfile.Profile()
+        instrumentation.trace = []
+        recorder.start()
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        profiler.enable()
+        try:
+            await refresh()
+        finally:
+            profiler.disable()
+            cpu = time.thread_time() - cpu_started
+            wall = time.perf_counter() - started
+            recorder.stop()
+            spans, instrumentation.trace = instrumentation.trace, None
+
+        stats = pstats.Stats(profiler)
+        spans = sorted([*spans, *recorder.spans], key=lambda span: span.start)
+        summary = {
+            "wall_s": round(wall, 4),
+            # CPU-Zeit im Thread der Ereignisschleife; der Rest ist Warten
+            # (Netzwerk, Rate-Limit, Executor)
+            "cpu_s": round(cpu, 4),
+            "waiting_s": round(max(wall - cpu, 0.0), 4),
+            "function_calls": stats.total_calls,
+            "tasks": len(recorder.spans),
+            "hot_spots": _top_functions(stats, 2, top),
+            "cumulative": _top_functions(stats, 3, top),
+            "slowest_awaits": [
+                _span_dict(span, started)
+                for span in sorted(spans, key=lambda span: span.duration, reverse=True)[:top]
+            ],
+            "profile_file": f"{base}.cprof",
+            "summary_file": f"{base}.json",
+        }
+        timeline = [_span_dict(span, started) for span in spans[:PROFILE_TIMELINE_LIMIT]]
+        await hass.async_add_executor_job(_write_files, profiler, summary, timeline)
+        _LOGGER.info(
+            "Brunata Profil gespeichert: %s (%.3f s, davon %.3f s CPU)",
+            summary["profile_file"],
+            wall,
+            cpu,
+        )
+        return summary
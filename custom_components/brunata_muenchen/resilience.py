@@ -0,0 +1,206 @@
+"""Zeitlimits, Wiederholungen und Circuit Breaker je Portal-Endpunkt."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any, TypeVar
+
+import httpx
+
+from .const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    ENDPOINT_POLICIES,
+    ENDPOINT_RETRY_BACKOFF,
+)
+from .instrumentation import Instrumentation, OperationStats
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Nur Fehler, die bei erneutem Versuch verschwinden können, werden wiederholt
+# (Sitzungsfehler wiederholt bereits BrunataSession mit neuem Login)
+_RETRYABLE = (TimeoutError, httpx.TransportError)
+
+
+class CircuitOpenError(Exception):
+    """Der Endpunkt ist nach wiederholten Fehlern vorübergehend gesperrt."""
+
+
+@dataclass(frozen=True, slots=True)
+class EndpointPolicy:
+    """Zeitlimit je Versuch, Frist inkl. Wiederholungen und Anzahl Versuche."""
+
+    timeout: float
+    deadline: float
+    attempts: int
+
+
+def endpoint_key(endpoint: str, item: str) -> str:
+    """Eigener Circuit Breaker für ein Element eines Endpunkts (z.B. je KW-Zähler).
+
+    Zeitlimits und Messwerte gelten weiter für den ganzen Endpunkt.
+    """
+    return f"{endpoint}:{item}"
+
+
+class CircuitBreaker:
+    """Sperrt einen Endpunkt nach `threshold` Fehlschlägen in Folge.
+
+    Nach `reset_timeout` ist genau ein Probeabruf erlaubt (halb offen);
+    weitere Aufrufe werden abgewiesen, bis die Probe abgeschlossen ist.
+    Gelingt sie, ist der Endpunkt wieder frei, sonst bleibt er gesperrt.
+    """
+
+    def __init__(
+        self,
+        threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: timedelta = CIRCUIT_RESET_TIMEOUT,
+    ) -> None:
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: datetime | None = None
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def is_open(self) -> bool:
+        """True, solange der Endpunkt gesperrt ist."""
+        return self.opened_at is not None
+
+    def allow(self, now: datetime) -> bool:
+        """True, wenn ein Abruf erlaubt ist (geschlossen oder als einzige Probe)."""
+        if self.opened_at is None:
+            return True
+        if self.probing or now - self.opened_at < self._reset_timeout:
+            return False
+        self.probing = True
+        return True
+
+    def release(self) -> None:
+        """Gib die Probe frei, ohne ein Ergebnis zu merken (z.B. abgebrochen)."""
+        self.probing = False
+
+    def record_success(self) -> None:
+        """Merke einen erfolgreichen Abruf."""
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self, now: datetime) -> None:
+        """Merke einen Fehlschlag, ggf. Endpunkt (erneut) sperren."""
+        self.failures += 1
+        self.probing = False
+        if self.opened_at is not None or self.failures >= self._threshold:
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = now
+
+
+class EndpointGuard:
+    """Führt Portal-Aufrufe mit den Regeln ihres Endpunkts aus."""
+
+    def __init__(
+        self,
+        policies: Mapping[str, tuple[float, float, int]] = ENDPOINT_POLICIES,
+        instrumentation: Instrumentation | None = None,
+    ) -> None:
+        # Misst Dauer, Bytes, Wiederholungen und Fehler je Endpunkt (optional)
+        self.instrumentation = instrumentation or Instrumentation()
+        self._policies = {
+            endpoint: EndpointPolicy(*policy) for endpoint, policy in policies.items()
+        }
+        # Je Endpunkt bzw. je `endpoint_key`, bei Bedarf angelegt
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.timeouts = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def _policy(self, endpoint: str) -> EndpointPolicy:
+        """Regeln eines Endpunkts (auch für `endpoint_key`)."""
+        return self._policies[endpoint.partition(":")[0]]
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """Circuit Breaker eines Endpunkts bzw. `endpoint_key`."""
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            self._policy(endpoint)  # unbekannte Endpunkte nicht anlegen
+            breaker = self._breakers[endpoint] = CircuitBreaker()
+        return breaker
+
+    @property
+    def open_endpoints(self) -> list[str]:
+        """Derzeit gesperrte Endpunkte."""
+        return [endpoint for endpoint, breaker in self._breakers.items() if breaker.is_open]
+
+    async def async_call(
+        self,
+        endpoint: str,
+        method: Callable[..., Awaitable[_T]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> _T:
+        """Rufe `method` mit Zeitlimit, Wiederholung und Circuit Breaker auf.
+
+        `endpoint` darf ein `endpoint_key` sein; gemessen wird dann unter
+        dem Endpunkt selbst.
+        """
+        breaker = self.breaker(endpoint)
+        if not breaker.allow(datetime.now(UTC)):
+            self.rejected += 1
+            raise CircuitOpenError(f"Endpunkt {endpoint} vorübergehend gesperrt")
+
+        policy = self._policy(endpoint)
+        try:
+            with self.instrumentation.measure(endpoint.partition(":")[0]) as stats:
+                async with asyncio.timeout(policy.deadline):
+                    result = await self._async_attempts(
+                        endpoint, policy, stats, method, args, kwargs
+                    )
+        except Exception as err:
+            if isinstance(err, TimeoutError):
+                self.timeouts += 1
+            breaker.record_failure(datetime.now(UTC))
+            if breaker.is_open:
+                _LOGGER.debug("Brunata Endpunkt %s gesperrt: %s", endpoint, err)
+            raise
+        except BaseException:
+            # Abgebrochen (z.B. Entladen): kein Ergebnis, Probe freigeben
+            breaker.release()
+            raise
+        breaker.record_success()
+        return result
+
+    async def _async_attempts(
+        self,
+        endpoint: str,
+        policy: EndpointPolicy,
+        stats: OperationStats,
+        method: Callable[..., Awaitable[_T]],
+        args: tuple[Any, ...],
+        kwargs: Mapping[str, Any],
+    ) -> _T:
+        """Versuche den Aufruf bis zu `attempts` Mal mit wachsendem Abstand.
+
+        Fehler der ersten Versuche werden protokolliert, der des letzten
+        Versuchs geht an den Aufrufer.
+        """
+        for attempt in range(1, policy.attempts):
+            try:
+                async with asyncio.timeout(policy.timeout):
+                    return await method(*args, **kwargs)
+            except _RETRYABLE as err:
+                if isinstance(err, TimeoutError):
+                    self.timeouts += 1
+                _LOGGER.debug("Brunata %s Versuch %d fehlgeschlagen: %r", endpoint, attempt, err)
+            self.retries += 1
+            stats.retries += 1
+            await asyncio.sleep(ENDPOINT_RETRY_BACKOFF * 2 ** (attempt - 1))
+        async with asyncio.timeout(policy.timeout):
+            return await method(*args, **kwargs)
@@ -0,0 +1,191 @@
+"""Adaptive Abrufplanung anhand der gelernten Veröffentlichungszeiten."""
+
+from __future__ import annotations
+
+import random
+from collections import deque
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DEFAULT_SCAN_INTERVAL,
+    POLL_ACTIVE_INTERVAL,
+    POLL_BACKOFF_BASE,
+    POLL_BACKOFF_MAX,
+    POLL_JITTER,
+    POLL_MAX_OBSERVATIONS,
+    POLL_MIN_INTERVAL,
+    POLL_MIN_OBSERVATIONS,
+    POLL_QUIET_INTERVAL,
+    POLL_WINDOW_AFTER,
+    POLL_WINDOW_BEFORE,
+)
+from .model import BrunataSnapshot, from_epoch, to_epoch
+
+
+def _month_start(moment: datetime) -> datetime:
+    """Beginn des Monats (UTC) eines Zeitpunkts."""
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    """Monatsanfang `months` Monate nach `moment` (Monatsanfang)."""
+    month = moment.month - 1 + months
+    return moment.replace(year=moment.year + month // 12, month=month % 12 + 1)
+
+
+def new_reading_epochs(
+    previous: BrunataSnapshot | None, current: BrunataSnapshot
+) -> list[int]:
+    """Zeitstempel der Werte, die seit dem letzten Snapshot neu hinzugekommen sind.
+
+    Zählerstände von Kostenarten mit Monatsreihe tragen das Ende der
+    Abrechnungsperiode (oft in der Zukunft) und zählen deshalb nicht; für
+    KW-Zähler ist der Zählerstand der letzte Monatswert.
+    """
+    if previous is None:
+        return []
+
+    epochs: list[int] = []
+    for cost_type, data in current.cost_types.items():
+        before = previous.get(cost_type)
+        meter, meter_before = data.meter, before.meter if before else None
+        if (
+            meter is not None
+            and not data.monthly
+            and (meter_before is None or meter.epoch > meter_before.epoch)
+        ):
+            epochs.append(meter.epoch)
+        last = data.monthly.last_epoch if data.monthly else None
+        last_before = before.monthly.last_epoch if before and before.monthly else None
+        if last is not None and (last_before is None or last > last_before):
+            epochs.append(last)
+    return epochs
+
+
+class PollScheduler:
+    """Bestimmt den Abstand bis zum nächsten Abruf.
+
+    Neue Werte werden auf ihren frühestmöglichen Veröffentlichungszeitpunkt
+    zurückgerechnet (Ablesezeitpunkt, frühestens aber der letzte Abruf ohne
+    neue Werte, spätestens dieser Abruf) und als Versatz zum Monatsanfang
+    gemerkt. Um diese Zeiten wird häufig abgefragt, dazwischen selten. Ein fest eingestelltes
+    Intervall ersetzt die Planung. Fehlschläge verlängern den Abstand
+    exponentiell; alle Abstände erhalten Jitter.
+    """
+
+    def __init__(self, fixed_interval: timedelta | None = None) -> None:
+        self.fixed_interval = fixed_interval
+        self.failures = 0
+        self.next_poll: datetime | None = None
+        self._offsets: deque[int] = deque(maxlen=POLL_MAX_OBSERVATIONS)
+        self._last_poll: datetime | None = None
+        self._last_new_data: datetime | None = None
+        self._random = random.Random()
+
+    @property
+    def observations(self) -> int:
+        """Anzahl gelernter Veröffentlichungszeitpunkte."""
+        return len(self._offsets)
+
+    def record_success(self, now: datetime, new_epochs: Iterable[int]) -> None:
+        """Merke einen erfolgreichen Abruf und ggf. den Zeitpunkt neuer Werte."""
+        new_epochs = list(new_epochs)
+        if new_epochs and self._last_poll is not None:
+            # Veröffentlicht zwischen letztem Abruf und jetzt
+            published = from_epoch(
+                min(max(max(new_epochs), to_epoch(self._last_poll)), to_epoch(now))
+            )
+            self._offsets.append(
+                int((published - _month_start(published)).total_seconds())
+            )
+        if new_epochs:
+            self._last_new_data = now
+        self._last_poll = now
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Merke einen fehlgeschlagenen Abruf."""
+        self.failures += 1
+
+    def _windows(self, now: datetime) -> list[tuple[datetime, datetime]]:
+        """Erwartete Veröffentlichungsfenster um den aktuellen Monat (zusammengeführt)."""
+        windows: list[tuple[datetime, datetime]] = []
+        this_month = _month_start(now)
+        for months in (-1, 0, 1):
+            start = _add_months(this_month, months)
+            length = _add_months(start, 1) - start
+            for offset in self._offsets:
+                expected = start + min(timedelta(seconds=offset), length)
+                windows.append(
+                    (expected - POLL_WINDOW_BEFORE, expected + POLL_WINDOW_AFTER)
+                )
+
+        merged: list[tuple[datetime, datetime]] = []
+        for start, end in sorted(windows):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _adaptive_delay(self, now: datetime) -> timedelta:
+        """Abstand im adaptiven Betrieb."""
+        if len(self._offsets) < POLL_MIN_OBSERVATIONS:
+            return DEFAULT_SCAN_INTERVAL
+        delay = POLL_QUIET_INTERVAL
+        for start, end in self._windows(now):
+            if end <= now:
+                continue
+            if start <= now:
+                # Im Fenster: häufig abfragen, bis neue Werte gefunden wurden
+                if self._last_new_data is None or self._last_new_data < start:
+                    return POLL_ACTIVE_INTERVAL
+                continue
+            # Nächstes Fenster nicht verpassen
+            return min(delay, start - now)
+        return delay
+
+    def _jitter(self, delay: timedelta) -> timedelta:
+        """Verteile die Abrufe mehrerer Konten zufällig um den Zielzeitpunkt."""
+        factor = 1 + self._random.uniform(-POLL_JITTER, POLL_JITTER)
+        return max(delay * factor, POLL_MIN_INTERVAL)
+
+    def next_interval(self, now: datetime | None = None) -> timedelta:
+        """Abstand bis zum nächsten Abruf."""
+        now = now or dt_util.utcnow()
+        if self.failures:
+            delay = min(
+                POLL_BACKOFF_BASE * 2 ** (self.failures - 1),
+                self.fixed_interval or POLL_BACKOFF_MAX,
+                POLL_BACKOFF_MAX,
+            )
+        elif self.fixed_interval is not None:
+            delay = self.fixed_interval
+        else:
+            delay = self._adaptive_delay(now)
+
+        interval = self._jitter(delay)
+        self.next_poll = now + interval
+        return interval
+
+    def as_dict(self) -> dict[str, Any]:
+        """JSON-fähige Darstellung des gelernten Zustands."""
+        return {
+            "offsets": list(self._offsets),
+            "last_poll": self._last_poll.isoformat() if self._last_poll else None,
+            "last_new_data": (
+                self._last_new_data.isoformat() if self._last_new_data else None
+            ),
+        }
+
+    def restore(self, raw: Mapping[str, Any]) -> None:
+        """Übernimm den gespeicherten Zustand aus `as_dict`."""
+        self._offsets.extend(int(offset) for offset in raw.get("offsets") or ())
+        if raw.get("last_poll"):
+            self._last_poll = dt_util.parse_datetime(raw["last_poll"])
+        if raw.get("last_new_data"):
+            self._last_new_data = dt_util.parse_datetime(raw["last_new_data"])
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
@@ -12,19 +13,36 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
+    ENDPOINT_BATCH,
+    ENDPOINT_COLD_WATER,
+    ENDPOINT_COST_TYPES,
+    ENDPOINT_METER_READINGS,
+    ENDPOINT_MONTHLY_HEATING,
+    ENDPOINT_MONTHLY_HOT_WATER,
     METER_MAPPING,
+    PHASE_FETCH,
+    PHASE_LOGIN,
+    PHASE_MERGE,
+    PHASE_REFRESH,
+    PHASE_SNAPSHOT,
     SENSOR_TYPE_CUMULATIVE,
+    SENSOR_TYPE_FORECAST,
+    SENSOR_TYPE_MEDIAN_DEVIATION,
     SENSOR_TYPE_METER,
     SENSOR_TYPE_MONTHLY,
+    SENSOR_TYPE_ROLLING,
+    SENSOR_TYPE_YOY,
 )
+from .model import BrunataSnapshot
+from .view import SensorView
 
 _LOGGER = __import__("logging").getLogger(__name__)
 
@@ -41,6 +59,92 @@ class SensorDefinition:
     state_class: SensorStateClass | None = None
 
 
+@dataclass(frozen=True)
+class DiagnosticDefinition:
+    """Definition eines Diagnose-Sensors (Dauer einer Phase oder eines Endpunkts)."""
+
+    key: str
+    name: str
+    value_fn: Callable[[Any], float | None]
+    attributes_fn: Callable[[Any], Mapping[str, Any] | None]
+    state_class: SensorStateClass = SensorStateClass.MEASUREMENT
+    device_class: SensorDeviceClass = SensorDeviceClass.DURATION
+    unit: str = UnitOfTime.SECONDS
+
+
+def _timing(name: str, key: str, label: str) -> DiagnosticDefinition:
+    """Diagnose-Sensor mit der letzten Dauer einer Phase oder eines Endpunkts.
+
+    Perzentile, Bytes, Wiederholungen und die letzte Fehlerklasse stehen in
+    den Attributen.
+    """
+
+    def _value(coordinator: Any) -> float | None:
+        stats = coordinator.instrumentation.get(name)
+        if stats is None or stats.last_duration is None:
+            return None
+        return round(stats.last_duration, 3)
+
+    def _attributes(coordinator: Any) -> Mapping[str, Any] | None:
+        stats = coordinator.instrumentation.get(name)
+        return stats.as_dict() if stats is not None else None
+
+    return DiagnosticDefinition(
+        key=key, name=label, value_fn=_value, attributes_fn=_attributes
+    )
+
+
+# Gemessene Phasen eines Abrufs und Portal-Endpunkte: (Name, Bezeichnung)
+_TIMED_PHASES = (
+    (PHASE_REFRESH, "gesamt"),
+    (PHASE_LOGIN, "Login"),
+    (PHASE_FETCH, "Laden"),
+    (PHASE_MERGE, "Fortschreiben"),
+    (PHASE_SNAPSHOT, "Snapshot"),
+)
+_TIMED_ENDPOINTS = (
+    (ENDPOINT_BATCH, "Batch"),
+    (ENDPOINT_METER_READINGS, "Zählerstände"),
+    (ENDPOINT_MONTHLY_HEATING, "Monatswerte Heizung"),
+    (ENDPOINT_MONTHLY_HOT_WATER, "Monatswerte Warmwasser"),
+    (ENDPOINT_COST_TYPES, "Kostenarten"),
+    (ENDPOINT_COLD_WATER, "Kaltwasser"),
+)
+
+
+# Zähler (Logins, Anfragen, Cache, Zeitplan ...) stehen nur im Diagnose-Download
+DIAGNOSTIC_SENSORS: tuple[DiagnosticDefinition, ...] = (
+    *(
+        _timing(phase, f"phase_{phase}_duration", f"Abruf Dauer {label}")
+        for phase, label in _TIMED_PHASES
+    ),
+    *(
+        _timing(endpoint, f"endpoint_{endpoint}_duration", f"Portal {label} Dauer")
+        for endpoint, label in _TIMED_ENDPOINTS
+    ),
+)
+
+
+# Kennzahlen aus der Monatsserie: (Sensor-Typ, Namenszusatz)
+ANALYTICS_SENSORS: tuple[tuple[str, str], ...] = (
+    (SENSOR_TYPE_YOY, "Veränderung zum Vorjahresmonat"),
+    (SENSOR_TYPE_ROLLING, "Verbrauch 12 Monate"),
+    (SENSOR_TYPE_FORECAST, "Jahresprognose"),
+    (SENSOR_TYPE_MEDIAN_DEVIATION, "Abweichung vom Median"),
+)
+
+
+def _device_info(entry: ConfigEntry) -> DeviceInfo:
+    """Gemeinsames 'Gerät' aller Sensoren eines Eintrags."""
+    uid = entry.unique_id or entry.entry_id
+    return DeviceInfo(
+        identifiers={(DOMAIN, uid)},
+        name="Brunata München Nutzeinheit",
+        manufacturer="Brunata Metrona",
+        model="Digitales Nutzerportal",
+    )
+
+
 def _get_label_for_cost_type(cost_type: str) -> str:
     """Bestimme das Label basierend auf dem Kostenart-Präfix."""
     prefix = cost_type[:2] if len(cost_type) >= 2 else cost_type
@@ -55,88 +159,133 @@ async def async_setup_entry(
 ) -> None:
     """Sensoren basierend auf den gefundenen Zählern anlegen."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    data = coordinator.data or {}
-
-    meter_readings = dict(data.get("meter_readings_by_cost_type") or {})
-    monthly_by_cost_type = dict(data.get("monthly_by_cost_type") or {})
-    kwh_histories = dict(data.get("kwh_histories_by_cost_type") or {})
-    cold_water_data = dict(data.get("cold_water_data") or {})
-
-    # Alle verfügbaren Kostenarten sammeln
-    cost_types = sorted(
-        {
-            *meter_readings.keys(),
-            *monthly_by_cost_type.keys(),
-            *cold_water_data.keys(),
-        }
-    )
+    snapshot: BrunataSnapshot = coordinator.data or BrunataSnapshot()
+
+    # Bereits angelegte Sensoren (unique_id) und vorhandene Daten je Kostenart
+    created: set[str] = set()
+    seen: dict[str, tuple[bool, bool, bool, bool]] = {}
+
+    def _new_sensors(snapshot: BrunataSnapshot) -> list[SensorEntity]:
+        """Sensoren für Kostenarten und Daten, die noch keinen Sensor haben."""
+        entities: list[SensorEntity] = []
+        for cost_type in sorted(snapshot.cost_types):
+            data = snapshot.cost_types[cost_type]
+            present = (
+                data.meter is not None,
+                bool(data.monthly),
+                bool(data.cumulative),
+                data.analytics is not None,
+            )
+            if seen.get(cost_type) == present:
+                continue
+            seen[cost_type] = present
+            label = _get_label_for_cost_type(cost_type)
+            prefix = cost_type[:2] if len(cost_type) >= 2 else cost_type
+            config = METER_MAPPING.get(prefix, {})
+
+            # Sensor 1: Zählerstand (meter reading)
+            if data.meter is not None:
+                entities.append(
+                    BrunataSensor(
+                        coordinator=coordinator,
+                        entry=entry,
+                        definition=SensorDefinition(
+                            key=f"meter_{cost_type.lower()}",
+                            name=f"{label} {cost_type} Zählerstand",
+                            sensor_type=SENSOR_TYPE_METER,
+                            cost_type=cost_type,
+                            device_class=(
+                                SensorDeviceClass(device_class)
+                                if (device_class := config.get("device_class"))
+                                else None
+                            ),
+                            state_class=SensorStateClass.TOTAL_INCREASING,
+                        ),
+                    )
+                )
 
-    entities: list[BrunataSensor] = []
-
-    for cost_type in cost_types:
-        label = _get_label_for_cost_type(cost_type)
-        prefix = cost_type[:2] if len(cost_type) >= 2 else cost_type
-        config = METER_MAPPING.get(prefix, {})
-
-        # Sensor 1: Zählerstand (meter reading)
-        if meter_readings.get(cost_type) or cold_water_data.get(cost_type):
-            entities.append(
-                BrunataSensor(
-                    coordinator=coordinator,
-                    entry=entry,
-                    definition=SensorDefinition(
-                        key=f"meter_{cost_type.lower()}",
-                        name=f"{label} {cost_type} Zählerstand",
-                        sensor_type=SENSOR_TYPE_METER,
-                        cost_type=cost_type,
-                        device_class=config.get("device_class"),
-                        state_class=SensorStateClass.TOTAL_INCREASING,
-                    ),
+            # Sensor 2: Monatsverbrauch (kWh) - nur für HZ und WW
+            if data.monthly:
+                entities.append(
+                    BrunataSensor(
+                        coordinator=coordinator,
+                        entry=entry,
+                        definition=SensorDefinition(
+                            key=f"monthly_{cost_type.lower()}",
+                            name=f"{label} {cost_type} Monatsverbrauch",
+                            sensor_type=SENSOR_TYPE_MONTHLY,
+                            cost_type=cost_type,
+                            device_class=SensorDeviceClass.ENERGY,
+                            state_class=SensorStateClass.TOTAL,
+                        ),
+                    )
                 )
-            )
 
-        # Sensor 2: Monatsverbrauch (kWh) - nur für HZ und WW
-        if monthly_by_cost_type.get(cost_type):
-            entities.append(
-                BrunataSensor(
-                    coordinator=coordinator,
-                    entry=entry,
-                    definition=SensorDefinition(
-                        key=f"monthly_{cost_type.lower()}",
-                        name=f"{label} {cost_type} Monatsverbrauch",
-                        sensor_type=SENSOR_TYPE_MONTHLY,
-                        cost_type=cost_type,
-                        device_class=SensorDeviceClass.ENERGY,
-                        state_class=SensorStateClass.TOTAL,
-                    ),
+            # Sensor 3: Kumulativer Verbrauch (kWh)
+            if data.cumulative:
+                entities.append(
+                    BrunataSensor(
+                        coordinator=coordinator,
+                        entry=entry,
+                        definition=SensorDefinition(
+                            key=f"cumulative_{cost_type.lower()}",
+                            name=f"{label} {cost_type} Verbrauch Kumulativ",
+                            sensor_type=SENSOR_TYPE_CUMULATIVE,
+                            cost_type=cost_type,
+                            device_class=SensorDeviceClass.ENERGY,
+                            state_class=SensorStateClass.TOTAL_INCREASING,
+                        ),
+                    )
                 )
-            )
 
-        # Sensor 3: Kumulativer Verbrauch (kWh)
-        if kwh_histories.get(cost_type):
-            entities.append(
-                BrunataSensor(
-                    coordinator=coordinator,
-                    entry=entry,
-                    definition=SensorDefinition(
-                        key=f"cumulative_{cost_type.lower()}",
-                        name=f"{label} {cost_type} Verbrauch Kumulativ",
-                        sensor_type=SENSOR_TYPE_CUMULATIVE,
-                        cost_type=cost_type,
-                        device_class=SensorDeviceClass.ENERGY,
-                        state_class=SensorStateClass.TOTAL_INCREASING,
-                    ),
+            # Sensoren 4-7: Kennzahlen aus der Monatsserie
+            if data.analytics is not None:
+                entities.extend(
+                    BrunataSensor(
+                        coordinator=coordinator,
+                        entry=entry,
+                        definition=SensorDefinition(
+                            key=f"{sensor_type}_{cost_type.lower()}",
+                            name=f"{label} {cost_type} {suffix}",
+                            sensor_type=sensor_type,
+                            cost_type=cost_type,
+                            state_class=SensorStateClass.MEASUREMENT,
+                        ),
+                    )
+                    for sensor_type, suffix in ANALYTICS_SENSORS
                 )
-            )
+
+        entities = [entity for entity in entities if entity.unique_id not in created]
+        created.update(entity.unique_id for entity in entities)
+        return entities
+
+    entities = _new_sensors(snapshot)
+    entities.extend(
+        BrunataDiagnosticSensor(coordinator, entry, definition)
+        for definition in DIAGNOSTIC_SENSORS
+    )
 
     async_add_entities(entities)
     _LOGGER.info("Brunata München: %d Sensoren erstellt", len(entities))
 
+    @callback
+    def _async_add_new_sensors() -> None:
+        """Lege Sensoren für neue Kostenarten an (z.B. nach dem Nachladen älterer Perioden)."""
+        if coordinator.data is None:
+            return
+        if new_entities := _new_sensors(coordinator.data):
+            async_add_entities(new_entities)
+            _LOGGER.info("Brunata München: %d Sensoren ergänzt", len(new_entities))
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_new_sensors))
+
 
 class BrunataSensor(CoordinatorEntity, SensorEntity):
     """Repräsentation eines Brunata Sensors."""
 
     _attr_has_entity_name = True
+    # Die Historie steht in der Langzeitstatistik, nicht in jeder State-Zeile
+    _unrecorded_attributes = frozenset({"history"})
 
     def __init__(
         self,
@@ -144,9 +293,13 @@ class BrunataSensor(CoordinatorEntity, SensorEntity):
         entry: ConfigEntry,
         definition: SensorDefinition,
     ) -> None:
-        super().__init__(coordinator)
+        # Der Kontext ist der Schlüssel der Sicht, damit der Koordinator nur
+        # Sensoren mit geänderten Werten benachrichtigt
+        self._view_key = (definition.sensor_type, definition.cost_type)
+        super().__init__(coordinator, context=self._view_key)
         self._entry = entry
         self._def = definition
+        self._view: SensorView | None = self._lookup_view()
 
         # Eindeutige ID
         uid = entry.unique_id or entry.entry_id
@@ -157,135 +310,90 @@ class BrunataSensor(CoordinatorEntity, SensorEntity):
         self._attr_device_class = definition.device_class
         self._attr_state_class = definition.state_class
 
+    def _lookup_view(self) -> SensorView | None:
+        """Hole die vorberechnete Sicht aus dem aktuellen Snapshot."""
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.sensor_views.get(self._view_key)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Übernimm die neue Sicht, bevor der Zustand geschrieben wird."""
+        self._view = self._lookup_view()
+        super()._handle_coordinator_update()
+
     @property
     def device_info(self) -> DeviceInfo:
         """Ordnet alle Sensoren einem gemeinsamen 'Gerät' zu."""
-        uid = self._entry.unique_id or self._entry.entry_id
-        return DeviceInfo(
-            identifiers={(DOMAIN, uid)},
-            name="Brunata München Nutzeinheit",
-            manufacturer="Brunata Metrona",
-            model="Digitales Nutzerportal",
-        )
+        return _device_info(self._entry)
 
     @property
     def native_unit_of_measurement(self) -> str | None:
         """Die Einheit des Sensors."""
-        # Für monatliche und kumulative Sensoren: kWh
-        if self._def.sensor_type in (SENSOR_TYPE_MONTHLY, SENSOR_TYPE_CUMULATIVE):
-            readings = self._get_readings()
-            if readings:
-                return readings[-1].unit if hasattr(readings[-1], "unit") else "kWh"
+        if self._view is not None:
+            return self._view.unit
+        if self._def.sensor_type == SENSOR_TYPE_MEDIAN_DEVIATION:
+            return "%"
+        if self._def.sensor_type != SENSOR_TYPE_METER:
             return "kWh"
-
-        # Für Zählerstände: aus METER_MAPPING
-        prefix = self._def.cost_type[:2]
-        config = METER_MAPPING.get(prefix, {})
-        return config.get("unit")
+        return METER_MAPPING.get(self._def.cost_type[:2], {}).get("unit")
 
     @property
     def native_value(self) -> float | None:
         """Der aktuelle Messwert."""
-        data = self.coordinator.data or {}
-
-        if self._def.sensor_type == SENSOR_TYPE_METER:
-            # Zählerstand
-            meter_readings = data.get("meter_readings_by_cost_type") or {}
-            cold_water = data.get("cold_water_data") or {}
-
-            reading = meter_readings.get(self._def.cost_type)
-            if reading:
-                return reading.value if hasattr(reading, "value") else reading
-
-            # Fallback auf Kaltwasser-Daten
-            kw_reading = cold_water.get(self._def.cost_type)
-            if kw_reading:
-                return kw_reading.value if hasattr(kw_reading, "value") else kw_reading
-
-        elif self._def.sensor_type == SENSOR_TYPE_MONTHLY:
-            # Monatlicher Verbrauch (letzter Wert)
-            monthly = data.get("monthly_by_cost_type") or {}
-            readings = monthly.get(self._def.cost_type, [])
-            if readings:
-                return readings[-1].value
-
-        elif self._def.sensor_type == SENSOR_TYPE_CUMULATIVE:
-            # Kumulativer Verbrauch
-            totals = data.get("kwh_totals_by_cost_type") or {}
-            return totals.get(self._def.cost_type)
-
-        return None
+        return self._view.value if self._view is not None else None
 
     @property
     def last_reset(self) -> datetime | None:
         """Gibt das Datum des letzten Resets zurück (für monatliche Sensoren)."""
-        if self._def.sensor_type != SENSOR_TYPE_MONTHLY:
-            return None
-
-        readings = self._get_readings()
-        if not readings:
-            return None
-
-        latest = readings[-1]
-        if not hasattr(latest, "timestamp"):
-            return None
-
-        # Reset am Monatsanfang
-        ts = dt_util.as_utc(latest.timestamp)
-        return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return self._view.last_reset if self._view is not None else None
 
     @property
-    def extra_state_attributes(self) -> dict[str, Any] | None:
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
         """Zusätzliche Attribute für den Sensor."""
-        attrs: dict[str, Any] = {
+        if self._view is not None:
+            return self._view.attributes
+        return {
             "cost_type": self._def.cost_type,
             "sensor_type": self._def.sensor_type,
         }
 
-        readings = self._get_readings()
-        if readings:
-            latest = readings[-1]
-
-            # Timestamp hinzufügen
-            if hasattr(latest, "timestamp"):
-                attrs["last_reading"] = latest.timestamp.isoformat()
-
-            # History (letzte 12 Einträge)
-            history = []
-            for r in readings[-12:]:
-                entry = {"value": r.value if hasattr(r, "value") else r}
-                if hasattr(r, "timestamp"):
-                    entry["timestamp"] = r.timestamp.isoformat()
-                if hasattr(r, "unit"):
-                    entry["unit"] = r.unit
-                history.append(entry)
-
-            if len(history) > 1:
-                attrs["history"] = history
-
-        return attrs
-
-    def _get_readings(self) -> list:
-        """Hole die Readings für diesen Sensor."""
-        data = self.coordinator.data or {}
-
-        if self._def.sensor_type == SENSOR_TYPE_METER:
-            meter_readings = data.get("meter_readings_by_cost_type") or {}
-            reading = meter_readings.get(self._def.cost_type)
-            if reading:
-                return [reading]
-
-            cold_water = data.get("cold_water_data") or {}
-            kw_reading = cold_water.get(self._def.cost_type)
-            if kw_reading:
-                return [kw_reading]
-
-        elif self._def.sensor_type == SENSOR_TYPE_MONTHLY:
-            monthly = data.get("monthly_by_cost_type") or {}
-            return list(monthly.get(self._def.cost_type, []))
-
-        elif self._def.sensor_type == SENSOR_TYPE_CUMULATIVE:
-            histories = data.get("kwh_histories_by_cost_type") or {}
-            return list(histories.get(self._def.cost_type, []))
-
-        return []
\ No newline at end of file
+
+class BrunataDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Diagnose-Sensor mit der Dauer einer Abrufphase oder eines Endpunkts."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator,
+        entry: ConfigEntry,
+        definition: DiagnosticDefinition,
+    ) -> None:
+        super().__init__(coordinator)
+        self._entry = entry
+        self._def = definition
+
+        uid = entry.unique_id or entry.entry_id
+        self._attr_unique_id = f"{uid}_{definition.key}"
+        self._attr_name = definition.name
+        self._attr_state_class = definition.state_class
+        self._attr_device_class = definition.device_class
+        self._attr_native_unit_of_measurement = definition.unit
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Ordnet den Sensor dem gemeinsamen 'Gerät' zu."""
+        return _device_info(self._entry)
+
+    @property
+    def native_value(self) -> float | None:
+        """Letzte gemessene Dauer in Sekunden."""
+        return self._def.value_fn(self.coordinator)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Perzentile und Zähler der Messung."""
+        return self._def.attributes_fn(self.coordinator)
@@ -0,0 +1,145 @@
+"""Services für die Brunata München Integration."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_BUCKET,
+    ATTR_COST_TYPE,
+    ATTR_END,
+    ATTR_ENTRY_ID,
+    ATTR_RESTART,
+    ATTR_START,
+    DOMAIN,
+    HISTORY_BUCKETS,
+    SERVICE_BACKFILL,
+    SERVICE_CLEAR_CACHE,
+    SERVICE_FULL_RESYNC,
+    SERVICE_PROFILE_REFRESH,
+    SERVICE_QUERY_HISTORY,
+)
+
+SERVICE_SCHEMA = vol.Schema({vol.Optional(ATTR_ENTRY_ID): cv.string})
+
+QUERY_HISTORY_SCHEMA = SERVICE_SCHEMA.extend(
+    {
+        vol.Required(ATTR_COST_TYPE): vol.All(cv.string, vol.Upper),
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_BUCKET, default="month"): vol.In([*HISTORY_BUCKETS, "none"]),
+    }
+)
+
+BACKFILL_SCHEMA = SERVICE_SCHEMA.extend(
+    {vol.Optional(ATTR_RESTART, default=False): cv.boolean}
+)
+
+
+def _get_coordinators(hass: HomeAssistant, call: ServiceCall) -> list:
+    """Bestimme die Koordinatoren, auf die sich ein Service-Aufruf bezieht."""
+    coordinators = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_ENTRY_ID)
+    if entry_id is None:
+        return list(coordinators.values())
+    if entry_id not in coordinators:
+        raise HomeAssistantError(f"Unbekannter Brunata Eintrag: {entry_id}")
+    return [coordinators[entry_id]]
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    """Zeitangaben ohne Zeitzone als lokale Zeit interpretieren."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return dt_util.as_utc(value)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Registriere die Services der Integration (einmalig)."""
+    if hass.services.has_service(DOMAIN, SERVICE_FULL_RESYNC):
+        return
+
+    async def _async_full_resync(call: ServiceCall) -> None:
+        """Baue die Monatshistorie vollständig neu auf."""
+        for coordinator in _get_coordinators(hass, call):
+            await coordinator.async_full_resync()
+
+    async def _async_clear_cache(call: ServiceCall) -> None:
+        """Verwirf den Metadaten-Cache (Perioden, Kostenarten)."""
+        for coordinator in _get_coordinators(hass, call):
+            await coordinator.async_clear_cache()
+
+    async def _async_backfill(call: ServiceCall) -> None:
+        """Lade alle Abrechnungsperioden im Hintergrund nach."""
+        for coordinator in _get_coordinators(hass, call):
+            coordinator.async_start_backfill(restart=call.data[ATTR_RESTART])
+
+    async def _async_profile_refresh(call: ServiceCall) -> ServiceResponse:
+        """Profiliere je Eintrag einen Abruf (nacheinander)."""
+        return {
+            coordinator.entry.entry_id: await coordinator.async_profile_refresh()
+            for coordinator in _get_coordinators(hass, call)
+        }
+
+    async def _async_query_history(call: ServiceCall) -> ServiceResponse:
+        """Aggregiere die lokale Historie einer Kostenart (ohne Portalzugriff)."""
+        bucket = call.data[ATTR_BUCKET]
+        return {
+            coordinator.entry.entry_id: await coordinator.history.async_query(
+                call.data[ATTR_COST_TYPE],
+                _as_utc(call.data.get(ATTR_START)),
+                _as_utc(call.data.get(ATTR_END)),
+                None if bucket == "none" else bucket,
+            )
+            for coordinator in _get_coordinators(hass, call)
+        }
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_FULL_RESYNC, _async_full_resync, schema=SERVICE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_CLEAR_CACHE, _async_clear_cache, schema=SERVICE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_BACKFILL, _async_backfill, schema=BACKFILL_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE_REFRESH,
+        _async_profile_refresh,
+        schema=SERVICE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_HISTORY,
+        _async_query_history,
+        schema=QUERY_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+@callback
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Entferne die Services, sobald kein Eintrag mehr geladen ist."""
+    hass.services.async_remove(DOMAIN, SERVICE_FULL_RESYNC)
+    hass.services.async_remove(DOMAIN, SERVICE_CLEAR_CACHE)
+    hass.services.async_remove(DOMAIN, SERVICE_BACKFILL)
+    hass.services.async_remove(DOMAIN, SERVICE_PROFILE_REFRESH)
+    hass.services.async_remove(DOMAIN, SERVICE_QUERY_HISTORY)
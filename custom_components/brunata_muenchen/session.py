@@ -0,0 +1,85 @@
+"""Sitzungsverwaltung für den Brunata API Client."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any, TypeVar
+
+from brunata_api import BrunataClient
+
+from .compat import is_auth_failure, reset_session
+from .const import SESSION_MAX_AGE
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class BrunataSession:
+    """Verwaltet Login-Status und Ablauf der Portal-Sitzung eines Clients."""
+
+    def __init__(
+        self, client: BrunataClient, max_age: timedelta = SESSION_MAX_AGE
+    ) -> None:
+        self.client = client
+        self._max_age = max_age
+        self._lock = asyncio.Lock()
+        self._generation = 0
+        self.expires_at: datetime | None = None
+        self.logins = 0
+        self.logins_avoided = 0
+        self.relogins = 0
+
+    @property
+    def valid(self) -> bool:
+        """True, solange die Sitzung als gültig angenommen wird."""
+        return self.expires_at is not None and datetime.now(UTC) < self.expires_at
+
+    def invalidate(self) -> None:
+        """Markiere die Sitzung als abgelaufen (nächster Aufruf meldet neu an)."""
+        self.expires_at = None
+
+    async def _async_login(self) -> None:
+        """Führe einen vollständigen Login durch."""
+        if self.logins:
+            reset_session(self.client)
+        await self.client.login()
+        self._generation += 1
+        self.logins += 1
+        self.expires_at = datetime.now(UTC) + self._max_age
+
+    async def async_ensure_login(self) -> None:
+        """Melde nur an, wenn keine gültige Sitzung besteht."""
+        async with self._lock:
+            if self.valid:
+                self.logins_avoided += 1
+                return
+            await self._async_login()
+
+    async def async_call(
+        self, method: Callable[..., Awaitable[_T]], *args: Any, **kwargs: Any
+    ) -> _T:
+        """Rufe eine Client-Methode auf, bei abgelaufener Sitzung einmal erneut.
+
+        Nur Fehler der Anmeldung (401/403, Umleitung zum Login, fehlendes
+        CSRF-Token) lösen einen erneuten Login aus; alle anderen Fehler,
+        auch als LoginError gemeldete, werden unverändert weitergereicht.
+        """
+        generation = self._generation
+        try:
+            return await method(*args, **kwargs)
+        except Exception as err:
+            if not is_auth_failure(err):
+                raise
+            _LOGGER.debug("Brunata Sitzung abgelaufen, erneuter Login: %s", err)
+
+        async with self._lock:
+            # Parallele Aufrufe teilen sich einen einzigen erneuten Login
+            if self._generation == generation:
+                self.relogins += 1
+                await self._async_login()
+
+        return await method(*args, **kwargs)
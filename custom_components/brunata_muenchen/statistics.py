@@ -0,0 +1,106 @@
+"""Import der Brunata Historie in die Langzeitstatistik des Recorders."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from datetime import datetime
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN, METER_MAPPING
+from .model import CostTypeData, from_epoch
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _statistic_start(timestamp: datetime) -> datetime:
+    """Statistiken müssen auf volle Stunden (UTC) ausgerichtet sein."""
+    return dt_util.as_utc(timestamp).replace(minute=0, second=0, microsecond=0)
+
+
+class BrunataStatisticsImporter:
+    """Schreibt Monats- und Summenreihen als externe Langzeitstatistik."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self.hass = hass
+        self._uid = slugify(entry.unique_id or entry.entry_id)
+        # Start der zuletzt importierten Periode je Statistik
+        self._imported_until: dict[str, datetime | None] = {}
+
+    def statistic_id(self, cost_type: str) -> str:
+        """Statistik-ID einer Kostenart (domain:objekt_id)."""
+        return f"{DOMAIN}:{self._uid}_{slugify(cost_type)}"
+
+    async def _async_last_imported(self, statistic_id: str) -> datetime | None:
+        """Ermittle den Start der zuletzt importierten Periode."""
+        if statistic_id in self._imported_until:
+            return self._imported_until[statistic_id]
+
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
+        )
+        rows = last.get(statistic_id) or []
+        start = dt_util.utc_from_timestamp(rows[0]["start"]) if rows else None
+        self._imported_until[statistic_id] = start
+        return start
+
+    async def async_import(
+        self,
+        cost_types: Mapping[str, CostTypeData],
+        *,
+        full: bool = False,
+        changed_from: Mapping[str, int] | None = None,
+    ) -> None:
+        """Importiere alle noch nicht vorhandenen Perioden (oder alle bei `full`).
+
+        `changed_from` nennt je Kostenart den frühesten korrigierten Monat
+        (Epoch); ab dort werden alle Perioden neu geschrieben, da sich mit
+        einem älteren Monat auch alle späteren Summen verschieben.
+        """
+        for cost_type, data in cost_types.items():
+            monthly, cumulative = data.monthly, data.cumulative
+            if not monthly or not cumulative or len(monthly) != len(cumulative):
+                continue
+
+            statistic_id = self.statistic_id(cost_type)
+            last_start = None if full else await self._async_last_imported(statistic_id)
+            corrected = (changed_from or {}).get(cost_type)
+            if last_start is not None and corrected is not None:
+                last_start = min(last_start, _statistic_start(from_epoch(corrected)))
+
+            # Die letzte Periode wird erneut geschrieben, da Brunata den
+            # laufenden Monat nachträglich aktualisiert.
+            statistics: list[StatisticData] = []
+            for (timestamp, value), total in zip(monthly.points(), cumulative.values):
+                start = _statistic_start(timestamp)
+                if last_start is None or start >= last_start:
+                    statistics.append(StatisticData(start=start, state=value, sum=total))
+            if not statistics:
+                continue
+
+            label = METER_MAPPING.get(cost_type[:2], {}).get("name", cost_type)
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"Brunata {label} {cost_type}",
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement=cumulative.unit or "kWh",
+            )
+            async_add_external_statistics(self.hass, metadata, statistics)
+            self._imported_until[statistic_id] = statistics[-1]["start"]
+
+            _LOGGER.debug(
+                "Brunata Statistik %s: %d Perioden importiert",
+                statistic_id,
+                len(statistics),
+            )
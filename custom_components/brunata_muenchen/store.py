@@ -0,0 +1,121 @@
+"""Persistenter Snapshot-Cache für die Brunata München Integration."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, SNAPSHOT_STORAGE_VERSION
+from .cumulative import CumulativeIndex
+from .model import MeterValue
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def serialize_snapshot(
+    meters: Mapping[str, MeterValue],
+    indexes: Mapping[str, CumulativeIndex],
+    last_full_resync: datetime | None,
+    extras: Mapping[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Wandle Zählerstände und Summen-Indizes in ein JSON-fähiges Dict um.
+
+    `extras` enthält weiteren Zustand (z.B. Abrufplanung, Metadaten-Cache).
+    """
+    return {
+        **(extras or {}),
+        "saved_at": dt_util.utcnow().isoformat(),
+        "last_full_resync": last_full_resync.isoformat() if last_full_resync else None,
+        "cost_types": {
+            cost_type: {
+                "meter": meters[cost_type].as_dict() if cost_type in meters else None,
+                "index": indexes[cost_type].as_dict() if cost_type in indexes else None,
+            }
+            for cost_type in {*meters, *indexes}
+        },
+    }
+
+
+SnapshotState = tuple[
+    dict[str, MeterValue],
+    dict[str, CumulativeIndex],
+    datetime | None,
+    dict[str, Any],
+]
+
+
+def deserialize_snapshot(raw: dict[str, Any]) -> SnapshotState:
+    """Stelle Zählerstände, Summen-Indizes und weiteren Zustand wieder her."""
+    meters: dict[str, MeterValue] = {}
+    indexes: dict[str, CumulativeIndex] = {}
+    for cost_type, item in (raw.get("cost_types") or {}).items():
+        if item.get("meter"):
+            meters[cost_type] = MeterValue.from_dict(item["meter"])
+        if item.get("index"):
+            indexes[cost_type] = CumulativeIndex.from_dict(item["index"])
+    last_full_resync = raw.get("last_full_resync")
+    return (
+        meters,
+        indexes,
+        dt_util.parse_datetime(last_full_resync) if last_full_resync else None,
+        {
+            key: value
+            for key, value in raw.items()
+            if key not in ("saved_at", "last_full_resync", "cost_types") and value
+        },
+    )
+
+
+class BrunataSnapshotStore:
+    """Versionierter Speicher für den letzten erfolgreichen Snapshot."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot"
+        )
+
+    async def async_load(self) -> SnapshotState | None:
+        """Lade den gespeicherten Snapshot (None, falls keiner vorhanden)."""
+        try:
+            raw = await self._store.async_load()
+            if not raw:
+                return None
+            return deserialize_snapshot(raw)
+        except Exception as err:
+            _LOGGER.warning("Gespeicherter Brunata Snapshot ist unlesbar: %s", err)
+            return None
+
+    def async_schedule_save(
+        self,
+        meters: Mapping[str, MeterValue],
+        indexes: Mapping[str, CumulativeIndex],
+        last_full_resync: datetime | None,
+        extras: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Speichere den Snapshot verzögert (bündelt schnelle Folge-Updates)."""
+        self._store.async_delay_save(
+            lambda: serialize_snapshot(meters, indexes, last_full_resync, extras),
+            SNAPSHOT_SAVE_DELAY,
+        )
+
+    async def async_save(
+        self,
+        meters: Mapping[str, MeterValue],
+        indexes: Mapping[str, CumulativeIndex],
+        last_full_resync: datetime | None,
+        extras: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Speichere den Snapshot sofort (z.B. beim Entladen)."""
+        await self._store.async_save(
+            serialize_snapshot(meters, indexes, last_full_resync, extras)
+        )
+
+    async def async_remove(self) -> None:
+        """Lösche den gespeicherten Snapshot."""
+        await self._store.async_remove()
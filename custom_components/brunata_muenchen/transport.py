@@ -0,0 +1,169 @@
+"""Gemeinsamer HTTP-Transport je Portal (Verbindungs-Pool und Rate-Limit).
+
+Ohne Home Assistant nutzbar; die Verwaltung der Transporte und geparkten
+Clients einer HA-Instanz steht in `hub`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Mapping
+from functools import partial
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from brunata_api import BrunataClient
+
+from .compat import async_use_transport
+from .const import (
+    ACCOUNT_PASSWORD,
+    ACCOUNT_URL,
+    ACCOUNT_USERNAME,
+    POOL_KEEPALIVE_EXPIRY,
+    POOL_MAX_CONNECTIONS,
+    POOL_MAX_KEEPALIVE,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_PER_SECOND,
+)
+from .instrumentation import record_bytes
+
+
+def portal_key(base_url: str) -> str:
+    """Normalisierter Schlüssel eines Portals (Schema und Host)."""
+    parts = urlsplit(base_url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+class TokenBucket:
+    """Token-Bucket-Limiter für Anfragen an ein Portal."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Warte auf ein Token. Liefert die Wartezeit in Sekunden."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self._rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class _CountingStream(httpx.AsyncByteStream):
+    """Zählt die empfangenen Bytes einer Antwort beim Lesen."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, transport: SharedTransport) -> None:
+        self._stream = stream
+        self._transport = transport
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._transport.bytes_received += len(chunk)
+            record_bytes(len(chunk))
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """Transport, den alle Clients eines Portals gemeinsam nutzen.
+
+    Cookies bleiben je Client getrennt, nur Verbindungen und das
+    Rate-Limit werden geteilt.
+    """
+
+    def __init__(
+        self, portal: str, transport: httpx.AsyncHTTPTransport, limiter: TokenBucket
+    ) -> None:
+        self.portal = portal
+        self._transport = transport
+        self._limiter = limiter
+        self.users = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.throttled = 0
+        self.throttle_seconds = 0.0
+        self.bytes_received = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Leite die Anfrage nach dem Rate-Limit an den Pool weiter."""
+        waited = await self._limiter.acquire()
+        if waited:
+            self.throttled += 1
+            self.throttle_seconds += waited
+
+        self.requests += 1
+        self.in_flight += 1
+        try:
+            response = await self._transport.handle_async_request(request)
+        finally:
+            self.in_flight -= 1
+        response.stream = _CountingStream(response.stream, self)
+        return response
+
+    async def aclose(self) -> None:
+        """Wird vom Client beim Schließen gerufen; der Pool bleibt offen."""
+
+    async def async_close_pool(self) -> None:
+        """Schließe den Verbindungs-Pool endgültig."""
+        await self._transport.aclose()
+
+
+def create_transport(
+    portal: str,
+    max_connections: int = POOL_MAX_CONNECTIONS,
+    max_keepalive: int = POOL_MAX_KEEPALIVE,
+    rate: float = RATE_LIMIT_PER_SECOND,
+) -> SharedTransport:
+    """Erstelle Pool und Limiter (lädt den SSL-Kontext, daher im Executor)."""
+    return SharedTransport(
+        portal,
+        httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+            ),
+        ),
+        TokenBucket(rate, max(RATE_LIMIT_BURST, int(rate))),
+    )
+
+
+async def async_create_client(
+    data: Mapping[str, Any], transport: SharedTransport
+) -> BrunataClient:
+    """Erstelle den API Client eines Kontos auf dem gemeinsamen Transport.
+
+    `data` enthält die Zugangsdaten wie ein Config Entry (url, username,
+    password, sap_client). Der Konstruktor lädt den SSL-Kontext und läuft
+    daher im Executor.
+    """
+    client = await asyncio.get_running_loop().run_in_executor(
+        None,
+        partial(
+            BrunataClient,
+            base_url=data[ACCOUNT_URL],
+            username=data[ACCOUNT_USERNAME],
+            password=data[ACCOUNT_PASSWORD],
+            sap_client=data.get("sap_client", "201"),
+        ),
+    )
+    await async_use_transport(client, transport)
+    return client
@@ -0,0 +1,203 @@
+"""Vorberechnete Sensor-Sichten, einmal je Koordinator-Update erstellt."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    METER_MAPPING,
+    SENSOR_TYPE_CUMULATIVE,
+    SENSOR_TYPE_FORECAST,
+    SENSOR_TYPE_MEDIAN_DEVIATION,
+    SENSOR_TYPE_METER,
+    SENSOR_TYPE_MONTHLY,
+    SENSOR_TYPE_ROLLING,
+    SENSOR_TYPE_YOY,
+)
+from .model import BrunataSnapshot, CostTypeData, Series, from_epoch
+
+SENSOR_TYPES = (
+    SENSOR_TYPE_METER,
+    SENSOR_TYPE_MONTHLY,
+    SENSOR_TYPE_CUMULATIVE,
+    SENSOR_TYPE_YOY,
+    SENSOR_TYPE_ROLLING,
+    SENSOR_TYPE_FORECAST,
+    SENSOR_TYPE_MEDIAN_DEVIATION,
+)
+
+# Anzahl der Einträge im Attribut `history`
+HISTORY_ATTRIBUTE_LENGTH = 12
+
+
+@dataclass(frozen=True, slots=True)
+class SensorView:
+    """Unveränderlicher Zustand eines Sensors für einen Snapshot."""
+
+    value: float | None
+    unit: str | None
+    last_reset: datetime | None
+    last_reading: str | None
+    attributes: Mapping[str, Any]
+    # Prüfsumme aller geschriebenen Werte; gleich = kein Schreiben nötig
+    fingerprint: int
+
+
+def _history_attribute(series: Series) -> list[dict[str, Any]]:
+    """Serialisiere die letzten Einträge für das Attribut `history`."""
+    return [
+        {"value": value, "timestamp": timestamp.isoformat(), "unit": series.unit}
+        for timestamp, value in series.tail(HISTORY_ATTRIBUTE_LENGTH).points()
+    ]
+
+
+def _build_view(
+    sensor_type: str,
+    cost_type: str,
+    latest: datetime,
+    value: float | None,
+    unit: str | None,
+    history: Series | None = None,
+    extra: Mapping[str, Any] | None = None,
+) -> SensorView:
+    """Erstelle die Sicht eines Sensors."""
+    last_reading = latest.isoformat()
+    attrs: dict[str, Any] = {
+        "cost_type": cost_type,
+        "sensor_type": sensor_type,
+        "last_reading": last_reading,
+        **(extra or {}),
+    }
+    history_key: tuple[bytes, bytes, str | None] | None = None
+    if history is not None and len(history) > 1:
+        attrs["history"] = _history_attribute(history)
+        tail = history.tail(HISTORY_ATTRIBUTE_LENGTH)
+        history_key = (tail.timestamps.tobytes(), tail.values.tobytes(), tail.unit)
+
+    last_reset: datetime | None = None
+    if sensor_type == SENSOR_TYPE_MONTHLY:
+        # Reset am Monatsanfang
+        ts = dt_util.as_utc(latest)
+        last_reset = ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    return SensorView(
+        value=value,
+        unit=unit,
+        last_reset=last_reset,
+        last_reading=last_reading,
+        attributes=attrs,
+        fingerprint=hash(
+            (
+                sensor_type,
+                cost_type,
+                value,
+                unit,
+                last_reset,
+                last_reading,
+                history_key,
+                tuple(extra.items()) if extra else None,
+            )
+        ),
+    )
+
+
+def build_sensor_views(
+    cost_types: Mapping[str, CostTypeData],
+    *,
+    include_history: bool,
+    previous: BrunataSnapshot | None = None,
+) -> dict[tuple[str, str], SensorView]:
+    """Berechne alle Sensor-Sichten, Schlüssel: (sensor_type, cost_type).
+
+    Sichten unveränderter Kostenarten werden aus `previous` übernommen.
+    """
+    views: dict[tuple[str, str], SensorView] = {}
+
+    for cost_type, data in cost_types.items():
+        before = previous.get(cost_type) if previous is not None else None
+        if before is not None and before.fingerprint == data.fingerprint:
+            for sensor_type in SENSOR_TYPES:
+                view = previous.sensor_views.get((sensor_type, cost_type))
+                if view is not None:
+                    views[(sensor_type, cost_type)] = view
+            continue
+
+        if data.meter is not None:
+            views[(SENSOR_TYPE_METER, cost_type)] = _build_view(
+                SENSOR_TYPE_METER,
+                cost_type,
+                data.meter.timestamp,
+                data.meter.value,
+                METER_MAPPING.get(cost_type[:2], {}).get("unit"),
+            )
+
+        for sensor_type, series, value in (
+            (SENSOR_TYPE_MONTHLY, data.monthly, None),
+            (SENSOR_TYPE_CUMULATIVE, data.cumulative, data.total),
+        ):
+            if not series:
+                continue
+            views[(sensor_type, cost_type)] = _build_view(
+                sensor_type,
+                cost_type,
+                series.last_timestamp,
+                value if value is not None else series.last_value,
+                series.unit or "kWh",
+                series if include_history else None,
+            )
+
+        analytics = data.analytics
+        if analytics is None:
+            continue
+        latest = from_epoch(analytics.latest)
+        unit = data.monthly.unit or "kWh"
+        for sensor_type, series, value, extra in (
+            (SENSOR_TYPE_YOY, analytics.yoy, analytics.latest_value(analytics.yoy), None),
+            (
+                SENSOR_TYPE_ROLLING,
+                analytics.rolling,
+                analytics.latest_value(analytics.rolling),
+                None,
+            ),
+            (
+                SENSOR_TYPE_MEDIAN_DEVIATION,
+                analytics.deviation,
+                analytics.latest_value(analytics.deviation),
+                None,
+            ),
+            (
+                SENSOR_TYPE_FORECAST,
+                None,
+                analytics.forecast,
+                {"method": analytics.forecast_method},
+            ),
+        ):
+            views[(sensor_type, cost_type)] = _build_view(
+                sensor_type,
+                cost_type,
+                latest,
+                value,
+                (series.unit if series is not None else None) or unit,
+                series if include_history else None,
+                extra,
+            )
+
+    return views
+
+
+def changed_sensor_views(
+    previous: Mapping[tuple[str, str], SensorView],
+    current: Mapping[tuple[str, str], SensorView],
+) -> set[tuple[str, str]]:
+    """Schlüssel aller Sichten, die neu, entfallen oder verändert sind."""
+    changed = {key for key in previous if key not in current}
+    for key, view in current.items():
+        before = previous.get(key)
+        if before is None or before.fingerprint != view.fingerprint:
+            changed.add(key)
+    return changed
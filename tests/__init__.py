@@ -0,0 +1 @@
+"""Tests der Brunata München Integration."""
@@ -0,0 +1,94 @@
+"""Tests für das Zusammensetzen der nachgeladenen Perioden."""
+
+from __future__ import annotations
+
+from array import array
+from datetime import UTC, datetime
+
+from custom_components.brunata_muenchen.backfill import meter_identities, stitch_series
+from custom_components.brunata_muenchen.model import Series
+
+_2023, _2024, _2025 = (datetime(year, 12, 31, tzinfo=UTC) for year in (2023, 2024, 2025))
+
+
+def _series(*pairs: tuple[int, float], unit: str | None = "kWh") -> Series:
+    return Series(
+        array("q", (epoch for epoch, _ in pairs)),
+        array("d", (value for _, value in pairs)),
+        unit,
+    )
+
+
+def test_stitch_newer_period_wins() -> None:
+    stitched, rejected = stitch_series(
+        [_series((1, 1.0), (2, 2.0)), _series((2, 9.0), (3, 3.0))]
+    )
+    assert rejected == []
+    assert stitched is not None
+    assert list(stitched.timestamps) == [1, 2, 3]
+    assert list(stitched.values) == [1.0, 9.0, 3.0]
+
+
+def test_stitch_converts_units() -> None:
+    stitched, rejected = stitch_series(
+        [_series((1, 1.5), unit="MWh"), _series((2, 10.0), unit="kWh")]
+    )
+    assert rejected == []
+    assert stitched is not None
+    assert stitched.unit == "kWh"
+    assert list(stitched.values) == [1500.0, 10.0]
+
+
+def test_stitch_rejects_incompatible_unit() -> None:
+    older = _series((1, 1.0), unit="m³")
+    stitched, rejected = stitch_series([older, _series((2, 10.0), unit="kWh")])
+    assert rejected == [older]
+    assert stitched is not None
+    assert list(stitched.timestamps) == [2]
+
+
+def test_stitch_empty() -> None:
+    assert stitch_series([Series(), Series()]) == (None, [])
+
+
+def test_identities_follow_rename() -> None:
+    periods = [
+        (_2025, {"HZ02", "WW01"}),
+        (_2024, {"HZ01", "WW01"}),
+        (_2023, {"HZ01", "WW01"}),
+    ]
+    units = {(bis, cost_type): "kWh" for bis, types in periods for cost_type in types}
+    identities = meter_identities(periods, units)
+    assert identities[_2024, "HZ01"] == "HZ02"
+    assert identities[_2023, "HZ01"] == "HZ02"
+    assert identities[_2023, "WW01"] == "WW01"
+
+
+def test_identities_pair_positionally() -> None:
+    periods = [(_2025, {"HZ03", "HZ04"}), (_2024, {"HZ01", "HZ02"})]
+    units = {(bis, cost_type): "kWh" for bis, types in periods for cost_type in types}
+    identities = meter_identities(periods, units)
+    assert identities[_2024, "HZ01"] == "HZ03"
+    assert identities[_2024, "HZ02"] == "HZ04"
+
+
+def test_identities_require_convertible_unit() -> None:
+    periods = [(_2025, {"WW02"}), (_2024, {"WW01"})]
+    identities = meter_identities(periods, {(_2025, "WW02"): "kWh", (_2024, "WW01"): "m³"})
+    assert identities[_2024, "WW01"] == "WW01"
+
+
+def test_identities_removed_meter_keeps_name() -> None:
+    periods = [(_2025, {"HZ01"}), (_2024, {"HZ01", "HZ02"})]
+    identities = meter_identities(periods, {})
+    assert identities[_2024, "HZ01"] == "HZ01"
+    assert identities[_2024, "HZ02"] == "HZ02"
+
+
+def test_identities_skip_taken_name() -> None:
+    # HZ02 wurde in 2024 zu HZ01 umbenannt; das alte HZ01 ist ein anderer Zähler
+    periods = [(_2025, {"HZ01"}), (_2024, {"HZ02"}), (_2023, {"HZ01", "HZ02"})]
+    identities = meter_identities(periods, {})
+    assert identities[_2024, "HZ02"] == "HZ01"
+    assert identities[_2023, "HZ02"] == "HZ01"
+    assert (_2023, "HZ01") not in identities
@@ -0,0 +1,91 @@
+"""Tests für CumulativeIndex (Korrekturen und nachgelieferte Monate)."""
+
+from __future__ import annotations
+
+from array import array
+from decimal import Decimal
+
+from custom_components.brunata_muenchen.cumulative import CumulativeIndex
+from custom_components.brunata_muenchen.model import Series
+
+
+def _series(*pairs: tuple[int, float], unit: str | None = "kWh") -> Series:
+    return Series(
+        array("q", (epoch for epoch, _ in pairs)),
+        array("d", (value for _, value in pairs)),
+        unit,
+    )
+
+
+def _sums(index: CumulativeIndex) -> list[float]:
+    return list(index.series()[1].values)
+
+
+def test_append_in_order() -> None:
+    index = CumulativeIndex()
+    assert index.merge_series(_series((1, 1.0), (2, 2.5), (3, 0.1))) == 1
+    assert _sums(index) == [1.0, 3.5, 3.6]
+    assert index.total == Decimal("3.6")
+    assert index.last_epoch == 3
+
+
+def test_unchanged_merge_reports_nothing() -> None:
+    index = CumulativeIndex()
+    index.merge_series(_series((1, 1.0), (2, 2.0)))
+    assert index.merge_series(_series((1, 1.0), (2, 2.0))) is None
+
+
+def test_correction_shifts_later_sums() -> None:
+    index = CumulativeIndex()
+    index.merge_series(_series((1, 1.0), (2, 2.0), (3, 3.0)))
+    assert index.merge_series(_series((2, 5.0))) == 2
+    assert _sums(index) == [1.0, 6.0, 9.0]
+    assert list(index.series()[0].values) == [1.0, 5.0, 3.0]
+
+
+def test_out_of_order_insert() -> None:
+    index = CumulativeIndex()
+    index.merge_series(_series((1, 1.0), (3, 3.0)))
+    assert index.merge_series(_series((2, 2.0))) == 2
+    assert list(index.series()[0].timestamps) == [1, 2, 3]
+    assert _sums(index) == [1.0, 3.0, 6.0]
+    # Positionen nach dem Einfügen: Korrektur des verschobenen Monats
+    assert index.merge_series(_series((3, 4.0))) == 3
+    assert _sums(index) == [1.0, 3.0, 7.0]
+    assert index.merge_series(_series((0, 0.5))) == 0
+    assert _sums(index) == [0.5, 1.5, 3.5, 7.5]
+
+
+def test_downward_correction_keeps_published_total() -> None:
+    index = CumulativeIndex()
+    index.merge_series(_series((1, 1.0), (2, 2.0)))
+    assert index.published_total() == 3.0
+    index.merge_series(_series((2, 1.0)))
+    assert index.total == Decimal("2.0")
+    assert index.published_total() == 3.0
+    index.merge_series(_series((3, 2.0)))
+    assert index.published_total() == 4.0
+
+
+def test_unit_change_reports_first_month() -> None:
+    index = CumulativeIndex()
+    index.merge_series(_series((1, 1.0), (2, 2.0)))
+    assert index.merge_series(_series((2, 2.0), unit="MWh")) == 1
+    assert index.unit == "MWh"
+
+
+def test_exact_decimal_sums() -> None:
+    index = CumulativeIndex()
+    index.merge_series(_series(*((epoch, 0.1) for epoch in range(10))))
+    assert index.total == Decimal("1.0")
+
+
+def test_round_trip() -> None:
+    index = CumulativeIndex()
+    index.merge_series(_series((1, 1.0), (2, 2.0)))
+    index.merge_series(_series((2, 0.5)))
+    restored = CumulativeIndex.from_dict(index.as_dict())
+    assert _sums(restored) == _sums(index)
+    assert restored.published_total() == index.published_total() == 3.0
+    assert restored.merge_series(_series((0, 1.0))) == 0
+    assert _sums(restored) == [1.0, 2.0, 2.5]
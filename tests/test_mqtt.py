@@ -0,0 +1,68 @@
+"""Tests für die Nachrichten der MQTT-Brücke."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Sequence
+
+from custom_components.brunata_muenchen.const import SENSOR_TYPE_METER, SENSOR_TYPE_MONTHLY
+from custom_components.brunata_muenchen.mqtt import MeterState, MqttBridge, MqttMessage
+
+
+class _Sink:
+    def __init__(self) -> None:
+        self.batches: list[list[MqttMessage]] = []
+
+    async def async_publish_many(self, messages: Sequence[MqttMessage]) -> None:
+        self.batches.append(list(messages))
+
+
+def _state(value: float, unit: str = "kWh", cost_type: str = "HZ01") -> MeterState:
+    return MeterState(cost_type, SENSOR_TYPE_METER, value, unit, "2025-03-01T00:00:00+00:00")
+
+
+def test_state_topic_and_payload() -> None:
+    bridge = MqttBridge(_Sink(), "brunata/", "unit1")
+    messages, changed = bridge.messages([_state(1.5)])
+    assert [message.topic for message in messages] == ["brunata/unit1/hz01/reading"]
+    assert json.loads(messages[0].payload)["value"] == 1.5
+    assert messages[0].retain
+    assert list(changed) == [(SENSOR_TYPE_METER, "HZ01")]
+
+
+def test_unchanged_states_are_skipped() -> None:
+    sink = _Sink()
+    bridge = MqttBridge(sink, "brunata", "unit1")
+    states = [_state(1.0), MeterState("WW01", SENSOR_TYPE_MONTHLY, 2.0, "kWh", None)]
+    assert asyncio.run(bridge.async_publish(states)) == 2
+    assert asyncio.run(bridge.async_publish(states)) == 0
+    assert bridge.skipped == 2
+    assert asyncio.run(bridge.async_publish([_state(1.1), states[1]])) == 1
+    assert [message.topic for message in sink.batches[-1]] == ["brunata/unit1/hz01/reading"]
+
+
+def test_messages_do_not_mark_as_sent() -> None:
+    bridge = MqttBridge(_Sink(), "brunata", "unit1")
+    bridge.messages([_state(1.0)])
+    messages, _ = bridge.messages([_state(1.0)])
+    assert len(messages) == 1
+
+
+def test_discovery_before_first_state_and_on_unit_change() -> None:
+    sink = _Sink()
+    bridge = MqttBridge(sink, "brunata", "unit1", discovery=True)
+    asyncio.run(bridge.async_publish([_state(1.0)]))
+    topics = [message.topic for message in sink.batches[-1]]
+    assert topics == [
+        "homeassistant/sensor/brunata_unit1_reading_hz01/config",
+        "brunata/unit1/hz01/reading",
+    ]
+    config = json.loads(sink.batches[-1][0].payload)
+    assert config["state_topic"] == topics[1]
+    assert config["state_class"] == "total_increasing"
+
+    asyncio.run(bridge.async_publish([_state(2.0)]))
+    assert len(sink.batches[-1]) == 1
+    asyncio.run(bridge.async_publish([_state(2.0, unit="MWh")]))
+    assert len(sink.batches[-1]) == 2
@@ -0,0 +1,67 @@
+"""Tests für den Circuit Breaker."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from custom_components.brunata_muenchen.resilience import CircuitBreaker
+
+_NOW = datetime(2025, 1, 1, tzinfo=UTC)
+_RESET = timedelta(minutes=10)
+
+
+def _tripped() -> CircuitBreaker:
+    breaker = CircuitBreaker(threshold=2, reset_timeout=_RESET)
+    breaker.record_failure(_NOW)
+    breaker.record_failure(_NOW)
+    return breaker
+
+
+def test_opens_after_threshold() -> None:
+    breaker = CircuitBreaker(threshold=2, reset_timeout=_RESET)
+    breaker.record_failure(_NOW)
+    assert not breaker.is_open
+    assert breaker.allow(_NOW)
+    breaker.record_failure(_NOW)
+    assert breaker.is_open
+    assert breaker.trips == 1
+    assert not breaker.allow(_NOW + _RESET / 2)
+
+
+def test_success_resets_failures() -> None:
+    breaker = CircuitBreaker(threshold=2, reset_timeout=_RESET)
+    breaker.record_failure(_NOW)
+    breaker.record_success()
+    breaker.record_failure(_NOW)
+    assert not breaker.is_open
+
+
+def test_single_half_open_probe() -> None:
+    breaker = _tripped()
+    later = _NOW + _RESET
+    assert breaker.allow(later)
+    assert not breaker.allow(later)
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow(later)
+    assert breaker.allow(later)
+
+
+def test_failed_probe_reopens() -> None:
+    breaker = _tripped()
+    later = _NOW + _RESET
+    assert breaker.allow(later)
+    breaker.record_failure(later)
+    assert breaker.is_open
+    assert breaker.trips == 1
+    assert not breaker.allow(later + _RESET / 2)
+    assert breaker.allow(later + _RESET)
+
+
+def test_released_probe_allows_next() -> None:
+    breaker = _tripped()
+    later = _NOW + _RESET
+    assert breaker.allow(later)
+    breaker.release()
+    assert breaker.is_open
+    assert breaker.allow(later)
@@ -0,0 +1,82 @@
+"""Tests für die adaptive Abrufplanung."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from custom_components.brunata_muenchen.const import (
+    DEFAULT_SCAN_INTERVAL,
+    POLL_ACTIVE_INTERVAL,
+    POLL_BACKOFF_BASE,
+    POLL_BACKOFF_MAX,
+    POLL_JITTER,
+)
+from custom_components.brunata_muenchen.model import to_epoch
+from custom_components.brunata_muenchen.scheduler import PollScheduler
+
+
+def _within_jitter(interval: timedelta, expected: timedelta) -> bool:
+    return expected * (1 - POLL_JITTER) <= interval <= expected * (1 + POLL_JITTER)
+
+
+def test_default_interval_until_learned() -> None:
+    scheduler = PollScheduler()
+    now = datetime(2025, 3, 10, tzinfo=UTC)
+    interval = scheduler.next_interval(now)
+    assert _within_jitter(interval, DEFAULT_SCAN_INTERVAL)
+    assert scheduler.next_poll == now + interval
+
+
+def test_fixed_interval() -> None:
+    scheduler = PollScheduler(timedelta(hours=3))
+    now = datetime(2025, 3, 10, tzinfo=UTC)
+    assert _within_jitter(scheduler.next_interval(now), timedelta(hours=3))
+
+
+def test_backoff_grows_and_caps() -> None:
+    scheduler = PollScheduler()
+    now = datetime(2025, 3, 10, tzinfo=UTC)
+    scheduler.record_failure()
+    assert _within_jitter(scheduler.next_interval(now), POLL_BACKOFF_BASE)
+    scheduler.record_failure()
+    assert _within_jitter(scheduler.next_interval(now), POLL_BACKOFF_BASE * 2)
+    for _ in range(20):
+        scheduler.record_failure()
+    assert _within_jitter(scheduler.next_interval(now), POLL_BACKOFF_MAX)
+    scheduler.record_success(now, [])
+    assert scheduler.failures == 0
+
+
+def test_backoff_capped_by_fixed_interval() -> None:
+    scheduler = PollScheduler(timedelta(minutes=20))
+    for _ in range(5):
+        scheduler.record_failure()
+    now = datetime(2025, 3, 10, tzinfo=UTC)
+    assert _within_jitter(scheduler.next_interval(now), timedelta(minutes=20))
+
+
+def test_publish_time_clamped_to_poll() -> None:
+    scheduler = PollScheduler()
+    first = datetime(2025, 3, 1, tzinfo=UTC)
+    now = datetime(2025, 3, 5, 12, tzinfo=UTC)
+    scheduler.record_success(first, [])
+    # Zeitstempel nach dem Abruf (z.B. Periodenende) zählen als "jetzt"
+    scheduler.record_success(now, [to_epoch(datetime(2025, 12, 31, tzinfo=UTC))])
+    assert scheduler.as_dict()["offsets"] == [int((now - first).total_seconds())]
+    # ... ältere Zeitstempel frühestens als der vorige Abruf
+    scheduler.record_success(
+        datetime(2025, 4, 5, tzinfo=UTC), [to_epoch(datetime(2025, 2, 1, tzinfo=UTC))]
+    )
+    assert scheduler.as_dict()["offsets"][-1] == 4 * 86400 + 12 * 3600
+
+
+def test_active_polling_in_window() -> None:
+    scheduler = PollScheduler()
+    day = 86400
+    scheduler.restore({"offsets": [4 * day, 4 * day]})
+    now = datetime(2025, 3, 5, 6, tzinfo=UTC)
+    assert _within_jitter(scheduler.next_interval(now), POLL_ACTIVE_INTERVAL)
+    # Nach neuen Werten im Fenster wird bis zum nächsten Fenster gewartet
+    scheduler.record_success(now, [])
+    scheduler.record_success(now, [to_epoch(now)])
+    assert scheduler.next_interval(now) > POLL_ACTIVE_INTERVAL * 2